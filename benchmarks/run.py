@@ -0,0 +1,343 @@
+"""
+Benchmarks for the data-access, search and table-rendering hot paths.
+
+    python -m benchmarks.run --sizes 1000,10000 --output benchmarks/results/latest.json
+    python -m benchmarks.run --sizes 1000,10000,100000,1000000 --baseline benchmarks/baseline.json
+    python -m benchmarks.run --backend sqlite --sizes 1000,100000
+
+For every size the DB cases rebuild a scratch database (DB_BENCH_NAME, default
+dental_clinic_bench, on the DB_HOST/DB_USER/... server) from dental_clinic.sql,
+the migrations and that many synthetic patients/appointments. With --backend
+sqlite the scratch database is a file of that name in the temp directory, so
+no server is needed. Search and table cases run on in-memory rows; table cases
+need a display and are skipped without one.
+
+On MySQL the report also records, per size, whether EXPLAIN shows the hot
+queries using the migrations/004 indexes. The report is JSON. With --baseline,
+medians are compared against an earlier report and cases slower by more than
+--tolerance are listed as regressions (exit status 1 with --fail-on-regression).
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from benchmarks import seed
+from clinic_app.datagen import COLUMNS, ClinicDataGenerator
+from clinic_app.repository import ClinicStore, get_store
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict:
+    """Run fn repeat times (after one warm-up) and summarise wall time in ms."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "repeat": repeat,
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "max_ms": max(samples),
+    }
+
+
+def _checked(fn: Callable[..., tuple], *args, **kwargs) -> Callable[[], object]:
+    """Wrap a store call so a (False, msg, ...) result aborts the case instead of timing an error."""
+
+    def call():
+        result = fn(*args, **kwargs)
+        if not result[0]:
+            raise RuntimeError(result[1])
+        return result
+
+    return call
+
+
+# -- cases ------------------------------------------------------------------
+def db_cases(db: ClinicStore) -> dict[str, Callable[[], object]]:
+    counter = iter(range(10**9))
+
+    def insert_one() -> None:
+        i = next(counter)
+        _checked(db.insert_patient, "Bench", f"Single{i}", "1990-01-01", "adult", "female", None, None, None)()
+
+    def insert_bulk() -> None:
+        i = next(counter)
+        rows = [("Bench", f"Bulk{i}-{j}", "1985-06-15", "adult", "male", None, None, None) for j in range(1000)]
+        _checked(db.insert_patients_bulk, rows)()
+
+    def checkout() -> None:
+        # A fresh slot each run: the backends refuse double bookings.
+        when = datetime.datetime(2040, 1, 1) + datetime.timedelta(minutes=30 * next(counter))
+        _checked(
+            db.checkout,
+            1,
+            1,
+            when.strftime("%Y-%m-%d %H:%M:%S"),
+            "Bench checkout",
+            [{"treatment_id": 1, "fee": 800.0}, {"treatment_id": 3, "fee": 1500.0}],
+            2300.0,
+            "cash",
+            "paid",
+        )()
+
+    return {
+        "fetch_patients_first_page": _checked(db.fetch_patients_page, page_size=200),
+        "fetch_patients_all_pages": _checked(db.fetch_all_pages, db.fetch_patients_page),
+        "fetch_appointment_view_first_page": _checked(db.fetch_appointment_view_page, page_size=200),
+        "fetch_payment_view_first_page": _checked(db.fetch_payment_view_page, page_size=200),
+        "fetch_history_view_first_page": _checked(db.fetch_history_view_page, page_size=200, descending=True),
+        "search_patient_history": _checked(db.search_patient_history, "caries"),
+        "search_appointments": _checked(db.search_appointments, "cleaning"),
+        "revenue_summary_by_month": _checked(db.fetch_revenue_summary, group_by=("month",), filters={"status": "paid"}),
+        "appointment_summary_by_dentist": _checked(db.fetch_appointment_summary, group_by=("dentist_id", "status")),
+        "dentist_schedule_month": _checked(db.fetch_dentist_schedule, 1, "2030-01-01 00:00:00", "2030-02-01 00:00:00"),
+        "insert_patient": insert_one,
+        "insert_patients_bulk_1000": insert_bulk,
+        "checkout": checkout,
+    }
+
+
+def synthetic_rows(n: int) -> list[dict]:
+    """Patient dicts from the data generator for the in-memory cases."""
+    gen = ClinicDataGenerator(patients=n, id_base=seed.ID_BASE)
+    return [dict(zip(COLUMNS["patients"], gen.patient(seed.ID_BASE + i))) for i in range(1, n + 1)]
+
+
+def search_cases(rows: list[dict]) -> dict[str, Callable[[], object]]:
+    from clinic_app.logic.search import SearchIndex
+
+    def typing() -> None:
+        index = SearchIndex(rows)
+        for term in ("m", "me", "men", "mend", "mendo", "mendoza", "mendo", ""):
+            index.search(term)
+
+    def cold_term() -> None:
+        # Clearing first forces a full scan instead of narrowing the previous hits.
+        index.search("")
+        index.search("0912")
+
+    index = SearchIndex(rows)
+    return {
+        "search_index_build": lambda: SearchIndex(rows),
+        "search_index_typing": typing,
+        "search_index_cold_term": cold_term,
+    }
+
+
+def ui_cases(rows: list[dict]) -> Optional[tuple[object, dict[str, Callable[[], object]]]]:
+    """(hidden Tk root, VirtualTable cases), or None when there is no display."""
+    import tkinter
+
+    try:
+        import customtkinter as ctk
+
+        root = ctk.CTk()
+    except tkinter.TclError:
+        return None
+    root.withdraw()
+
+    from clinic_app.ui.virtual_table import VirtualTable
+
+    columns = [
+        ("first_name", "First name", 1),
+        ("last_name", "Last name", 1),
+        ("birth_date", "Birth date", 1),
+        ("gender", "Gender", 1),
+        ("phone", "Phone", 1),
+    ]
+    table = VirtualTable(root, columns)
+    table.pack(fill="both", expand=True)
+    root.update()
+
+    def build() -> None:
+        t = VirtualTable(root, columns)
+        t.set_rows(rows)
+        root.update_idletasks()
+        t.destroy()
+
+    def stream_pages() -> None:
+        table.set_rows([])
+        for start in range(0, len(rows), 200):
+            table.append_rows(rows[start : start + 200])
+        root.update_idletasks()
+
+    def scroll_sweep() -> None:
+        table.set_rows(rows)
+        step = max(1, len(rows) // 200)
+        for offset in range(0, len(rows), step):
+            table.scroll_to(offset)
+        root.update_idletasks()
+
+    return root, {
+        "virtual_table_build": build,
+        "virtual_table_stream_pages": stream_pages,
+        "virtual_table_scroll_sweep": scroll_sweep,
+    }
+
+
+def explain_indexes(n: int) -> list[dict]:
+    """EXPLAIN the indexed queries on the freshly seeded database and print any that miss their index."""
+    from clinic_app.migrations import explain_checks
+
+    ok, msg, rows = explain_checks()
+    if not ok:
+        print(f"[{n}] EXPLAIN check failed: {msg}", file=sys.stderr)
+        return []
+    for row in rows:
+        if not row["ok"]:
+            print(f"[{n}] {row['label']} uses {row['key'] or 'no index'} instead of {row['expected']}", file=sys.stderr)
+    return rows
+
+
+# -- reporting --------------------------------------------------------------
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float = 1.0) -> list[dict]:
+    """
+    Cases present in both reports, with their median ratio. A case regresses when
+    it is more than tolerance slower and at least min_delta_ms slower (timer noise).
+    """
+    rows = []
+    for key, current in report["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base or "median_ms" not in current or "median_ms" not in base:
+            continue
+        ratio = current["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        rows.append(
+            {
+                "case": key,
+                "baseline_ms": base["median_ms"],
+                "current_ms": current["median_ms"],
+                "ratio": ratio,
+                "regression": ratio > 1 + tolerance and current["median_ms"] - base["median_ms"] >= min_delta_ms,
+            }
+        )
+    return rows
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run data-access, search and rendering benchmarks.")
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated synthetic row counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=str(ROOT / "benchmarks" / "results" / "latest.json"))
+    parser.add_argument("--baseline", help="earlier report to compare medians against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--skip-db", action="store_true", help="only run in-memory search and table cases")
+    parser.add_argument("--skip-ui", action="store_true")
+    parser.add_argument("--database", default=os.getenv("DB_BENCH_NAME", "dental_clinic_bench"))
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=os.getenv("CLINIC_DB_BACKEND", "mysql"))
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = {
+        "meta": {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": args.repeat,
+            "backend": args.backend,
+        },
+        "results": {},
+        "skipped": {},
+    }
+
+    if not args.skip_db and args.backend == "mysql":
+        # db_mysql reads DB_NAME per connection; point it at the scratch database before first use.
+        os.environ["DB_NAME"] = args.database
+    sqlite_path = Path(tempfile.gettempdir()) / f"{args.database}.db"
+
+    for n in sizes:
+        cases: dict[str, Callable[[], object]] = {}
+        if not args.skip_db:
+            try:
+                store = get_store(args.backend)
+                if args.backend == "sqlite":
+                    counts = seed.seed_sqlite(sqlite_path, n)
+                    store.configure(sqlite_path)
+                else:
+                    seed.recreate_database(args.database)
+                    counts = seed.seed_synthetic(args.database, n)
+                    report.setdefault("explain", {})[str(n)] = explain_indexes(n)
+                report["meta"].setdefault("row_counts", {})[str(n)] = counts
+                cases.update(db_cases(store))
+            except Exception as exc:
+                report["skipped"][f"db@{n}"] = str(exc)
+                print(f"[{n}] skipping DB cases: {exc}", file=sys.stderr)
+
+        rows = synthetic_rows(n)
+        cases.update(search_cases(rows))
+        root = None
+        if not args.skip_ui:
+            ui = ui_cases(rows)
+            if ui is None:
+                report["skipped"][f"ui@{n}"] = "no display"
+            else:
+                root, table_cases = ui
+                cases.update(table_cases)
+
+        for name, fn in cases.items():
+            key = f"{name}@{n}"
+            try:
+                result = measure(fn, args.repeat)
+            except Exception as exc:
+                report["skipped"][key] = str(exc)
+                print(f"{key:<45} error: {exc}", file=sys.stderr)
+                continue
+            report["results"][key] = result
+            print(f"{key:<45} median {result['median_ms']:10.2f} ms  min {result['min_ms']:10.2f} ms")
+        if root is not None:
+            root.destroy()
+
+        if not args.skip_db and args.backend == "mysql":
+            from clinic_app.db_mysql import get_pool
+
+            # Next size rebuilds the database; drop connections that point at the old one.
+            get_pool().close_all()
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Report written to {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        rows = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        report["comparison"] = rows
+        output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        regressions = [r for r in rows if r["regression"]]
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else ""
+            print(f"{r['case']:<45} {r['baseline_ms']:10.2f} -> {r['current_ms']:10.2f} ms  x{r['ratio']:.2f} {flag}")
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
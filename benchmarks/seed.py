@@ -0,0 +1,106 @@
+"""
+Build a throwaway database for benchmarks: the schema and sample rows from
+dental_clinic.sql, the migrations, then rows from clinic_app.datagen. MySQL/
+MariaDB databases are rebuilt on the DB_* server; SQLite ones are plain files.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import mysql.connector
+
+from clinic_app import db as sqlite_db
+from clinic_app import migrations
+from clinic_app.datagen import COLUMNS, TABLE_ORDER, ClinicDataGenerator, batches
+from clinic_app.db_common import split_sql
+
+ROOT = Path(__file__).resolve().parent.parent
+DUMP_PATH = ROOT / "dental_clinic.sql"
+
+BATCH = 5000
+# Generated ids start above the sample rows shipped in dental_clinic.sql.
+ID_BASE = 1000
+
+
+def server_connection(**overrides):
+    """Connect with the DB_* settings but without selecting a database."""
+    config = {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": int(os.getenv("DB_PORT", "3306")),
+        "user": os.getenv("DB_USER", "root"),
+        "password": os.getenv("DB_PASSWORD", ""),
+    }
+    config.update(overrides)
+    return mysql.connector.connect(**config)
+
+
+def run_script(cur, path: Path) -> None:
+    for stmt in split_sql(path.read_text(encoding="utf-8")):
+        cur.execute(stmt)
+
+
+def recreate_database(name: str) -> None:
+    """Drop and rebuild `name` from dental_clinic.sql, then apply the migrations with the runner."""
+    conn = server_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(f"DROP DATABASE IF EXISTS `{name}`")
+        cur.execute(f"CREATE DATABASE `{name}` CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci")
+        cur.execute(f"USE `{name}`")
+        run_script(cur, DUMP_PATH)
+        conn.commit()
+        ok, msg, _applied = migrations.migrate(conn)
+        if not ok:
+            raise RuntimeError(msg)
+    finally:
+        conn.close()
+
+
+def seed_synthetic(name: str, n: int, seed: int = 42) -> dict:
+    """
+    Load n generated patients and n appointments (with their line items,
+    payments and history) into database `name`. Returns row counts per table.
+    """
+    gen = ClinicDataGenerator(patients=n, appointments=n, seed=seed, id_base=ID_BASE)
+    conn = server_connection(database=name)
+    try:
+        cur = conn.cursor()
+        for table, rows in batches(gen.rows(), BATCH):
+            columns = COLUMNS[table]
+            cur.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                rows,
+            )
+            conn.commit()
+        counts = {}
+        for table in TABLE_ORDER:
+            cur.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cur.fetchone()[0]
+        return counts
+    finally:
+        conn.close()
+
+
+def seed_sqlite(path: Path, n: int, seed: int = 42) -> dict:
+    """
+    Recreate the SQLite file at path (schema plus dental_clinic.sql rows) and
+    load the same generated rows as seed_synthetic. Returns row counts per table.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+    gen = ClinicDataGenerator(patients=n, appointments=n, seed=seed, id_base=ID_BASE)
+    conn = sqlite_db.get_connection(path)
+    try:
+        sqlite_db.init_schema(conn)
+        for table, rows in batches(gen.rows(), BATCH):
+            columns = COLUMNS[table]
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})",
+                rows,
+            )
+            conn.commit()
+        conn.execute("ANALYZE")
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLE_ORDER}
+    finally:
+        conn.close()
@@ -0,0 +1,198 @@
+"""
+Revenue and utilization KPIs for the dashboard.
+
+Every figure is a GROUP BY over the daily summary tables (daily_revenue and
+daily_appointment_stats), which triggers keep current on each payment and
+appointment insert. A snapshot therefore reads a few rows per day and dentist
+in the window, however many payments and appointments have been recorded.
+snapshot_async() issues those reads concurrently through db_async.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime
+from typing import Optional, Tuple
+
+from clinic_app import db_async
+from clinic_app.reference_cache import get_dentists
+from clinic_app.repository import store
+
+# Revenue counts collected payments only (not pending, refunded or cancelled ones).
+REVENUE_STATUS = "paid"
+APPOINTMENT_STATUSES = ("scheduled", "completed", "cancelled", "no_show")
+
+
+def _month_start(day: datetime.date, months_back: int = 0) -> datetime.date:
+    index = day.year * 12 + day.month - 1 - months_back
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def _month_end(day: datetime.date) -> datetime.date:
+    return _month_start(day, -1) - datetime.timedelta(days=1)
+
+
+def daily_revenue(
+    days: int = 30, today: datetime.date | None = None
+) -> Tuple[bool, str, Optional[list[tuple[datetime.date, float]]]]:
+    """Collected revenue for each of the last `days` days, oldest first (0.0 on days without payments)."""
+    today = today or datetime.date.today()
+    start = today - datetime.timedelta(days=days - 1)
+    ok, msg, rows = store.fetch_revenue_summary(
+        start, today, group_by=("day",), filters={"status": REVENUE_STATUS}
+    )
+    if not ok:
+        return False, msg, None
+    return True, "ok", _daily_series(rows, start, days)
+
+
+def _daily_series(rows: list[dict] | None, start: datetime.date, days: int) -> list[tuple[datetime.date, float]]:
+    by_day = {str(r["day"]): float(r["amount"] or 0) for r in rows or []}
+    series = []
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        series.append((day, by_day.get(day.isoformat(), 0.0)))
+    return series
+
+
+def monthly_revenue(
+    months: int = 12, today: datetime.date | None = None
+) -> Tuple[bool, str, Optional[list[tuple[str, float]]]]:
+    """Collected revenue per calendar month ('YYYY-MM') for the last `months` months, oldest first."""
+    today = today or datetime.date.today()
+    start = _month_start(today, months - 1)
+    ok, msg, rows = store.fetch_revenue_summary(
+        start, _month_end(today), group_by=("month",), filters={"status": REVENUE_STATUS}
+    )
+    if not ok:
+        return False, msg, None
+    return True, "ok", _monthly_series(rows, today, months)
+
+
+def _monthly_series(rows: list[dict] | None, today: datetime.date, months: int) -> list[tuple[str, float]]:
+    by_month = {r["month"]: float(r["amount"] or 0) for r in rows or []}
+    series = []
+    for back in range(months - 1, -1, -1):
+        month = _month_start(today, back).strftime("%Y-%m")
+        series.append((month, by_month.get(month, 0.0)))
+    return series
+
+
+def status_mix(start=None, end=None) -> Tuple[bool, str, Optional[dict[str, int]]]:
+    """Appointment count per status for days in [start, end], every status present."""
+    ok, msg, rows = store.fetch_appointment_summary(start, end, group_by=("status",))
+    if not ok:
+        return False, msg, None
+    return True, "ok", _status_mix(rows)
+
+
+def _status_mix(rows: list[dict] | None) -> dict[str, int]:
+    mix = dict.fromkeys(APPOINTMENT_STATUSES, 0)
+    for r in rows or []:
+        mix[r["status"]] = int(r["appointments"] or 0)
+    return mix
+
+
+def no_show_rate(completed: int, no_show: int) -> float:
+    """Share of appointments that fell due and were not attended (scheduled/cancelled ones do not count)."""
+    due = completed + no_show
+    return no_show / due if due else 0.0
+
+
+def dentist_load(start=None, end=None) -> Tuple[bool, str, Optional[list[dict]]]:
+    """
+    Per-dentist appointment counts for days in [start, end] with their no-show
+    rate, busiest first. Rows: dentist_id, dentist, appointments, completed,
+    no_show, no_show_rate.
+    """
+    ok, msg, rows = store.fetch_appointment_summary(start, end, group_by=("dentist_id", "status"))
+    if not ok:
+        return False, msg, None
+    return True, "ok", _dentist_load(rows, get_dentists())
+
+
+def _dentist_load(rows: list[dict] | None, dentists_result: tuple) -> list[dict]:
+    ok_d, _msg, dentists = dentists_result
+    names = {d["dentist_id"]: d.get("full_name") for d in dentists or []} if ok_d else {}
+
+    load: dict[int, dict] = {}
+    for r in rows or []:
+        entry = load.setdefault(
+            r["dentist_id"],
+            {
+                "dentist_id": r["dentist_id"],
+                "dentist": names.get(r["dentist_id"]) or f"Dentist #{r['dentist_id']}",
+                "appointments": 0,
+                **dict.fromkeys(APPOINTMENT_STATUSES, 0),
+            },
+        )
+        count = int(r["appointments"] or 0)
+        entry["appointments"] += count
+        entry[r["status"]] = count
+    result = sorted(load.values(), key=lambda e: -e["appointments"])
+    for entry in result:
+        entry["no_show_rate"] = no_show_rate(entry["completed"], entry["no_show"])
+    return result
+
+
+def snapshot(today: datetime.date | None = None) -> Tuple[bool, str, Optional[dict]]:
+    """
+    All dashboard KPIs in one call: revenue today and this month, 30 daily and
+    12 monthly revenue points, this month's status mix, per-dentist load and
+    overall no-show rate.
+    """
+    today = today or datetime.date.today()
+    month_start, month_end = _month_start(today), _month_end(today)
+
+    ok, msg, daily = daily_revenue(30, today)
+    if not ok:
+        return False, msg, None
+    ok, msg, monthly = monthly_revenue(12, today)
+    if not ok:
+        return False, msg, None
+    ok, msg, mix = status_mix(month_start, month_end)
+    if not ok:
+        return False, msg, None
+    ok, msg, dentists = dentist_load(month_start, month_end)
+    if not ok:
+        return False, msg, None
+    return True, "ok", _snapshot(today, daily, monthly, mix, dentists)
+
+
+async def snapshot_async(today: datetime.date | None = None) -> Tuple[bool, str, Optional[dict]]:
+    """snapshot() with its four summary reads and the dentist lookup in flight at once."""
+    today = today or datetime.date.today()
+    month_start, month_end = _month_start(today), _month_end(today)
+    day_start = today - datetime.timedelta(days=29)
+    paid = {"status": REVENUE_STATUS}
+    *results, dentists_result = await asyncio.gather(
+        db_async.fetch_revenue_summary(day_start, today, group_by=("day",), filters=paid),
+        db_async.fetch_revenue_summary(_month_start(today, 11), month_end, group_by=("month",), filters=paid),
+        db_async.fetch_appointment_summary(month_start, month_end, group_by=("status",)),
+        db_async.fetch_appointment_summary(month_start, month_end, group_by=("dentist_id", "status")),
+        asyncio.to_thread(get_dentists),
+    )
+    for ok, msg, _rows in results:
+        if not ok:
+            return False, msg, None
+    daily_rows, monthly_rows, mix_rows, load_rows = (rows for _ok, _msg, rows in results)
+    return True, "ok", _snapshot(
+        today,
+        _daily_series(daily_rows, day_start, 30),
+        _monthly_series(monthly_rows, today, 12),
+        _status_mix(mix_rows),
+        _dentist_load(load_rows, dentists_result),
+    )
+
+
+def _snapshot(today: datetime.date, daily: list, monthly: list, mix: dict[str, int], dentists: list[dict]) -> dict:
+    return {
+        "today": today,
+        "revenue_today": daily[-1][1],
+        "revenue_month": monthly[-1][1],
+        "daily_revenue": daily,
+        "monthly_revenue": monthly,
+        "status_mix": mix,
+        "dentist_load": dentists,
+        "appointments_month": sum(mix.values()),
+        "no_show_rate": no_show_rate(mix["completed"], mix["no_show"]),
+    }
@@ -0,0 +1,240 @@
+"""
+Password verification for the login screen.
+
+bcrypt is deliberately slow (about 250 ms per check at cost 12), so AuthService
+runs it on a small dedicated thread pool: callers on the UI's worker threads
+wait on it, the Tk thread never does, and however many logins arrive at once
+at most HASH_WORKERS hashes burn CPU. Rows still holding a plaintext password
+are compared in constant time and, after a successful login, replaced with a
+bcrypt hash in the background.
+
+An unknown username is checked against a dummy hash, so a failed login takes
+as long whether or not the account exists.
+
+A successful login returns an AuthToken. Until it expires, unlock() accepts the
+same password again by comparing an in-memory HMAC instead of re-running
+bcrypt, so unlocking after a lock or idle timeout is instant. Failed attempts
+are counted per username; after MAX_FAILURES within FAILURE_WINDOW seconds the
+username is refused until the oldest failure ages out, before any hashing.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import math
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import bcrypt
+
+from clinic_app.repository import store
+
+BCRYPT_ROUNDS = 12
+HASH_WORKERS = 2
+SESSION_TTL = 30 * 60.0
+MAX_FAILURES = 5
+FAILURE_WINDOW = 5 * 60.0
+
+ACTIVE_STATUSES = ("active", "1", "true", "yes")
+INVALID_LOGIN = "Invalid username or password."
+
+
+def is_bcrypt_hash(value: str) -> bool:
+    return value.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+@dataclass(frozen=True)
+class AuthToken:
+    """A verified login. expires_at is on the time.monotonic() clock."""
+
+    token: str
+    user_id: int
+    username: str
+    role: Optional[str]
+    expires_at: float
+
+
+class AuthService:
+    """Thread-safe; share one instance (see `service`)."""
+
+    def __init__(
+        self,
+        rounds: int = BCRYPT_ROUNDS,
+        workers: int = HASH_WORKERS,
+        ttl: float = SESSION_TTL,
+        max_failures: int = MAX_FAILURES,
+        failure_window: float = FAILURE_WINDOW,
+    ) -> None:
+        self.rounds = rounds
+        self.ttl = ttl
+        self.max_failures = max_failures
+        self.failure_window = failure_window
+        self._hashers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        # Per-process key: the cached digests are useless outside this process.
+        self._key = secrets.token_bytes(32)
+        self._sessions: dict[str, tuple[AuthToken, bytes]] = {}
+        self._failures: dict[str, deque[float]] = {}
+        self._dummy: Optional[str] = None
+
+    # -- throttling -----------------------------------------------------------
+    def retry_after(self, username: str) -> float:
+        """Seconds until username may try again (0.0 if it may now)."""
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.get(username.casefold())
+            if not failures:
+                return 0.0
+            while failures and failures[0] <= now - self.failure_window:
+                failures.popleft()
+            if len(failures) < self.max_failures:
+                return 0.0
+            return failures[0] + self.failure_window - now
+
+    def _refused(self, username: str) -> Optional[str]:
+        wait = self.retry_after(username)
+        if wait > 0:
+            return f"Too many failed attempts. Try again in {math.ceil(wait)} s."
+        return None
+
+    def _failed(self, username: str) -> None:
+        with self._lock:
+            self._failures.setdefault(username.casefold(), deque()).append(time.monotonic())
+
+    def _succeeded(self, username: str) -> None:
+        with self._lock:
+            self._failures.pop(username.casefold(), None)
+
+    # -- hashing --------------------------------------------------------------
+    def _digest(self, username: str, password: str) -> bytes:
+        return hmac.new(self._key, f"{username.casefold()}\0{password}".encode(), hashlib.sha256).digest()
+
+    def _matches(self, password: str, stored: str) -> bool:
+        if not is_bcrypt_hash(stored):
+            return hmac.compare_digest(password.encode(), stored.encode())
+        try:
+            return self._hashers.submit(bcrypt.checkpw, password.encode(), stored.encode()).result()
+        except ValueError:
+            # Malformed hash in the row; nobody can log in with it.
+            return False
+
+    def _dummy_hash(self) -> str:
+        """A hash at self.rounds that no password matches, made on first use."""
+        if self._dummy is None:
+            # Two threads may both make one; either serves.
+            salt = bcrypt.gensalt(self.rounds)
+            self._dummy = self._hashers.submit(bcrypt.hashpw, secrets.token_urlsafe(16).encode(), salt).result().decode()
+        return self._dummy
+
+    def _upgrade(self, user_id: int, current: str, password: str) -> None:
+        """Replace a plaintext password_hash with a bcrypt hash; retried on the next login if it fails."""
+        new_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt(self.rounds)).decode()
+        store.update_password_hash(user_id, current, new_hash)
+
+    # -- logins ---------------------------------------------------------------
+    def _authenticate(self, username: str, password: str) -> Tuple[bool, str, Optional[dict]]:
+        refused = self._refused(username)
+        if refused:
+            return False, refused, None
+        ok, msg, row = store.fetch_user_account(username)
+        if not ok:
+            return False, msg, None
+        if row is None:
+            # Same bcrypt cost as a wrong password, so timing does not tell which usernames exist.
+            self._matches(password, self._dummy_hash())
+            self._failed(username)
+            return False, INVALID_LOGIN, None
+        if (row.get("status") or "").lower() not in ACTIVE_STATUSES:
+            return False, "Account is not active.", None
+
+        current = row.get("password_hash") or ""
+        # Trim the stored value to tolerate trailing CR/LF from manual edits.
+        stored = current.strip()
+        if not self._matches(password, stored):
+            self._failed(username)
+            return False, INVALID_LOGIN, None
+        self._succeeded(username)
+        if not is_bcrypt_hash(stored):
+            self._hashers.submit(self._upgrade, row["user_id"], current, password)
+        return True, "Login successful.", row
+
+    def verify(self, username: str, password: str) -> Tuple[bool, str, Optional[str]]:
+        """Check a username/password. Returns (ok, message, role); message is user-friendly."""
+        ok, msg, row = self._authenticate(username, password)
+        return ok, msg, row.get("role") if row else None
+
+    def login(self, username: str, password: str) -> Tuple[bool, str, Optional[AuthToken]]:
+        """verify() and, on success, open a session. Returns (ok, message, token)."""
+        ok, msg, row = self._authenticate(username, password)
+        if not ok:
+            return False, msg, None
+        now = time.monotonic()
+        token = AuthToken(secrets.token_urlsafe(32), row["user_id"], row["username"], row.get("role"), now + self.ttl)
+        with self._lock:
+            for key in [k for k, (t, _d) in self._sessions.items() if t.expires_at <= now]:
+                del self._sessions[key]
+            self._sessions[token.token] = (token, self._digest(token.username, password))
+        return True, msg, token
+
+    def resume(self, token: str) -> Optional[AuthToken]:
+        """The session for token if it has not expired or been logged out, else None."""
+        with self._lock:
+            entry = self._sessions.get(token)
+        if entry is None or entry[0].expires_at <= time.monotonic():
+            return None
+        return entry[0]
+
+    def unlock(self, token: str, password: str) -> Tuple[bool, str, Optional[AuthToken]]:
+        """
+        Re-enter the password for a locked session. While the session is live
+        this is an HMAC compare (no bcrypt) plus one account lookup, so an
+        account disabled since login is refused and signed out; the session is
+        extended with the account's current role. An expired session falls
+        back to a full login; a logged-out token is refused.
+        """
+        with self._lock:
+            entry = self._sessions.get(token)
+        if entry is None:
+            return False, "Session expired. Sign in again.", None
+        session, digest = entry
+        if session.expires_at <= time.monotonic():
+            self.logout(token)
+            return self.login(session.username, password)
+        refused = self._refused(session.username)
+        if refused:
+            return False, refused, None
+        if not hmac.compare_digest(digest, self._digest(session.username, password)):
+            self._failed(session.username)
+            return False, INVALID_LOGIN, None
+        ok, msg, row = store.fetch_user_account(session.username)
+        if not ok:
+            return False, msg, None
+        if row is None or row["user_id"] != session.user_id:
+            self.logout(token)
+            return False, "Session expired. Sign in again.", None
+        if (row.get("status") or "").lower() not in ACTIVE_STATUSES:
+            self.logout(token)
+            return False, "Account is not active.", None
+        self._succeeded(session.username)
+        renewed = AuthToken(session.token, session.user_id, session.username, row.get("role"), time.monotonic() + self.ttl)
+        with self._lock:
+            if token in self._sessions:
+                self._sessions[token] = (renewed, digest)
+        return True, "Unlocked.", renewed
+
+    def logout(self, token: str) -> None:
+        with self._lock:
+            self._sessions.pop(token, None)
+
+
+service = AuthService()
+
+
+def verify_user(username: str, password: str) -> Tuple[bool, str, Optional[str]]:
+    """Check username/password (see AuthService.verify). Returns (ok, message, role)."""
+    return service.verify(username, password)
@@ -0,0 +1,364 @@
+"""
+Deterministic synthetic clinic data for load and scale testing.
+
+    python -m clinic_app.datagen --patients 100000 --appointments 300000 --format sql --out seed.sql
+    python -m clinic_app.datagen --patients 1000000 --format csv --out data/
+
+The same seed and options always produce the same rows. Output is streamed:
+rows are generated one at a time and written in batches, so memory stays flat
+no matter how many rows are requested. Generated ids start after --id-base so
+the rows can be loaded on top of dental_clinic.sql; line items reference the
+existing treatments catalog.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime
+import itertools
+import random
+import sys
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from clinic_app.logic.treatment import get_age_group
+
+# Column order for each generated table; rows are tuples in this order.
+COLUMNS: dict[str, tuple[str, ...]] = {
+    "dentists": ("dentist_id", "full_name", "specialization", "phone", "email", "is_active", "created_at"),
+    "patients": (
+        "patient_id", "first_name", "last_name", "birth_date", "age_group",
+        "gender", "phone", "email", "address", "created_at",
+    ),
+    "appointments": (
+        "appointment_id", "patient_id", "dentist_id", "scheduled_at", "status", "reason", "notes", "created_at",
+    ),
+    "appointment_treatments": ("id", "appointment_id", "treatment_id", "fee", "notes"),
+    "payments": (
+        "payment_id", "appointment_id", "patient_id", "amount", "payment_date",
+        "method", "status", "reference_no", "remarks",
+    ),
+    "patient_history": (
+        "history_id", "patient_id", "appointment_id", "visit_date", "diagnosis",
+        "treatment_given", "prescription", "follow_up_date", "notes",
+    ),
+}
+# Parents before children, so any prefix of the output is referentially consistent.
+TABLE_ORDER = tuple(COLUMNS)
+
+# Treatments shipped in dental_clinic.sql: id -> (name, age_group, default_fee).
+TREATMENTS = {
+    1: ("Cleaning", "any", 800.00),
+    2: ("Fluoride", "child", 500.00),
+    3: ("Filling", "any", 1500.00),
+    4: ("Extraction", "any", 2000.00),
+    5: ("Dentures", "old", 18000.00),
+}
+
+FIRST_NAMES = (
+    "Maria", "Jose", "Ana", "Juan", "Carmela", "Miguel", "Rosa", "Paolo", "Liza", "Mark", "Grace", "John",
+    "Kristine", "Angelo", "Bea", "Carlo", "Diana", "Enzo", "Faith", "Gabriel", "Hannah", "Ivan", "Joy", "Kevin",
+)
+LAST_NAMES = (
+    "Santos", "Reyes", "Cruz", "Bautista", "Ocampo", "Garcia", "Mendoza", "Torres", "Tomas", "Andrada",
+    "Castillo", "Flores", "Villanueva", "Ramos", "Castro", "Rivera", "Aquino", "Navarro", "Salazar", "Mercado",
+)
+STREETS = ("Rizal St.", "Mabini Ave.", "Bonifacio Rd.", "Luna St.", "Del Pilar St.", "Quezon Blvd.")
+CITIES = ("Manila", "Quezon City", "Makati", "Pasig", "Taguig", "Cebu City", "Davao City")
+SPECIALIZATIONS = (
+    "General Dentistry", "Pediatric Dentistry", "Orthodontics", "Endodontics",
+    "Periodontics", "Cosmetic Dentistry", "Prosthodontics", "Oral Surgery",
+)
+
+# reason -> (treatment ids it usually leads to, diagnosis, prescription); per age group weights below.
+REASONS = {
+    "Dental Checkup": ((1,), "No active caries; good oral hygiene.", None),
+    "Routine Cleaning": ((1,), "Mild plaque and calculus buildup.", None),
+    "Fluoride Treatment": ((2,), "Early enamel demineralization.", "Fluoride toothpaste twice daily."),
+    "Toothache": ((3, 4), "Dental caries on lower molar.", "Ibuprofen 400mg as needed for pain."),
+    "Braces Consultation": ((1,), "Mild crowding of anterior teeth.", None),
+    "Tooth Extraction": ((4,), "Non-restorable tooth.", "Amoxicillin 500mg three times daily for 7 days."),
+    "Dentures Evaluation": ((5,), "Multiple missing teeth; loose existing dentures.", None),
+    "Gum Treatment": ((1,), "Moderate gingivitis.", "Chlorhexidine mouthwash twice daily."),
+}
+
+
+def _weighted(pairs) -> tuple[tuple, list[int]]:
+    """(value, weight) pairs -> (values, cumulative weights) for random.choices."""
+    values, weights = zip(*pairs)
+    return values, list(itertools.accumulate(weights))
+
+
+def _pick(rng: random.Random, weighted: tuple[tuple, list[int]]):
+    values, cum_weights = weighted
+    return rng.choices(values, cum_weights=cum_weights)[0]
+
+
+REASON_WEIGHTS = {
+    "child": _weighted((
+        ("Dental Checkup", 30), ("Routine Cleaning", 20), ("Fluoride Treatment", 30), ("Toothache", 15),
+        ("Tooth Extraction", 5),
+    )),
+    "adult": _weighted((
+        ("Dental Checkup", 25), ("Routine Cleaning", 25), ("Toothache", 20), ("Braces Consultation", 10),
+        ("Tooth Extraction", 8), ("Gum Treatment", 12),
+    )),
+    "old": _weighted((
+        ("Dental Checkup", 20), ("Routine Cleaning", 15), ("Toothache", 15), ("Tooth Extraction", 15),
+        ("Dentures Evaluation", 25), ("Gum Treatment", 10),
+    )),
+}
+
+# Age ranges: roughly a fifth children, a fifth seniors.
+AGE_BANDS = _weighted((((1, 12), 20), ((13, 59), 60), ((60, 95), 20)))
+GENDERS = _weighted((("female", 49), ("male", 49), ("other", 2)))
+PAST_STATUS = _weighted((("completed", 78), ("cancelled", 10), ("no_show", 12)))
+FUTURE_STATUS = _weighted((("scheduled", 93), ("cancelled", 7)))
+PAYMENT_METHODS = _weighted((("cash", 50), ("card", 30), ("online", 18), ("other", 2)))
+PAYMENT_STATUS = _weighted((("paid", 90), ("pending", 6), ("refunded", 4)))
+
+OPEN_HOUR, CLOSE_HOUR, SLOT_MINUTES = 8, 17, 30
+
+
+class ClinicDataGenerator:
+    """
+    Streams referentially consistent rows for dentists, patients, appointments,
+    appointment_treatments, payments and patient_history.
+
+    Patient attributes are derived from (seed, patient_id) alone, so an
+    appointment can look up its patient's age group without keeping patients
+    in memory. Appointments are spread over [start, end) in clinic slots;
+    those before as_of are completed/cancelled/no-show, later ones scheduled.
+    """
+
+    def __init__(
+        self,
+        patients: int = 1000,
+        appointments: Optional[int] = None,
+        dentists: int = 10,
+        seed: int = 42,
+        start: datetime.date = datetime.date(2024, 1, 1),
+        end: datetime.date = datetime.date(2026, 1, 1),
+        as_of: datetime.date = datetime.date(2025, 7, 1),
+        id_base: int = 0,
+    ) -> None:
+        self.patients = patients
+        self.appointments = appointments if appointments is not None else patients * 3
+        self.dentists = dentists
+        self.seed = seed
+        self.start = start
+        self.end = end
+        self.as_of = datetime.datetime.combine(as_of, datetime.time())
+        self.id_base = id_base
+        # Re-seeded per patient id; reusing one instance avoids allocating a Random per lookup.
+        self._patient_rng = random.Random()
+
+    # -- per-row builders ---------------------------------------------------
+    def _seed_patient(self, patient_id: int) -> random.Random:
+        rng = self._patient_rng
+        rng.seed(self.seed * 1_000_000_007 + patient_id)
+        return rng
+
+    @staticmethod
+    def _age(rng: random.Random) -> int:
+        lo, hi = _pick(rng, AGE_BANDS)
+        return rng.randint(lo, hi)
+
+    def age_group(self, patient_id: int) -> str:
+        """Age group of a patient without building the whole row (first draws of patient())."""
+        return get_age_group(self._age(self._seed_patient(patient_id)))
+
+    def patient(self, patient_id: int) -> tuple:
+        """The patient row for an id in this data set (same result every call)."""
+        rng = self._seed_patient(patient_id)
+        age = self._age(rng)
+        birth = self.as_of.date() - datetime.timedelta(days=age * 365 + rng.randint(0, 364))
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        gender = _pick(rng, GENDERS)
+        email = f"{first}.{last}{patient_id}@example.com".lower() if rng.random() < 0.6 else None
+        address = f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}"
+        created = datetime.datetime.combine(self.start, datetime.time(8)) - datetime.timedelta(
+            days=rng.randint(0, 730)
+        )
+        return (
+            patient_id, first, last, birth, get_age_group(age), gender,
+            f"09{rng.randint(100000000, 999999999)}", email, address, created,
+        )
+
+    def _dentist(self, rng: random.Random, n: int) -> tuple:
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        return (
+            self.id_base + n,
+            f"Dr. {first} {last}",
+            SPECIALIZATIONS[(n - 1) % len(SPECIALIZATIONS)],
+            f"0917{rng.randint(1000000, 9999999)}",
+            f"{first}.{last}{n}@dclinic.example".lower(),
+            int(rng.random() < 0.9),
+            datetime.datetime.combine(self.start, datetime.time(8)),
+        )
+
+    def _slot(self, i: int) -> datetime.datetime:
+        """Evenly spread appointment i over the date range, snapped to an opening-hours slot."""
+        slots_per_day = (CLOSE_HOUR - OPEN_HOUR) * 60 // SLOT_MINUTES
+        days = max(1, (self.end - self.start).days)
+        position = i * days * slots_per_day // max(1, self.appointments)
+        day, slot = divmod(position, slots_per_day)
+        return datetime.datetime.combine(
+            self.start + datetime.timedelta(days=day), datetime.time(OPEN_HOUR)
+        ) + datetime.timedelta(minutes=slot * SLOT_MINUTES)
+
+    # -- stream ---------------------------------------------------------------
+    def rows(self) -> Iterator[tuple[str, tuple]]:
+        """Yield (table, row) pairs in foreign-key safe order."""
+        rng = random.Random(f"{self.seed}:main")
+        base = self.id_base
+        for n in range(1, self.dentists + 1):
+            yield "dentists", self._dentist(rng, n)
+        for n in range(1, self.patients + 1):
+            yield "patients", self.patient(base + n)
+
+        line_id = payment_id = history_id = base
+        for n in range(1, self.appointments + 1):
+            appt_id = base + n
+            patient_id = base + rng.randint(1, self.patients)
+            age_group = self.age_group(patient_id)
+            when = self._slot(n - 1)
+            past = when < self.as_of
+            status = _pick(rng, PAST_STATUS if past else FUTURE_STATUS)
+            reason = _pick(rng, REASON_WEIGHTS[age_group])
+            treatment_ids, diagnosis, prescription = REASONS[reason]
+            created = when - datetime.timedelta(days=rng.randint(1, 30))
+            yield "appointments", (
+                appt_id, patient_id, base + rng.randint(1, self.dentists), when, status, reason, None, created,
+            )
+            if status != "completed":
+                continue
+
+            total = 0.0
+            given = []
+            for treatment_id in treatment_ids[: rng.randint(1, len(treatment_ids))]:
+                name, _, fee = TREATMENTS[treatment_id]
+                line_id += 1
+                total += fee
+                given.append(name)
+                yield "appointment_treatments", (line_id, appt_id, treatment_id, fee, None)
+
+            payment_id += 1
+            method = _pick(rng, PAYMENT_METHODS)
+            yield "payments", (
+                payment_id, appt_id, patient_id, total, when + datetime.timedelta(minutes=SLOT_MINUTES),
+                method, _pick(rng, PAYMENT_STATUS),
+                f"REF-{payment_id:08d}" if method in ("card", "online") else None, None,
+            )
+
+            history_id += 1
+            follow_up = (when + datetime.timedelta(days=180)).date() if rng.random() < 0.4 else None
+            yield "patient_history", (
+                history_id, patient_id, appt_id, when, diagnosis, ", ".join(given), prescription, follow_up, None,
+            )
+
+
+def batches(stream: Iterator[tuple[str, tuple]], size: int = 1000) -> Iterator[tuple[str, list[tuple]]]:
+    """
+    Group a (table, row) stream into (table, rows) batches of up to size rows.
+    Whenever one table's buffer fills, every buffer is flushed in TABLE_ORDER,
+    so parents are always emitted before the children that reference them.
+    """
+    buffers: dict[str, list[tuple]] = {table: [] for table in TABLE_ORDER}
+    for table, row in stream:
+        buf = buffers[table]
+        buf.append(row)
+        if len(buf) >= size:
+            for name in TABLE_ORDER:
+                if buffers[name]:
+                    yield name, buffers[name]
+                    buffers[name] = []
+    for name in TABLE_ORDER:
+        if buffers[name]:
+            yield name, buffers[name]
+
+
+def _sql_literal(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, datetime.datetime):
+        return f"'{value:%Y-%m-%d %H:%M:%S}'"
+    text = str(value).replace("\\", "\\\\").replace("'", "''")
+    return f"'{text}'"
+
+
+def write_sql(stream: Iterator[tuple[str, tuple]], out: IO[str], batch_size: int = 1000) -> dict[str, int]:
+    """Write multi-row INSERT statements; returns row counts per table."""
+    counts = dict.fromkeys(TABLE_ORDER, 0)
+    out.write("SET FOREIGN_KEY_CHECKS = 1;\nSTART TRANSACTION;\n")
+    for table, rows in batches(stream, batch_size):
+        columns = ", ".join(f"`{c}`" for c in COLUMNS[table])
+        values = ",\n".join("(" + ", ".join(_sql_literal(v) for v in row) + ")" for row in rows)
+        out.write(f"INSERT INTO `{table}` ({columns}) VALUES\n{values};\n")
+        counts[table] += len(rows)
+    out.write("COMMIT;\n")
+    return counts
+
+
+def write_csv(stream: Iterator[tuple[str, tuple]], out_dir: Path) -> dict[str, int]:
+    """Write one <table>.csv per table under out_dir; returns row counts per table."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts = dict.fromkeys(TABLE_ORDER, 0)
+    handles = {table: open(out_dir / f"{table}.csv", "w", newline="", encoding="utf-8") for table in TABLE_ORDER}
+    try:
+        writers = {table: csv.writer(fh) for table, fh in handles.items()}
+        for table, writer in writers.items():
+            writer.writerow(COLUMNS[table])
+        for table, row in stream:
+            writers[table].writerow(row)
+            counts[table] += 1
+    finally:
+        for fh in handles.values():
+            fh.close()
+    return counts
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate deterministic synthetic clinic data.")
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--appointments", type=int, help="default: 3 per patient")
+    parser.add_argument("--dentists", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=datetime.date(2024, 1, 1))
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=datetime.date(2026, 1, 1))
+    parser.add_argument("--as-of", type=datetime.date.fromisoformat, default=datetime.date(2025, 7, 1))
+    parser.add_argument("--id-base", type=int, default=1000, help="generated ids start after this value")
+    parser.add_argument("--format", choices=("sql", "csv"), default="sql")
+    parser.add_argument("--out", default="-", help="SQL file (- for stdout) or CSV directory")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    gen = ClinicDataGenerator(
+        patients=args.patients,
+        appointments=args.appointments,
+        dentists=args.dentists,
+        seed=args.seed,
+        start=args.start,
+        end=args.end,
+        as_of=args.as_of,
+        id_base=args.id_base,
+    )
+    if args.format == "csv":
+        counts = write_csv(gen.rows(), Path(args.out))
+    elif args.out == "-":
+        counts = write_sql(gen.rows(), sys.stdout, args.batch_size)
+    else:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            counts = write_sql(gen.rows(), fh, args.batch_size)
+    print(", ".join(f"{table}: {n}" for table, n in counts.items()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
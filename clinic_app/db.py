@@ -1,36 +1,356 @@
 from __future__ import annotations
 
+import datetime
+import decimal
+import os
 import sqlite3
 from pathlib import Path
 
-# SQLite file inside the package data directory.
-DB_PATH = Path(__file__).resolve().parent / "data" / "clinic.db"
+from clinic_app.db_common import split_sql
 
+# SQLite file inside the package data directory; CLINIC_SQLITE_PATH overrides it.
+DB_PATH = Path(os.getenv("CLINIC_SQLITE_PATH") or Path(__file__).resolve().parent / "data" / "clinic.db")
+DUMP_PATH = Path(__file__).resolve().parent.parent / "dental_clinic.sql"
 
-def get_connection() -> sqlite3.Connection:
+
+def _convert_timestamp(raw: bytes):
+    text = raw.decode()
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _convert_date(raw: bytes):
+    text = raw.decode()
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+# Store dates the way MySQL prints them so text comparison orders them correctly,
+# and hand back datetime/date objects like mysql.connector does.
+sqlite3.register_adapter(datetime.datetime, lambda v: v.isoformat(" ", timespec="seconds"))
+sqlite3.register_adapter(datetime.date, lambda v: v.isoformat())
+# DECIMAL columns read through mysql.connector (replica pulls) arrive as Decimal.
+sqlite3.register_adapter(decimal.Decimal, float)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+sqlite3.register_converter("DATE", _convert_date)
+
+
+def get_connection(path: str | Path | None = None) -> sqlite3.Connection:
     """
     Return a SQLite connection with row access by column name.
-    Ensures the database directory exists.
+    Ensures the database directory exists and switches the file to WAL mode,
+    so readers never wait for the single writer.
     """
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
+    path = Path(path or DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, timeout=5.0, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA temp_store = MEMORY")
     return conn
 
 
-def init_schema() -> None:
-    """Create basic tables if they do not exist yet."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-    )
-    conn.commit()
-    conn.close()
+# Local time, matching MySQL's NOW() on a server in the clinic's timezone.
+_NOW = "(datetime('now', 'localtime'))"
+
+# Same tables as dental_clinic.sql; enums become CHECK constraints. gender also
+# allows '' because MySQL stores that for invalid enum values (the dump has some).
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    birth_date DATE,
+    age_group TEXT CHECK (age_group IN ('child', 'adult', 'old')),
+    gender TEXT CHECK (gender IN ('male', 'female', 'other', '')),
+    phone TEXT,
+    email TEXT,
+    address TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT {_NOW}
+);
+
+CREATE TABLE IF NOT EXISTS dentists (
+    dentist_id INTEGER PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    specialization TEXT,
+    phone TEXT,
+    email TEXT,
+    is_active INTEGER DEFAULT 1,
+    created_at TIMESTAMP NOT NULL DEFAULT {_NOW}
+);
+
+CREATE TABLE IF NOT EXISTS treatments (
+    treatment_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    age_group TEXT DEFAULT 'any' CHECK (age_group IN ('child', 'adult', 'old', 'any')),
+    default_fee NUMERIC DEFAULT 0.00
+);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    appointment_id INTEGER PRIMARY KEY,
+    patient_id INTEGER NOT NULL REFERENCES patients (patient_id),
+    dentist_id INTEGER NOT NULL REFERENCES dentists (dentist_id),
+    scheduled_at TIMESTAMP NOT NULL,
+    status TEXT DEFAULT 'scheduled' CHECK (status IN ('scheduled', 'completed', 'cancelled', 'no_show')),
+    reason TEXT,
+    notes TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT {_NOW}
+);
+
+CREATE TABLE IF NOT EXISTS appointment_treatments (
+    id INTEGER PRIMARY KEY,
+    appointment_id INTEGER NOT NULL REFERENCES appointments (appointment_id),
+    treatment_id INTEGER NOT NULL REFERENCES treatments (treatment_id),
+    fee NUMERIC,
+    notes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS payments (
+    payment_id INTEGER PRIMARY KEY,
+    appointment_id INTEGER NOT NULL REFERENCES appointments (appointment_id),
+    patient_id INTEGER NOT NULL REFERENCES patients (patient_id),
+    amount NUMERIC NOT NULL,
+    payment_date TIMESTAMP DEFAULT {_NOW},
+    method TEXT DEFAULT 'cash' CHECK (method IN ('cash', 'card', 'online', 'other')),
+    status TEXT DEFAULT 'paid' CHECK (status IN ('pending', 'paid', 'refunded', 'cancelled')),
+    reference_no TEXT,
+    remarks TEXT
+);
+
+CREATE TABLE IF NOT EXISTS patient_history (
+    history_id INTEGER PRIMARY KEY,
+    patient_id INTEGER NOT NULL REFERENCES patients (patient_id),
+    appointment_id INTEGER REFERENCES appointments (appointment_id),
+    visit_date TIMESTAMP DEFAULT {_NOW},
+    diagnosis TEXT,
+    treatment_given TEXT,
+    prescription TEXT,
+    follow_up_date DATE,
+    notes TEXT
+);
+
+CREATE TABLE IF NOT EXISTS user_accounts (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    role TEXT DEFAULT 'patient' CHECK (role IN ('admin', 'dentist', 'staff', 'receptionist', 'patient')),
+    status TEXT DEFAULT 'active' CHECK (status IN ('active', 'inactive', 'banned')),
+    created_at TIMESTAMP NOT NULL DEFAULT {_NOW},
+    updated_at TIMESTAMP NOT NULL DEFAULT {_NOW}
+);
+
+-- MySQL's ON UPDATE current_timestamp() for user_accounts.updated_at.
+CREATE TRIGGER IF NOT EXISTS user_accounts_touch AFTER UPDATE ON user_accounts
+WHEN new.updated_at = old.updated_at
+BEGIN
+    UPDATE user_accounts SET updated_at = {_NOW} WHERE user_id = new.user_id;
+END;
+
+-- Foreign keys (SQLite does not index them automatically) and the filters and
+-- sort keys the app queries by; same names as migrations/004_query_indexes.sql.
+CREATE INDEX IF NOT EXISTS idx_patients_name ON patients (last_name, first_name);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments (patient_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_dentist_time ON appointments (dentist_id, scheduled_at);
+CREATE INDEX IF NOT EXISTS idx_appointments_time ON appointments (scheduled_at, appointment_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_status ON appointments (status, scheduled_at);
+CREATE INDEX IF NOT EXISTS idx_appt_treatments_appointment ON appointment_treatments (appointment_id);
+CREATE INDEX IF NOT EXISTS idx_appt_treatments_treatment ON appointment_treatments (treatment_id);
+CREATE INDEX IF NOT EXISTS idx_payments_appointment ON payments (appointment_id);
+CREATE INDEX IF NOT EXISTS idx_payments_patient ON payments (patient_id);
+CREATE INDEX IF NOT EXISTS idx_payments_date ON payments (payment_date, status);
+CREATE INDEX IF NOT EXISTS idx_history_patient ON patient_history (patient_id, visit_date);
+CREATE INDEX IF NOT EXISTS idx_history_appointment ON patient_history (appointment_id);
+CREATE INDEX IF NOT EXISTS idx_history_follow_up ON patient_history (follow_up_date);
+"""
+
+# FTS5 counterparts of the MySQL FULLTEXT keys, kept in sync by triggers.
+FULLTEXT_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS patient_history_fts USING fts5(
+    diagnosis, notes, prescription, treatment_given,
+    content='patient_history', content_rowid='history_id'
+);
+CREATE TRIGGER IF NOT EXISTS patient_history_fts_ai AFTER INSERT ON patient_history BEGIN
+    INSERT INTO patient_history_fts (rowid, diagnosis, notes, prescription, treatment_given)
+    VALUES (new.history_id, new.diagnosis, new.notes, new.prescription, new.treatment_given);
+END;
+CREATE TRIGGER IF NOT EXISTS patient_history_fts_ad AFTER DELETE ON patient_history BEGIN
+    INSERT INTO patient_history_fts (patient_history_fts, rowid, diagnosis, notes, prescription, treatment_given)
+    VALUES ('delete', old.history_id, old.diagnosis, old.notes, old.prescription, old.treatment_given);
+END;
+CREATE TRIGGER IF NOT EXISTS patient_history_fts_au AFTER UPDATE ON patient_history BEGIN
+    INSERT INTO patient_history_fts (patient_history_fts, rowid, diagnosis, notes, prescription, treatment_given)
+    VALUES ('delete', old.history_id, old.diagnosis, old.notes, old.prescription, old.treatment_given);
+    INSERT INTO patient_history_fts (rowid, diagnosis, notes, prescription, treatment_given)
+    VALUES (new.history_id, new.diagnosis, new.notes, new.prescription, new.treatment_given);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS appointments_fts USING fts5(
+    reason, notes,
+    content='appointments', content_rowid='appointment_id'
+);
+CREATE TRIGGER IF NOT EXISTS appointments_fts_ai AFTER INSERT ON appointments BEGIN
+    INSERT INTO appointments_fts (rowid, reason, notes) VALUES (new.appointment_id, new.reason, new.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS appointments_fts_ad AFTER DELETE ON appointments BEGIN
+    INSERT INTO appointments_fts (appointments_fts, rowid, reason, notes)
+    VALUES ('delete', old.appointment_id, old.reason, old.notes);
+END;
+CREATE TRIGGER IF NOT EXISTS appointments_fts_au AFTER UPDATE ON appointments BEGIN
+    INSERT INTO appointments_fts (appointments_fts, rowid, reason, notes)
+    VALUES ('delete', old.appointment_id, old.reason, old.notes);
+    INSERT INTO appointments_fts (rowid, reason, notes) VALUES (new.appointment_id, new.reason, new.notes);
+END;
+"""
+
+
+# Per-day rollups behind the dashboard KPIs (migrations/002_daily_summaries.sql on
+# MySQL). Every payment or appointment insert bumps one summary row, so reports
+# read a few rows per day instead of scanning the fact tables.
+SUMMARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_revenue (
+    day DATE NOT NULL,
+    status TEXT NOT NULL,
+    payments INTEGER NOT NULL DEFAULT 0,
+    amount NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, status)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS payments_summary_ai AFTER INSERT ON payments
+WHEN new.payment_date IS NOT NULL AND new.status IS NOT NULL
+BEGIN
+    INSERT INTO daily_revenue (day, status, payments, amount)
+    VALUES (date(new.payment_date), new.status, 1, new.amount)
+    ON CONFLICT (day, status) DO UPDATE SET payments = payments + 1, amount = amount + excluded.amount;
+END;
+-- A changed or deleted payment leaves its old bucket (and joins the new one).
+CREATE TRIGGER IF NOT EXISTS payments_summary_au AFTER UPDATE OF payment_date, status, amount ON payments
+WHEN date(old.payment_date) IS NOT date(new.payment_date) OR old.status IS NOT new.status
+    OR old.amount IS NOT new.amount
+BEGIN
+    UPDATE daily_revenue SET payments = payments - 1, amount = amount - old.amount
+    WHERE day = date(old.payment_date) AND status = old.status;
+    DELETE FROM daily_revenue WHERE day = date(old.payment_date) AND status = old.status AND payments <= 0;
+    INSERT INTO daily_revenue (day, status, payments, amount)
+    SELECT date(new.payment_date), new.status, 1, new.amount
+    WHERE new.payment_date IS NOT NULL AND new.status IS NOT NULL
+    ON CONFLICT (day, status) DO UPDATE SET payments = payments + 1, amount = amount + excluded.amount;
+END;
+CREATE TRIGGER IF NOT EXISTS payments_summary_ad AFTER DELETE ON payments
+WHEN old.payment_date IS NOT NULL AND old.status IS NOT NULL
+BEGIN
+    UPDATE daily_revenue SET payments = payments - 1, amount = amount - old.amount
+    WHERE day = date(old.payment_date) AND status = old.status;
+    DELETE FROM daily_revenue WHERE day = date(old.payment_date) AND status = old.status AND payments <= 0;
+END;
+
+CREATE TABLE IF NOT EXISTS daily_appointment_stats (
+    day DATE NOT NULL,
+    dentist_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    appointments INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, dentist_id, status)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS appointments_summary_ai AFTER INSERT ON appointments
+WHEN new.status IS NOT NULL
+BEGIN
+    INSERT INTO daily_appointment_stats (day, dentist_id, status, appointments)
+    VALUES (date(new.scheduled_at), new.dentist_id, new.status, 1)
+    ON CONFLICT (day, dentist_id, status) DO UPDATE SET appointments = appointments + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS appointments_summary_au AFTER UPDATE OF scheduled_at, dentist_id, status ON appointments
+WHEN date(old.scheduled_at) IS NOT date(new.scheduled_at) OR old.dentist_id IS NOT new.dentist_id
+    OR old.status IS NOT new.status
+BEGIN
+    UPDATE daily_appointment_stats SET appointments = appointments - 1
+    WHERE day = date(old.scheduled_at) AND dentist_id = old.dentist_id AND status = old.status;
+    DELETE FROM daily_appointment_stats
+    WHERE day = date(old.scheduled_at) AND dentist_id = old.dentist_id AND status = old.status AND appointments <= 0;
+    INSERT INTO daily_appointment_stats (day, dentist_id, status, appointments)
+    SELECT date(new.scheduled_at), new.dentist_id, new.status, 1
+    WHERE new.status IS NOT NULL
+    ON CONFLICT (day, dentist_id, status) DO UPDATE SET appointments = appointments + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS appointments_summary_ad AFTER DELETE ON appointments
+WHEN old.status IS NOT NULL
+BEGIN
+    UPDATE daily_appointment_stats SET appointments = appointments - 1
+    WHERE day = date(old.scheduled_at) AND dentist_id = old.dentist_id AND status = old.status;
+    DELETE FROM daily_appointment_stats
+    WHERE day = date(old.scheduled_at) AND dentist_id = old.dentist_id AND status = old.status AND appointments <= 0;
+END;
+
+-- Progress of batch jobs over the fact tables (migrations/003 on MySQL).
+CREATE TABLE IF NOT EXISTS summary_watermarks (
+    source TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0,
+    refreshed_at DATETIME
+);
+"""
+
+# Fill the summaries from rows that were there before the triggers existed.
+SUMMARY_BACKFILL = """
+INSERT INTO daily_revenue (day, status, payments, amount)
+SELECT date(payment_date), status, COUNT(*), SUM(amount) FROM payments
+WHERE payment_date IS NOT NULL AND status IS NOT NULL
+GROUP BY date(payment_date), status;
+
+INSERT INTO daily_appointment_stats (day, dentist_id, status, appointments)
+SELECT date(scheduled_at), dentist_id, status, COUNT(*) FROM appointments
+WHERE status IS NOT NULL
+GROUP BY date(scheduled_at), dentist_id, status;
+"""
+
+
+def has_fulltext(conn: sqlite3.Connection) -> bool:
+    """True when the FTS5 search tables exist (SQLite builds without FTS5 skip them)."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patient_history_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def init_schema(conn: sqlite3.Connection | None = None, seed: bool = True) -> None:
+    """
+    Create every table, index, search and summary table if they do not exist yet
+    (summaries added to an existing file are filled from its rows).
+    With seed, an empty database also gets the sample rows from dental_clinic.sql
+    (dentists, treatments, accounts, ...) so the app is usable straight away.
+    """
+    own = conn is None
+    conn = conn or get_connection()
+    try:
+        had_summaries = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_revenue'"
+        ).fetchone() is not None
+        conn.executescript(SCHEMA)
+        conn.executescript(SUMMARY_SCHEMA)
+        if not had_summaries:
+            conn.executescript(SUMMARY_BACKFILL)
+        try:
+            conn.executescript(FULLTEXT_SCHEMA)
+        except sqlite3.OperationalError:
+            # No FTS5 in this SQLite build; db_sqlite falls back to LIKE search.
+            pass
+        if seed and conn.execute("SELECT COUNT(*) FROM user_accounts").fetchone()[0] == 0:
+            load_dump_rows(conn)
+        conn.commit()
+    finally:
+        if own:
+            conn.close()
+
+
+def load_dump_rows(conn: sqlite3.Connection, path: Path = DUMP_PATH) -> None:
+    """Run only the INSERT statements of a MySQL dump (the DDL is MySQL specific)."""
+    if not path.exists():
+        return
+    # The dump inserts appointments before patients; check references at commit instead.
+    conn.execute("PRAGMA defer_foreign_keys = ON")
+    for stmt in split_sql(path.read_text(encoding="utf-8")):
+        if stmt.upper().startswith("INSERT INTO"):
+            conn.execute(stmt)
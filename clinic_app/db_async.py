@@ -0,0 +1,626 @@
+"""
+Awaitable versions of the store's fetch and insert functions, so independent
+loads can be issued together with asyncio.gather instead of one after another.
+
+With aiomysql installed and the mysql backend selected, queries run on an async
+connection pool (same DB_* settings and DB_POOL_SIZE as db_mysql). Otherwise
+each call runs the blocking store function in a worker thread, so callers get
+the same API and return shapes on every backend.
+
+All coroutines run on one event loop owned by `bridge`, a daemon thread next to
+Tk's mainloop. Tk code hands them over with BackgroundRunner.submit_async, which
+delivers the result back on the Tk thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import functools
+import os
+import threading
+from typing import Any, Callable, Coroutine, Optional, Tuple
+
+from mysql.connector import errorcode
+
+try:
+    import aiomysql
+except ImportError:  # optional: without it every call runs the blocking store in a thread
+    aiomysql = None
+
+from clinic_app import auth, db_mysql
+from clinic_app.db_common import (
+    APPOINTMENT_COLUMNS,
+    APPOINTMENT_FULLTEXT,
+    APPOINTMENT_SORT_COLUMNS,
+    APPOINTMENT_SUMMARY_KEYS,
+    APPOINTMENT_SUMMARY_MEASURES,
+    APPOINTMENT_VIEW_SOURCE,
+    DENTIST_SCHEDULE_SQL,
+    HISTORY_COLUMNS,
+    HISTORY_FULLTEXT,
+    HISTORY_VIEW_SOURCE,
+    INSERT_APPOINTMENT_SQL,
+    INSERT_APPOINTMENT_TREATMENT_SQL,
+    INSERT_HISTORY_SQL,
+    INSERT_PATIENT_SQL,
+    INSERT_PAYMENT_SQL,
+    PATIENT_COLUMNS,
+    PAYMENT_COLUMNS,
+    PAYMENT_SORT_COLUMNS,
+    PAYMENT_VIEW_SOURCE,
+    REVENUE_SUMMARY_KEYS,
+    REVENUE_SUMMARY_MEASURES,
+    booked_message,
+    build_fulltext_query,
+    build_keyset_query,
+    build_slot_lock_query,
+    build_summary_query,
+    next_cursor,
+    notify_write as _notify_write,
+)
+from clinic_app.instrumentation import traced_async
+from clinic_app.repository import backend_name, store
+
+Error = aiomysql.Error if aiomysql is not None else Exception
+
+
+class AsyncBridge:
+    """
+    One asyncio event loop running in a daemon thread, started on first use.
+    submit() schedules a coroutine on it from any thread and returns a
+    concurrent.futures.Future; cancelling that future cancels the coroutine.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name="asyncio-bridge", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop())
+
+    def run(self, coro: Coroutine, timeout: float | None = None) -> Any:
+        """Run coro on the bridge loop and wait for its result (never call this from the loop itself)."""
+        return self.submit(coro).result(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Close the async pool and stop the loop; the next submit() starts a fresh one."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(close_pool(), loop).result(timeout)
+        finally:
+            _reset_pool()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            loop.close()
+
+
+bridge = AsyncBridge()
+
+
+def native() -> bool:
+    """True when calls go to MySQL through aiomysql rather than the store in a thread."""
+    return aiomysql is not None and backend_name() == "mysql"
+
+
+# -- pool ---------------------------------------------------------------------
+# The pool and the lock guarding its creation belong to the loop they were made
+# on; a new bridge loop starts over with fresh ones.
+_pool = None
+_pool_lock: Optional[asyncio.Lock] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _reset_pool() -> None:
+    global _pool, _pool_lock, _pool_loop
+    _pool = _pool_lock = _pool_loop = None
+
+
+async def get_pool():
+    """Return the async pool of the running loop, creating it on first use."""
+    global _pool, _pool_lock, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool_loop is not loop:
+        _pool, _pool_lock, _pool_loop = None, asyncio.Lock(), loop
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                config = db_mysql.connection_config()
+                config["db"] = config.pop("database")
+                # Autocommit, so a read leaves no transaction open: the pool would
+                # otherwise close the connection on release, and a reused one would
+                # keep serving its old REPEATABLE READ snapshot. _transaction()
+                # begins its own transactions explicitly.
+                _pool = await aiomysql.create_pool(
+                    minsize=1, maxsize=int(os.getenv("DB_POOL_SIZE", "5")), autocommit=True, **config
+                )
+    return _pool
+
+
+async def close_pool() -> None:
+    pool = _pool if _pool_loop is asyncio.get_running_loop() else None
+    _reset_pool()
+    if pool is not None:
+        pool.close()
+        await pool.wait_closed()
+
+
+def _mirror(fn: Callable) -> Callable:
+    """Run fn natively when native(), else the store function of the same name in a thread."""
+    name = fn.__name__
+    traced_fn = traced_async(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if native():
+            return await traced_fn(*args, **kwargs)
+        return await asyncio.to_thread(getattr(store, name), *args, **kwargs)
+
+    return wrapper
+
+
+async def _fetch_rows(sql: str, params: tuple = ()) -> Tuple[bool, str, Optional[list[dict]]]:
+    try:
+        pool = await get_pool()
+        conn = await pool.acquire()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+    try:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(sql, params)
+            return True, "ok", list(await cur.fetchall() or [])
+    except Error as exc:
+        return False, f"Query failed: {exc}", None
+    finally:
+        await pool.release(conn)
+
+
+class _Refused(Exception):
+    """Raised by a _transaction() work function to roll back and return its message."""
+
+
+async def _transaction(work: Callable, tables: tuple[str, ...], failure: str = "Insert failed") -> Tuple[bool, str, Any]:
+    """
+    Run `await work(cursor)` in one transaction; returns (ok, error message or "", work's result).
+    A deadlock victim (see db_mysql._retry_on_deadlock) runs work once more; the
+    retry's _claim_slot then sees the winning booking and refuses with its message.
+    """
+    try:
+        pool = await get_pool()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+    for attempt in range(2):
+        try:
+            conn = await pool.acquire()
+        except Error as exc:
+            return False, f"DB connection failed: {exc}", None
+        try:
+            await conn.begin()
+            async with conn.cursor() as cur:
+                result = await work(cur)
+            await conn.commit()
+            break
+        except (Error, _Refused) as exc:
+            try:
+                await conn.rollback()
+            except Error:
+                pass
+            if isinstance(exc, _Refused):
+                return False, str(exc), None
+            if attempt or exc.args[:1] != (errorcode.ER_LOCK_DEADLOCK,):
+                return False, f"{failure}: {exc}", None
+        finally:
+            await pool.release(conn)
+    for table in tables:
+        _notify_write(table)
+    return True, "", result
+
+
+async def _claim_slot(cur, dentist_id: int, scheduled_at, status: str) -> None:
+    """db_mysql._slot_taken for a _transaction() work function: raises _Refused if the dentist is booked then."""
+    query = build_slot_lock_query(dentist_id, scheduled_at, status)
+    if query is None:
+        return
+    await cur.execute(*query)
+    rows = await cur.fetchall()
+    if rows:
+        raise _Refused(booked_message(rows[0][2]))
+
+
+async def _insert(sql: str, params: tuple, table: str) -> Tuple[bool, str, Optional[int]]:
+    async def work(cur) -> int:
+        await cur.execute(sql, params)
+        return cur.lastrowid
+
+    return await _transaction(work, (table,))
+
+
+# -- reads --------------------------------------------------------------------
+@_mirror
+async def fetch_patients() -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fetch_rows("SELECT * FROM patients")
+
+
+@_mirror
+async def fetch_treatments() -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fetch_rows("SELECT * FROM treatments")
+
+
+@_mirror
+async def fetch_dentists() -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fetch_rows("SELECT * FROM dentists")
+
+
+@_mirror
+async def fetch_appointments() -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fetch_rows("SELECT * FROM appointments")
+
+
+@_mirror
+async def fetch_payments() -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fetch_rows("SELECT * FROM payments")
+
+
+@_mirror
+async def fetch_patient_history() -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fetch_rows("SELECT * FROM patient_history")
+
+
+async def _fetch_keyset_page(
+    source: str,
+    allowed: tuple[str, ...] | dict[str, str],
+    pk: str,
+    sort_column: str,
+    columns: list[str] | None,
+    page_size: int,
+    after: tuple | None,
+    filters: dict | None,
+    descending: bool,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    try:
+        sql, params = build_keyset_query(
+            source, allowed, pk, sort_column, columns, page_size, after, filters, descending
+        )
+    except ValueError as exc:
+        return False, str(exc), None, None
+    ok, msg, rows = await _fetch_rows(sql, tuple(params))
+    if not ok:
+        return False, msg, None, None
+    return True, "ok", rows, next_cursor(rows, page_size, sort_column, pk)
+
+
+@_mirror
+async def fetch_patients_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    return await _fetch_keyset_page(
+        "patients", PATIENT_COLUMNS, "patient_id", "patient_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+@_mirror
+async def fetch_appointments_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+    order_by: str = "scheduled_at",
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    if order_by not in APPOINTMENT_SORT_COLUMNS:
+        return False, f"Cannot order appointments by {order_by}.", None, None
+    return await _fetch_keyset_page(
+        "appointments", APPOINTMENT_COLUMNS, "appointment_id", order_by,
+        columns, page_size, after, filters, descending,
+    )
+
+
+@_mirror
+async def fetch_payments_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+    order_by: str = "payment_id",
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    if order_by not in PAYMENT_SORT_COLUMNS:
+        return False, f"Cannot order payments by {order_by}.", None, None
+    return await _fetch_keyset_page(
+        "payments", PAYMENT_COLUMNS, "payment_id", order_by,
+        columns, page_size, after, filters, descending,
+    )
+
+
+@_mirror
+async def fetch_patient_history_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    return await _fetch_keyset_page(
+        "patient_history", HISTORY_COLUMNS, "history_id", "history_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+@_mirror
+async def fetch_appointment_view_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+    order_by: str = "scheduled_at",
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    if order_by not in APPOINTMENT_SORT_COLUMNS:
+        return False, f"Cannot order appointments by {order_by}.", None, None
+    return await _fetch_keyset_page(
+        APPOINTMENT_VIEW_SOURCE, db_mysql.APPOINTMENT_VIEW_COLUMNS, "appointment_id", order_by,
+        columns, page_size, after, filters, descending,
+    )
+
+
+@_mirror
+async def fetch_payment_view_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    return await _fetch_keyset_page(
+        PAYMENT_VIEW_SOURCE, db_mysql.PAYMENT_VIEW_COLUMNS, "payment_id", "payment_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+@_mirror
+async def fetch_history_view_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    return await _fetch_keyset_page(
+        HISTORY_VIEW_SOURCE, db_mysql.HISTORY_VIEW_COLUMNS, "history_id", "history_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+async def fetch_all_pages(fetch_page, page_size: int = 1000, **kwargs) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Drain one of the async *_page fetchers into one list (see db_common.fetch_all_pages)."""
+    collected: list[dict] = []
+    after = None
+    while True:
+        ok, msg, rows, after = await fetch_page(page_size=page_size, after=after, **kwargs)
+        if not ok:
+            return False, msg, None
+        collected.extend(rows or [])
+        if after is None:
+            return True, "ok", collected
+
+
+@_mirror
+async def fetch_dentist_schedule(dentist_id: int, start, end) -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fetch_rows(DENTIST_SCHEDULE_SQL.format(ph="%s"), (dentist_id, start, end))
+
+
+async def _fetch_summary(table, keys, measures, group_by, start, end, filters) -> Tuple[bool, str, Optional[list[dict]]]:
+    try:
+        sql, params = build_summary_query(table, keys, measures, group_by, start, end, filters)
+    except ValueError as exc:
+        return False, str(exc), None
+    return await _fetch_rows(sql, tuple(params))
+
+
+@_mirror
+async def fetch_revenue_summary(
+    start=None, end=None, group_by: tuple[str, ...] = ("day",), filters: dict | None = None
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fetch_summary(
+        "daily_revenue", REVENUE_SUMMARY_KEYS, REVENUE_SUMMARY_MEASURES, group_by, start, end, filters
+    )
+
+
+@_mirror
+async def fetch_appointment_summary(
+    start=None, end=None, group_by: tuple[str, ...] = ("status",), filters: dict | None = None
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fetch_summary(
+        "daily_appointment_stats", APPOINTMENT_SUMMARY_KEYS, APPOINTMENT_SUMMARY_MEASURES,
+        group_by, start, end, filters,
+    )
+
+
+async def _fulltext_search(source, exprs, match_columns, term, page_size, offset) -> Tuple[bool, str, Optional[list[dict]]]:
+    try:
+        sql, params = build_fulltext_query(source, exprs, match_columns, term, page_size, offset)
+    except ValueError as exc:
+        return False, str(exc), None
+    return await _fetch_rows(sql, tuple(params))
+
+
+@_mirror
+async def search_patient_history(
+    term: str, page_size: int = 200, offset: int = 0
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fulltext_search(
+        HISTORY_VIEW_SOURCE, db_mysql.HISTORY_VIEW_COLUMNS, HISTORY_FULLTEXT, term, page_size, offset
+    )
+
+
+@_mirror
+async def search_appointments(
+    term: str, page_size: int = 200, offset: int = 0
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    return await _fulltext_search(
+        APPOINTMENT_VIEW_SOURCE, db_mysql.APPOINTMENT_VIEW_COLUMNS, APPOINTMENT_FULLTEXT,
+        term, page_size, offset,
+    )
+
+
+async def verify_user(username: str, password: str) -> Tuple[bool, str, Optional[str]]:
+    """Logins always run in a thread (one call per session, nothing to overlap); see clinic_app.auth."""
+    return await asyncio.to_thread(auth.verify_user, username, password)
+
+
+# -- writes -------------------------------------------------------------------
+@_mirror
+async def insert_patient(
+    first_name: str,
+    last_name: str,
+    birth_date: str,
+    age_group: str,
+    gender: str,
+    phone: str,
+    email: str,
+    address: str | None = None,
+) -> Tuple[bool, str]:
+    ok, msg, _ = await _insert(
+        INSERT_PATIENT_SQL.format(ph="%s", now="NOW()"),
+        (first_name, last_name, birth_date, age_group, gender, phone, email, address),
+        "patients",
+    )
+    return (True, "Patient added.") if ok else (False, msg)
+
+
+@_mirror
+async def insert_patients_bulk(rows: list[tuple]) -> Tuple[bool, str, int]:
+    if not rows:
+        return True, "Nothing to insert.", 0
+
+    async def work(cur) -> None:
+        await cur.executemany(INSERT_PATIENT_SQL.format(ph="%s", now="NOW()"), rows)
+
+    ok, msg, _ = await _transaction(work, ("patients",))
+    return (True, f"{len(rows)} patients added.", len(rows)) if ok else (False, msg, 0)
+
+
+@_mirror
+async def insert_appointment(
+    patient_id: int,
+    dentist_id: int,
+    scheduled_at: str,
+    status: str,
+    reason: str,
+    notes: str | None = None,
+    created_at: str | None = None,
+) -> Tuple[bool, str, Optional[int]]:
+    async def work(cur) -> int:
+        await _claim_slot(cur, dentist_id, scheduled_at, status)
+        await cur.execute(
+            INSERT_APPOINTMENT_SQL.format(ph="%s", now="NOW()"),
+            (patient_id, dentist_id, scheduled_at, status, reason, notes, created_at or None),
+        )
+        return cur.lastrowid
+
+    ok, msg, appt_id = await _transaction(work, ("appointments",))
+    return (True, "Appointment recorded.", appt_id) if ok else (False, msg, None)
+
+
+@_mirror
+async def insert_payment(
+    appointment_id: int,
+    patient_id: int,
+    amount: float,
+    method: str,
+    status: str,
+    reference_no: str | None = None,
+    remarks: str | None = None,
+    payment_date: str | None = None,
+) -> Tuple[bool, str]:
+    ok, msg, _ = await _insert(
+        INSERT_PAYMENT_SQL.format(ph="%s", now="NOW()"),
+        (appointment_id, patient_id, amount, payment_date or None, method, status, reference_no, remarks),
+        "payments",
+    )
+    return (True, "Payment recorded.") if ok else (False, msg)
+
+
+@_mirror
+async def checkout(
+    patient_id: int,
+    dentist_id: int,
+    scheduled_at: str,
+    reason: str,
+    items: list[dict],
+    amount: float,
+    method: str,
+    payment_status: str,
+    reference_no: str | None = None,
+    remarks: str | None = None,
+    notes: str | None = None,
+    created_at: str | None = None,
+    appointment_status: str = "scheduled",
+) -> Tuple[bool, str, Optional[int]]:
+    async def work(cur) -> int:
+        await _claim_slot(cur, dentist_id, scheduled_at, appointment_status)
+        await cur.execute(
+            INSERT_APPOINTMENT_SQL.format(ph="%s", now="NOW()"),
+            (patient_id, dentist_id, scheduled_at, appointment_status, reason, notes, created_at),
+        )
+        appt_id = cur.lastrowid
+        if items:
+            await cur.executemany(
+                INSERT_APPOINTMENT_TREATMENT_SQL.format(ph="%s"),
+                [(appt_id, item["treatment_id"], item.get("fee"), item.get("notes")) for item in items],
+            )
+        await cur.execute(
+            INSERT_PAYMENT_SQL.format(ph="%s", now="NOW()"),
+            (appt_id, patient_id, amount, None, method, payment_status, reference_no, remarks),
+        )
+        return appt_id
+
+    ok, msg, appt_id = await _transaction(
+        work, ("appointments", "appointment_treatments", "payments"), failure="Checkout failed"
+    )
+    return (True, "Payment recorded.", appt_id) if ok else (False, msg, None)
+
+
+@_mirror
+async def insert_patient_history(
+    patient_id: int,
+    appointment_id: int,
+    visit_date: str,
+    diagnosis: str | None = None,
+    treatment_given: str | None = None,
+    prescription: str | None = None,
+    follow_up_date: str | None = None,
+    notes: str | None = None,
+) -> Tuple[bool, str]:
+    ok, msg, _ = await _insert(
+        INSERT_HISTORY_SQL.format(ph="%s"),
+        (patient_id, appointment_id, visit_date, diagnosis, treatment_given, prescription, follow_up_date, notes),
+        "patient_history",
+    )
+    return (True, "Patient history saved.") if ok else (False, msg)
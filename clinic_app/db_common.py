@@ -0,0 +1,441 @@
+"""
+Pieces shared by the MySQL (db_mysql, db_async) and SQLite (db_sqlite) backends:
+write listeners, column whitelists, the pre-joined display views, the keyset
+pagination query builder, the insert statements, the dentist schedule (and
+double-booking check) and treatment planning queries, the daily summary queries
+and the MySQL full-text query. Nothing here talks to a database.
+"""
+from __future__ import annotations
+
+import datetime
+import re
+from typing import Callable, Optional
+
+# Callbacks run with the table name after a successful write (cache invalidation etc.).
+_write_listeners: list[Callable[[str], None]] = []
+
+
+def add_write_listener(listener: Callable[[str], None]) -> None:
+    """Register listener(table) to be called after each committed insert."""
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def remove_write_listener(listener: Callable[[str], None]) -> None:
+    if listener in _write_listeners:
+        _write_listeners.remove(listener)
+
+
+def notify_write(table: str) -> None:
+    for listener in list(_write_listeners):
+        try:
+            listener(table)
+        except Exception:
+            pass
+
+
+# Column whitelists for paginated fetches; identifiers cannot be bound as parameters.
+PATIENT_COLUMNS = (
+    "patient_id", "first_name", "last_name", "birth_date", "age_group",
+    "gender", "phone", "email", "address", "created_at",
+)
+APPOINTMENT_COLUMNS = (
+    "appointment_id", "patient_id", "dentist_id", "scheduled_at",
+    "status", "reason", "notes", "created_at",
+)
+PAYMENT_COLUMNS = (
+    "payment_id", "appointment_id", "patient_id", "amount", "payment_date",
+    "method", "status", "reference_no", "remarks",
+)
+HISTORY_COLUMNS = (
+    "history_id", "patient_id", "appointment_id", "visit_date", "diagnosis",
+    "treatment_given", "prescription", "follow_up_date", "notes",
+)
+
+# Pre-joined display views: one indexed query per screen instead of joining
+# whole tables in Python. Keys are output names, values the SQL expressions.
+# Each backend adds "patient_name", whose string concatenation is dialect specific.
+APPOINTMENT_VIEW_COLUMNS = {
+    "appointment_id": "a.appointment_id",
+    "patient_id": "a.patient_id",
+    "dentist_id": "a.dentist_id",
+    "scheduled_at": "a.scheduled_at",
+    "status": "a.status",
+    "reason": "a.reason",
+    "notes": "a.notes",
+    "created_at": "a.created_at",
+    "dentist_name": "d.full_name",
+}
+APPOINTMENT_VIEW_SOURCE = """
+    appointments a
+    LEFT JOIN patients p ON p.patient_id = a.patient_id
+    LEFT JOIN dentists d ON d.dentist_id = a.dentist_id
+"""
+
+PAYMENT_VIEW_COLUMNS = {
+    "payment_id": "pay.payment_id",
+    "appointment_id": "pay.appointment_id",
+    "patient_id": "pay.patient_id",
+    "amount": "pay.amount",
+    "payment_date": "pay.payment_date",
+    "method": "pay.method",
+    "status": "pay.status",
+    "reference_no": "pay.reference_no",
+    "remarks": "pay.remarks",
+    "scheduled_at": "a.scheduled_at",
+}
+PAYMENT_VIEW_SOURCE = """
+    payments pay
+    LEFT JOIN patients p ON p.patient_id = pay.patient_id
+    LEFT JOIN appointments a ON a.appointment_id = pay.appointment_id
+"""
+
+HISTORY_VIEW_COLUMNS = {
+    "history_id": "h.history_id",
+    "patient_id": "h.patient_id",
+    "appointment_id": "h.appointment_id",
+    "visit_date": "h.visit_date",
+    "diagnosis": "h.diagnosis",
+    "treatment_given": "h.treatment_given",
+    "prescription": "h.prescription",
+    "follow_up_date": "h.follow_up_date",
+    "notes": "h.notes",
+    "scheduled_at": "a.scheduled_at",
+}
+HISTORY_VIEW_SOURCE = """
+    patient_history h
+    LEFT JOIN patients p ON p.patient_id = h.patient_id
+    LEFT JOIN appointments a ON a.appointment_id = h.appointment_id
+"""
+
+# Sort columns the appointment and payment pages accept as order_by (pk breaks ties).
+APPOINTMENT_SORT_COLUMNS = ("scheduled_at", "appointment_id")
+PAYMENT_SORT_COLUMNS = ("payment_id", "payment_date")
+
+
+def build_keyset_query(
+    source: str,
+    allowed: tuple[str, ...] | dict[str, str],
+    pk: str,
+    sort_column: str,
+    columns: list[str] | None,
+    page_size: int,
+    after: tuple | None,
+    filters: dict | None,
+    descending: bool,
+    placeholder: str = "%s",
+) -> tuple[str, list]:
+    """
+    Build a keyset (seek) page query ordered by (sort_column, pk). sort_column
+    may be nullable: a cursor whose sort value is None seeks among the NULL rows.
+    `source` is a table name or a FROM ... JOIN clause; `allowed` maps output
+    names to SQL expressions (a plain tuple means the names are the columns).
+    Raises ValueError for unknown columns or a non-positive page size.
+    """
+    exprs = allowed if isinstance(allowed, dict) else {c: c for c in allowed}
+    columns = list(columns or exprs)
+    unknown = [c for c in [*columns, *(filters or {})] if c not in exprs]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    if page_size < 1:
+        raise ValueError("Page size must be positive.")
+    # The cursor needs the sort key and pk in every row, even if not displayed.
+    select_cols = list(dict.fromkeys([*columns, sort_column, pk]))
+    select_sql = ", ".join(c if exprs[c] == c else f"{exprs[c]} AS {c}" for c in select_cols)
+    sort_expr, pk_expr = exprs[sort_column], exprs[pk]
+    ph = placeholder
+
+    clauses: list[str] = []
+    params: list = []
+    for col, value in (filters or {}).items():
+        clauses.append(f"{exprs[col]} = {ph}")
+        params.append(value)
+    if after is not None:
+        op = "<" if descending else ">"
+        if sort_column == pk:
+            clauses.append(f"{pk_expr} {op} {ph}")
+            params.append(after[-1])
+        elif after[0] is None:
+            # NULLs sort first ascending and last descending (MySQL and SQLite), and
+            # `= NULL` matches nothing: seek within the NULLs, then past them ascending.
+            rest = f" OR {sort_expr} IS NOT NULL" if not descending else ""
+            clauses.append(f"(({sort_expr} IS NULL AND {pk_expr} {op} {ph}){rest})")
+            params.append(after[1])
+        else:
+            rest = f" OR {sort_expr} IS NULL" if descending else ""
+            clauses.append(f"({sort_expr} {op} {ph} OR ({sort_expr} = {ph} AND {pk_expr} {op} {ph}){rest})")
+            params.extend([after[0], after[0], after[1]])
+
+    direction = "DESC" if descending else "ASC"
+    order = f"{pk_expr} {direction}" if sort_column == pk else f"{sort_expr} {direction}, {pk_expr} {direction}"
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"SELECT {select_sql} FROM {source} {where} ORDER BY {order} LIMIT {ph}"
+    params.append(page_size)
+    return sql, params
+
+
+# One dentist's booked (not cancelled) appointments with scheduled_at in [start, end),
+# a range scan on idx_appointments_dentist_time. Format with the backend's placeholder.
+DENTIST_SCHEDULE_SQL = """
+    SELECT appointment_id, patient_id, scheduled_at, status FROM appointments
+    WHERE dentist_id = {ph} AND scheduled_at >= {ph} AND scheduled_at < {ph} AND status <> 'cancelled'
+    ORDER BY scheduled_at, appointment_id
+"""
+
+# How long an appointment keeps its dentist busy (logic.schedule books on this grid).
+SLOT_MINUTES = 30
+_SLOT = datetime.timedelta(minutes=SLOT_MINUTES)
+_SQL_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _as_datetime(value) -> Optional[datetime.datetime]:
+    if isinstance(value, datetime.datetime):
+        return value
+    try:
+        return datetime.datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+def slot_bounds(scheduled_at) -> Optional[tuple[str, str]]:
+    """
+    [start, end) for DENTIST_SCHEDULE_SQL covering every appointment whose slot
+    overlaps one starting at scheduled_at; None if scheduled_at is not a datetime
+    or ISO text (then it cannot be compared and is not checked).
+    """
+    when = _as_datetime(scheduled_at)
+    if when is None:
+        return None
+    start = when - _SLOT + datetime.timedelta(seconds=1)
+    return start.strftime(_SQL_FORMAT), (when + _SLOT).strftime(_SQL_FORMAT)
+
+
+def booked_message(taken) -> str:
+    """Error for a booking refused because an appointment at `taken` overlaps it."""
+    when = _as_datetime(taken)
+    return f"Dentist is already booked at {when:%Y-%m-%d %I:%M %p}." if when else "Dentist is already booked then."
+
+
+def build_slot_lock_query(dentist_id: int, scheduled_at, status: str) -> Optional[tuple[str, tuple]]:
+    """
+    MySQL: DENTIST_SCHEDULE_SQL over slot_bounds(scheduled_at) with FOR UPDATE,
+    which also gap-locks the range so no other booking can slip into it before
+    commit. None when there is nothing to check: cancelled bookings never
+    conflict, and a scheduled_at that is not a datetime cannot be compared.
+    """
+    bounds = slot_bounds(scheduled_at)
+    if status == "cancelled" or bounds is None:
+        return None
+    return DENTIST_SCHEDULE_SQL.format(ph="%s") + " FOR UPDATE", (dentist_id, *bounds)
+
+
+# Inserts every store runs. Format with the backend's placeholder and `now`, its
+# current-time expression; a NULL created_at or payment_date means now.
+INSERT_PATIENT_SQL = """
+    INSERT INTO patients (first_name, last_name, birth_date, age_group, gender, phone, email, address, created_at)
+    VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {now})
+"""
+INSERT_APPOINTMENT_SQL = """
+    INSERT INTO appointments (patient_id, dentist_id, scheduled_at, status, reason, notes, created_at)
+    VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, COALESCE({ph}, {now}))
+"""
+INSERT_APPOINTMENT_TREATMENT_SQL = """
+    INSERT INTO appointment_treatments (appointment_id, treatment_id, fee, notes)
+    VALUES ({ph}, {ph}, {ph}, {ph})
+"""
+INSERT_PAYMENT_SQL = """
+    INSERT INTO payments (appointment_id, patient_id, amount, payment_date, method, status, reference_no, remarks)
+    VALUES ({ph}, {ph}, {ph}, COALESCE({ph}, {now}), {ph}, {ph}, {ph}, {ph})
+"""
+INSERT_HISTORY_SQL = """
+    INSERT INTO patient_history
+    (patient_id, appointment_id, visit_date, diagnosis, treatment_given, prescription, follow_up_date, notes)
+    VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph}, {ph})
+"""
+
+
+# Scheduled, upcoming appointments past a watermark that have no treatments yet,
+# with the patient's birth date, for the batch planner (clinic_app.planning).
+PLAN_CANDIDATES_SQL = """
+    SELECT a.appointment_id, a.patient_id, a.scheduled_at, a.reason, p.birth_date
+    FROM appointments a
+    JOIN patients p ON p.patient_id = a.patient_id
+    WHERE a.appointment_id > {ph} AND a.status = 'scheduled' AND a.scheduled_at >= {ph}
+      AND NOT EXISTS (SELECT 1 FROM appointment_treatments t WHERE t.appointment_id = a.appointment_id)
+    ORDER BY a.appointment_id
+    LIMIT {ph}
+"""
+
+# Daily summary tables kept current by insert triggers (migrations/002_daily_summaries.sql
+# on MySQL, db.SUMMARY_SCHEMA on SQLite). Group keys and measures are written so
+# the same expressions work in both dialects; `day` is a DATE, `month` is 'YYYY-MM'.
+SUMMARY_PERIODS = {"day": "day", "month": "SUBSTR(day, 1, 7)"}
+REVENUE_SUMMARY_KEYS = {**SUMMARY_PERIODS, "status": "status"}
+REVENUE_SUMMARY_MEASURES = {"payments": "SUM(payments)", "amount": "SUM(amount)"}
+APPOINTMENT_SUMMARY_KEYS = {**SUMMARY_PERIODS, "dentist_id": "dentist_id", "status": "status"}
+APPOINTMENT_SUMMARY_MEASURES = {"appointments": "SUM(appointments)"}
+
+
+def build_summary_query(
+    table: str,
+    keys: dict[str, str],
+    measures: dict[str, str],
+    group_by: tuple[str, ...] | list[str],
+    start=None,
+    end=None,
+    filters: dict | None = None,
+    placeholder: str = "%s",
+) -> tuple[str, list]:
+    """
+    Build a GROUP BY query over a daily summary table for days in [start, end]
+    (either bound may be None), optionally restricted to key = value filters.
+    Rows hold the group_by keys plus every measure, ordered by the keys; an
+    empty group_by gives a single totals row.
+    Raises ValueError for unknown keys.
+    """
+    unknown = [k for k in [*group_by, *(filters or {})] if k not in keys]
+    if unknown:
+        raise ValueError(f"Unknown summary key(s): {', '.join(unknown)}")
+    selected = [k if keys[k] == k else f"{keys[k]} AS {k}" for k in group_by]
+    selected += [f"{expr} AS {name}" for name, expr in measures.items()]
+    select_sql = ", ".join(selected)
+    clauses: list[str] = []
+    params: list = []
+    if start is not None:
+        clauses.append(f"day >= {placeholder}")
+        params.append(start)
+    if end is not None:
+        clauses.append(f"day <= {placeholder}")
+        params.append(end)
+    for key, value in (filters or {}).items():
+        clauses.append(f"{keys[key]} = {placeholder}")
+        params.append(value)
+    sql = f"SELECT {select_sql} FROM {table}"
+    if clauses:
+        sql += f" WHERE {' AND '.join(clauses)}"
+    if group_by:
+        exprs = ", ".join(keys[k] for k in group_by)
+        sql += f" GROUP BY {exprs} ORDER BY {exprs}"
+    return sql, params
+
+
+def next_cursor(rows: list[dict], page_size: int, sort_column: str, pk: str) -> Optional[tuple]:
+    """Cursor for the page after rows, or None when this was the last page."""
+    if len(rows) < page_size:
+        return None
+    last = rows[-1]
+    return last[sort_column], last[pk]
+
+
+def fetch_all_pages(fetch_page, page_size: int = 1000, **kwargs) -> tuple[bool, str, Optional[list[dict]]]:
+    """Drain a *_page fetcher into one list; meant for narrow column lists (lookup maps)."""
+    collected: list[dict] = []
+    after = None
+    while True:
+        ok, msg, rows, after = fetch_page(page_size=page_size, after=after, **kwargs)
+        if not ok:
+            return False, msg, None
+        collected.extend(rows or [])
+        if after is None:
+            return True, "ok", collected
+
+
+# MySQL FULLTEXT search. Column lists must match the FULLTEXT keys in
+# migrations/001_fulltext_clinical_text.sql exactly.
+HISTORY_FULLTEXT = "h.diagnosis, h.notes, h.prescription, h.treatment_given"
+APPOINTMENT_FULLTEXT = "a.reason, a.notes"
+# InnoDB ignores shorter tokens by default (innodb_ft_min_token_size).
+FULLTEXT_MIN_TOKEN = 3
+
+
+def boolean_query(term: str) -> str:
+    """Turn free text into a BOOLEAN MODE query requiring every word as a prefix."""
+    words = re.findall(r"\w+", term)
+    return " ".join(f"+{w}*" for w in words if len(w) >= FULLTEXT_MIN_TOKEN)
+
+
+def build_fulltext_query(
+    source: str,
+    exprs: dict[str, str],
+    match_columns: str,
+    term: str,
+    page_size: int,
+    offset: int,
+) -> tuple[str, list]:
+    """
+    Build a ranked MySQL full-text page over `source` (a FROM ... JOIN clause):
+    the exprs columns plus a relevance `score`, best first. Raises ValueError
+    if term has no word of at least FULLTEXT_MIN_TOKEN characters.
+    """
+    query = boolean_query(term)
+    if not query:
+        raise ValueError(f"Search words need at least {FULLTEXT_MIN_TOKEN} characters.")
+    select_sql = ", ".join(f"{expr} AS {name}" for name, expr in exprs.items())
+    match = f"MATCH({match_columns}) AGAINST (%s IN BOOLEAN MODE)"
+    sql = f"""
+        SELECT {select_sql}, {match} AS score
+        FROM {source}
+        WHERE {match}
+        ORDER BY score DESC
+        LIMIT %s OFFSET %s
+    """
+    return sql, [query, query, page_size, offset]
+
+
+# mysql-client directive that changes the statement terminator (trigger and routine bodies).
+_DELIMITER = re.compile(r"[ \t]*DELIMITER[ \t]+(\S+)[ \t]*(?:\r?\n|$)", re.IGNORECASE)
+
+
+def split_sql(text: str) -> list[str]:
+    """
+    Split an SQL script into statements on `;`, ignoring comments and semicolons
+    inside quotes. `DELIMITER //` lines switch the terminator like the mysql
+    client does, so a BEGIN ... END body with inner semicolons stays one statement.
+    """
+    statements: list[str] = []
+    buf: list[str] = []
+    quote = ""
+    delimiter = ";"
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if not quote and (i == 0 or text[i - 1] == "\n"):
+            # Only between statements, like the client (a column may be called delimiter).
+            directive = _DELIMITER.match(text, i)
+            if directive and not "".join(buf).strip():
+                buf = []
+                delimiter = directive.group(1)
+                i = directive.end()
+                continue
+        if quote:
+            buf.append(ch)
+            if ch == "\\" and i + 1 < len(text):
+                buf.append(text[i + 1])
+                i += 1
+            elif ch == quote:
+                quote = ""
+        elif ch in ("'", '"', "`"):
+            quote = ch
+            buf.append(ch)
+        elif text.startswith("--", i) or ch == "#":
+            end = text.find("\n", i)
+            i = len(text) if end == -1 else end
+            continue
+        elif text.startswith("/*", i) and not text.startswith("/*!", i):
+            end = text.find("*/", i)
+            i = len(text) if end == -1 else end + 2
+            continue
+        elif text.startswith(delimiter, i):
+            stmt = "".join(buf).strip()
+            if stmt:
+                statements.append(stmt)
+            buf = []
+            i += len(delimiter)
+            continue
+        else:
+            buf.append(ch)
+        i += 1
+    stmt = "".join(buf).strip()
+    if stmt:
+        statements.append(stmt)
+    return statements
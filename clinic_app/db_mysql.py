@@ -1,15 +1,61 @@
 from __future__ import annotations
 
+import datetime
+import functools
 import os
+import threading
 from typing import Optional, Tuple
 
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+from mysql.connector.errors import DataError, IntegrityError
 
+from clinic_app.db_common import (
+    APPOINTMENT_COLUMNS,
+    APPOINTMENT_FULLTEXT,
+    APPOINTMENT_SORT_COLUMNS,
+    APPOINTMENT_SUMMARY_KEYS,
+    APPOINTMENT_SUMMARY_MEASURES,
+    APPOINTMENT_VIEW_COLUMNS as _APPOINTMENT_VIEW_BASE,
+    APPOINTMENT_VIEW_SOURCE,
+    DENTIST_SCHEDULE_SQL,
+    HISTORY_COLUMNS,
+    HISTORY_FULLTEXT,
+    HISTORY_VIEW_COLUMNS as _HISTORY_VIEW_BASE,
+    HISTORY_VIEW_SOURCE,
+    INSERT_APPOINTMENT_SQL,
+    INSERT_APPOINTMENT_TREATMENT_SQL,
+    INSERT_HISTORY_SQL,
+    INSERT_PATIENT_SQL,
+    INSERT_PAYMENT_SQL,
+    PATIENT_COLUMNS,
+    PAYMENT_COLUMNS,
+    PAYMENT_SORT_COLUMNS,
+    PAYMENT_VIEW_COLUMNS as _PAYMENT_VIEW_BASE,
+    PAYMENT_VIEW_SOURCE,
+    PLAN_CANDIDATES_SQL,
+    REVENUE_SUMMARY_KEYS,
+    REVENUE_SUMMARY_MEASURES,
+    add_write_listener,  # noqa: F401 - re-exported, callers register listeners here
+    booked_message,
+    build_fulltext_query,
+    build_keyset_query,
+    build_slot_lock_query,
+    build_summary_query,
+    fetch_all_pages,  # noqa: F401 - re-exported next to the *_page fetchers
+    next_cursor,
+    notify_write as _notify_write,
+)
+from clinic_app.db_pool import ConnectionPool
+from clinic_app.instrumentation import metrics, traced
 
-def get_connection():
-    """Return a MySQL connection using environment variables for config."""
-    config = {
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def connection_config() -> dict:
+    """MySQL connection settings from the DB_* environment variables."""
+    return {
         "host": os.getenv("DB_HOST", "localhost"),
         "port": int(os.getenv("DB_PORT", "3306")),
         "user": os.getenv("DB_USER", "root"),
@@ -17,13 +63,49 @@ def get_connection():
         # Default to dental_clinic database; override with DB_NAME env var.
         "database": os.getenv("DB_NAME", "dental_clinic"),
     }
-    return mysql.connector.connect(**config)
 
 
-def verify_user(username: str, password: str) -> Tuple[bool, str, Optional[str]]:
+def _connect():
+    """Open a fresh MySQL connection using environment variables for config."""
+    return mysql.connector.connect(**connection_config())
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect,
+                    size=int(os.getenv("DB_POOL_SIZE", "5")),
+                    borrow_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+                    idle_timeout=float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+                    health_check_after=float(os.getenv("DB_POOL_HEALTH_CHECK_AFTER", "5")),
+                )
+    return _pool
+
+
+def get_connection():
     """
-    Check username/password against user_accounts table.
-    Returns (ok, message, role). Message is user-friendly.
+    Borrow a MySQL connection from the shared pool.
+    Closing it returns it to the pool rather than tearing down the socket.
+    Inside a traced call the wait and all cursor work are recorded in metrics.
+    """
+    return metrics.connection(get_pool().acquire)
+
+
+def pool_stats() -> dict:
+    """Return borrow/wait/exhaustion counters for the shared pool."""
+    return get_pool().stats()
+
+
+@traced
+def fetch_user_account(username: str) -> Tuple[bool, str, Optional[dict]]:
+    """
+    Return the user_accounts row for username (user_id, username, password_hash,
+    role, status, updated_at), or None if there is no such account.
+    Passwords are checked by clinic_app.auth, not here.
     """
     try:
         conn = get_connection()
@@ -34,28 +116,47 @@ def verify_user(username: str, password: str) -> Tuple[bool, str, Optional[str]]
         cursor = conn.cursor(dictionary=True)
         cursor.execute(
             """
-            SELECT username, password_hash, role, status
+            SELECT user_id, username, password_hash, role, status, updated_at
             FROM user_accounts
             WHERE username = %s
             LIMIT 1
             """,
             (username,),
         )
-        row = cursor.fetchone()
-        if row is None:
-            return False, "Invalid username or password.", None
+        return True, "ok", cursor.fetchone()
+    except Error as exc:
+        return False, f"Query failed: {exc}", None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
 
-        if row.get("status", "").lower() not in ("active", "1", "true", "yes"):
-            return False, "Account is not active.", None
 
-        stored_value = (row.get("password_hash") or "").strip()
-        # Direct comparison without bcrypt hashing; trim DB value to avoid trailing CR/LF from manual edits.
-        if password != stored_value:
-            return False, "Invalid username or password.", None
+@traced
+def update_password_hash(user_id: int, current: str, new_hash: str) -> Tuple[bool, str]:
+    """
+    Replace a user's password_hash, only if it still equals current (so a
+    password changed meanwhile is never overwritten). Returns (ok, message).
+    """
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}"
 
-        return True, "Login successful.", row.get("role")
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE user_accounts SET password_hash = %s WHERE user_id = %s AND password_hash = %s",
+            (new_hash, user_id, current),
+        )
+        conn.commit()
+        if cursor.rowcount != 1:
+            return False, "Password was changed by someone else."
+        return True, "Password hash updated."
     except Error as exc:
-        return False, f"Query failed: {exc}", None
+        conn.rollback()
+        return False, f"Update failed: {exc}"
     finally:
         try:
             conn.close()
@@ -63,6 +164,7 @@ def verify_user(username: str, password: str) -> Tuple[bool, str, Optional[str]]
             pass
 
 
+@traced
 def fetch_patients() -> Tuple[bool, str, Optional[list[dict]]]:
     """Return all rows from patients table."""
     try:
@@ -84,6 +186,7 @@ def fetch_patients() -> Tuple[bool, str, Optional[list[dict]]]:
             pass
 
 
+@traced
 def fetch_treatments() -> Tuple[bool, str, Optional[list[dict]]]:
     """Return all rows from treatments table."""
     try:
@@ -105,6 +208,7 @@ def fetch_treatments() -> Tuple[bool, str, Optional[list[dict]]]:
             pass
 
 
+@traced
 def insert_patient(
     first_name: str,
     last_name: str,
@@ -124,13 +228,11 @@ def insert_patient(
     try:
         cur = conn.cursor()
         cur.execute(
-            """
-            INSERT INTO patients (first_name, last_name, birth_date, age_group, gender, phone, email, address, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
-            """,
+            INSERT_PATIENT_SQL.format(ph="%s", now="NOW()"),
             (first_name, last_name, birth_date, age_group, gender, phone, email, address),
         )
         conn.commit()
+        _notify_write("patients")
         return True, "Patient added."
     except Error as exc:
         return False, f"Insert failed: {exc}"
@@ -141,6 +243,84 @@ def insert_patient(
             pass
 
 
+@traced
+def insert_patients_bulk(rows: list[tuple]) -> Tuple[bool, str, int]:
+    """
+    Insert many patients in one transaction with executemany (the connector
+    batches these into multi-row INSERTs). Each row is
+    (first_name, last_name, birth_date, age_group, gender, phone, email, address).
+    Returns (ok, message, inserted_count); nothing is written on failure.
+    """
+    if not rows:
+        return True, "Nothing to insert.", 0
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", 0
+
+    try:
+        conn.start_transaction()
+        cur = conn.cursor()
+        cur.executemany(INSERT_PATIENT_SQL.format(ph="%s", now="NOW()"), rows)
+        conn.commit()
+        _notify_write("patients")
+        return True, f"{len(rows)} patients added.", len(rows)
+    except Error as exc:
+        try:
+            conn.rollback()
+        except Error:
+            pass
+        return False, f"Insert failed: {exc}", 0
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@traced
+def insert_patients_each(rows: list[tuple]) -> Tuple[bool, str, list[Optional[str]]]:
+    """
+    Insert patients (rows as for insert_patients_bulk) one transaction per row,
+    to find the rows that made a bulk insert fail. Returns (ok, message, refused):
+    refused[i] is None if rows[i] was inserted, else why the database rejected it
+    (a constraint or an invalid value). Any other error (connection, deadlock,
+    lock wait) stops with ok False, and refused covers only the rows before it.
+    """
+    refused: list[Optional[str]] = []
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", refused
+
+    try:
+        cur = conn.cursor()
+        sql = INSERT_PATIENT_SQL.format(ph="%s", now="NOW()")
+        for row in rows:
+            try:
+                cur.execute(sql, row)
+                conn.commit()
+                refused.append(None)
+            except (IntegrityError, DataError) as exc:
+                conn.rollback()
+                refused.append(f"Insert failed: {exc}")
+        return True, f"{refused.count(None)} patients added.", refused
+    except Error as exc:
+        try:
+            conn.rollback()
+        except Error:
+            pass
+        return False, f"Insert failed: {exc}", refused
+    finally:
+        if None in refused:
+            _notify_write("patients")
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@traced
 def fetch_appointments() -> Tuple[bool, str, Optional[list[dict]]]:
     """Return all rows from appointments table."""
     try:
@@ -162,6 +342,7 @@ def fetch_appointments() -> Tuple[bool, str, Optional[list[dict]]]:
             pass
 
 
+@traced
 def fetch_dentists() -> Tuple[bool, str, Optional[list[dict]]]:
     """Return all rows from dentists table."""
     try:
@@ -183,6 +364,50 @@ def fetch_dentists() -> Tuple[bool, str, Optional[list[dict]]]:
             pass
 
 
+def _lock_slot(cur, dentist_id: int, scheduled_at, status: str) -> list[tuple]:
+    """
+    Inside a transaction: lock the dentist's appointments around scheduled_at
+    (with gap locks on idx_appointments_dentist_time, so no concurrent booking
+    can slip into the range before commit) and return the ones overlapping the
+    slot as (appointment_id, patient_id, scheduled_at, status) tuples. Cancelled
+    bookings never conflict, so there is nothing to lock for them.
+    """
+    query = build_slot_lock_query(dentist_id, scheduled_at, status)
+    if query is None:
+        return []
+    cur.execute(*query)
+    return [tuple(row) for row in cur.fetchall()]
+
+
+def _slot_taken(cur, dentist_id: int, scheduled_at, status: str) -> Optional[str]:
+    """_lock_slot, then an error message if an appointment overlaps the slot."""
+    rows = _lock_slot(cur, dentist_id, scheduled_at, status)
+    return booked_message(rows[0][2]) if rows else None
+
+
+def _retry_on_deadlock(fn):
+    """
+    For booking writers, which re-raise ER_LOCK_DEADLOCK after rolling back. Two
+    bookings into the same free range both hold its gap lock from _lock_slot and
+    then block each other's insert, so InnoDB rolls one back; run that one again,
+    which waits for the other to commit and then refuses with booked_message.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for _attempt in range(2):
+            try:
+                return fn(*args, **kwargs)
+            except Error as exc:
+                if exc.errno != errorcode.ER_LOCK_DEADLOCK:
+                    raise
+        return False, booked_message(None), None
+
+    return wrapper
+
+
+@traced
+@_retry_on_deadlock
 def insert_appointment(
     patient_id: int,
     dentist_id: int,
@@ -192,34 +417,34 @@ def insert_appointment(
     notes: str | None = None,
     created_at: str | None = None,
 ) -> Tuple[bool, str, Optional[int]]:
-    """Insert a new appointment row and return its id."""
+    """Insert a new appointment row and return its id; refused if the dentist is booked then."""
     try:
         conn = get_connection()
     except Error as exc:
         return False, f"DB connection failed: {exc}", None
 
     try:
+        conn.start_transaction()
         cur = conn.cursor()
-        if created_at:
-            cur.execute(
-                """
-                INSERT INTO appointments (patient_id, dentist_id, scheduled_at, status, reason, notes, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """,
-                (patient_id, dentist_id, scheduled_at, status, reason, notes, created_at),
-            )
-        else:
-            cur.execute(
-                """
-                INSERT INTO appointments (patient_id, dentist_id, scheduled_at, status, reason, notes, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, NOW())
-                """,
-                (patient_id, dentist_id, scheduled_at, status, reason, notes),
-            )
+        taken = _slot_taken(cur, dentist_id, scheduled_at, status)
+        if taken:
+            conn.rollback()
+            return False, taken, None
+        cur.execute(
+            INSERT_APPOINTMENT_SQL.format(ph="%s", now="NOW()"),
+            (patient_id, dentist_id, scheduled_at, status, reason, notes, created_at or None),
+        )
         appt_id = cur.lastrowid
         conn.commit()
+        _notify_write("appointments")
         return True, "Appointment recorded.", appt_id
     except Error as exc:
+        try:
+            conn.rollback()
+        except Error:
+            pass
+        if exc.errno == errorcode.ER_LOCK_DEADLOCK:
+            raise  # _retry_on_deadlock books again
         return False, f"Insert failed: {exc}", None
     finally:
         try:
@@ -228,6 +453,7 @@ def insert_appointment(
             pass
 
 
+@traced
 def insert_payment(
     appointment_id: int,
     patient_id: int,
@@ -246,23 +472,12 @@ def insert_payment(
 
     try:
         cur = conn.cursor()
-        if payment_date:
-            cur.execute(
-                """
-                INSERT INTO payments (appointment_id, patient_id, amount, payment_date, method, status, reference_no, remarks)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (appointment_id, patient_id, amount, payment_date, method, status, reference_no, remarks),
-            )
-        else:
-            cur.execute(
-                """
-                INSERT INTO payments (appointment_id, patient_id, amount, payment_date, method, status, reference_no, remarks)
-                VALUES (%s, %s, %s, NOW(), %s, %s, %s, %s)
-                """,
-                (appointment_id, patient_id, amount, method, status, reference_no, remarks),
-            )
+        cur.execute(
+            INSERT_PAYMENT_SQL.format(ph="%s", now="NOW()"),
+            (appointment_id, patient_id, amount, payment_date or None, method, status, reference_no, remarks),
+        )
         conn.commit()
+        _notify_write("payments")
         return True, "Payment recorded."
     except Error as exc:
         return False, f"Insert failed: {exc}"
@@ -273,6 +488,75 @@ def insert_payment(
             pass
 
 
+@traced
+@_retry_on_deadlock
+def checkout(
+    patient_id: int,
+    dentist_id: int,
+    scheduled_at: str,
+    reason: str,
+    items: list[dict],
+    amount: float,
+    method: str,
+    payment_status: str,
+    reference_no: str | None = None,
+    remarks: str | None = None,
+    notes: str | None = None,
+    created_at: str | None = None,
+    appointment_status: str = "scheduled",
+) -> Tuple[bool, str, Optional[int]]:
+    """
+    Record an appointment, one appointment_treatments row per item
+    ({"treatment_id", "fee", optional "notes"}) and its payment in a single
+    transaction on one connection. Nothing is written if any step fails or the
+    dentist is already booked then. Returns (ok, message, appointment_id).
+    """
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        conn.start_transaction()
+        cur = conn.cursor()
+        taken = _slot_taken(cur, dentist_id, scheduled_at, appointment_status)
+        if taken:
+            conn.rollback()
+            return False, taken, None
+        cur.execute(
+            INSERT_APPOINTMENT_SQL.format(ph="%s", now="NOW()"),
+            (patient_id, dentist_id, scheduled_at, appointment_status, reason, notes, created_at),
+        )
+        appt_id = cur.lastrowid
+        if items:
+            cur.executemany(
+                INSERT_APPOINTMENT_TREATMENT_SQL.format(ph="%s"),
+                [(appt_id, item["treatment_id"], item.get("fee"), item.get("notes")) for item in items],
+            )
+        cur.execute(
+            INSERT_PAYMENT_SQL.format(ph="%s", now="NOW()"),
+            (appt_id, patient_id, amount, None, method, payment_status, reference_no, remarks),
+        )
+        conn.commit()
+        for table in ("appointments", "appointment_treatments", "payments"):
+            _notify_write(table)
+        return True, "Payment recorded.", appt_id
+    except Error as exc:
+        try:
+            conn.rollback()
+        except Error:
+            pass
+        if exc.errno == errorcode.ER_LOCK_DEADLOCK:
+            raise  # _retry_on_deadlock books again
+        return False, f"Checkout failed: {exc}", None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@traced
 def insert_patient_history(
     patient_id: int,
     appointment_id: int,
@@ -292,14 +576,11 @@ def insert_patient_history(
     try:
         cur = conn.cursor()
         cur.execute(
-            """
-            INSERT INTO patient_history
-            (patient_id, appointment_id, visit_date, diagnosis, treatment_given, prescription, follow_up_date, notes)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """,
+            INSERT_HISTORY_SQL.format(ph="%s"),
             (patient_id, appointment_id, visit_date, diagnosis, treatment_given, prescription, follow_up_date, notes),
         )
         conn.commit()
+        _notify_write("patient_history")
         return True, "Patient history saved."
     except Error as exc:
         return False, f"Insert failed: {exc}"
@@ -310,6 +591,7 @@ def insert_patient_history(
             pass
 
 
+@traced
 def fetch_patient_history() -> Tuple[bool, str, Optional[list[dict]]]:
     """Return all rows from patient_history table."""
     try:
@@ -331,6 +613,7 @@ def fetch_patient_history() -> Tuple[bool, str, Optional[list[dict]]]:
             pass
 
 
+@traced
 def fetch_payments() -> Tuple[bool, str, Optional[list[dict]]]:
     """Return all rows from payments table."""
     try:
@@ -350,3 +633,499 @@ def fetch_payments() -> Tuple[bool, str, Optional[list[dict]]]:
             conn.close()
         except Exception:
             pass
+
+
+def _fetch_keyset_page(
+    source: str,
+    allowed: tuple[str, ...] | dict[str, str],
+    pk: str,
+    sort_column: str,
+    columns: list[str] | None,
+    page_size: int,
+    after: tuple | None,
+    filters: dict | None,
+    descending: bool,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """
+    Shared keyset (seek) pagination: returns one page ordered by (sort_column, pk)
+    plus the cursor to pass as `after` for the next page (None when exhausted).
+    See db_common.build_keyset_query for the arguments.
+    """
+    try:
+        sql, params = build_keyset_query(
+            source, allowed, pk, sort_column, columns, page_size, after, filters, descending
+        )
+    except ValueError as exc:
+        return False, str(exc), None, None
+
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None, None
+
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(sql, tuple(params))
+        rows = cur.fetchall() or []
+        return True, "ok", rows, next_cursor(rows, page_size, sort_column, pk)
+    except Error as exc:
+        return False, f"Query failed: {exc}", None, None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@traced
+def fetch_patients_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return one page of patients ordered by patient_id, plus the next cursor."""
+    return _fetch_keyset_page(
+        "patients", PATIENT_COLUMNS, "patient_id", "patient_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_appointments_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+    order_by: str = "scheduled_at",
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return one page of appointments ordered by scheduled_at (or appointment_id)."""
+    if order_by not in APPOINTMENT_SORT_COLUMNS:
+        return False, f"Cannot order appointments by {order_by}.", None, None
+    return _fetch_keyset_page(
+        "appointments", APPOINTMENT_COLUMNS, "appointment_id", order_by,
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_payments_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+    order_by: str = "payment_id",
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """
+    Return one page of payments ordered by payment_id (or payment_date).
+    payment_date is nullable; rows without a date come first ascending, last descending.
+    """
+    if order_by not in PAYMENT_SORT_COLUMNS:
+        return False, f"Cannot order payments by {order_by}.", None, None
+    return _fetch_keyset_page(
+        "payments", PAYMENT_COLUMNS, "payment_id", order_by,
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_patient_history_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return one page of patient_history ordered by history_id, plus the next cursor."""
+    return _fetch_keyset_page(
+        "patient_history", HISTORY_COLUMNS, "history_id", "history_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+PATIENT_NAME = "TRIM(CONCAT_WS(' ', p.first_name, p.last_name))"
+APPOINTMENT_VIEW_COLUMNS = {**_APPOINTMENT_VIEW_BASE, "patient_name": PATIENT_NAME}
+PAYMENT_VIEW_COLUMNS = {**_PAYMENT_VIEW_BASE, "patient_name": PATIENT_NAME}
+HISTORY_VIEW_COLUMNS = {**_HISTORY_VIEW_BASE, "patient_name": PATIENT_NAME}
+
+
+@traced
+def fetch_appointment_view_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+    order_by: str = "scheduled_at",
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return appointments with patient and dentist names, ordered by scheduled_at (or appointment_id)."""
+    if order_by not in APPOINTMENT_SORT_COLUMNS:
+        return False, f"Cannot order appointments by {order_by}.", None, None
+    return _fetch_keyset_page(
+        APPOINTMENT_VIEW_SOURCE, APPOINTMENT_VIEW_COLUMNS, "appointment_id", order_by,
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_payment_view_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return payments with patient name and appointment schedule, ordered by payment_id."""
+    return _fetch_keyset_page(
+        PAYMENT_VIEW_SOURCE, PAYMENT_VIEW_COLUMNS, "payment_id", "payment_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_history_view_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return patient_history rows with patient name and appointment schedule."""
+    return _fetch_keyset_page(
+        HISTORY_VIEW_SOURCE, HISTORY_VIEW_COLUMNS, "history_id", "history_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_dentist_schedule(dentist_id: int, start, end) -> Tuple[bool, str, Optional[list[dict]]]:
+    """
+    Booked (not cancelled) appointments of one dentist with scheduled_at in
+    [start, end), earliest first; a range scan on idx_appointments_dentist_time.
+    """
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(DENTIST_SCHEDULE_SQL.format(ph="%s"), (dentist_id, start, end))
+        rows = cur.fetchall() or []
+        return True, "ok", rows
+    except Error as exc:
+        return False, f"Query failed: {exc}", None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _fetch_summary(
+    table: str,
+    keys: dict[str, str],
+    measures: dict[str, str],
+    group_by: tuple[str, ...],
+    start,
+    end,
+    filters: dict | None,
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Run a GROUP BY over one of the daily summary tables; see db_common.build_summary_query."""
+    try:
+        sql, params = build_summary_query(table, keys, measures, group_by, start, end, filters)
+    except ValueError as exc:
+        return False, str(exc), None
+
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(sql, tuple(params))
+        rows = cur.fetchall() or []
+        return True, "ok", rows
+    except Error as exc:
+        return False, f"Query failed: {exc}", None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@traced
+def fetch_revenue_summary(
+    start=None, end=None, group_by: tuple[str, ...] = ("day",), filters: dict | None = None
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """
+    Payment count and amount per group from daily_revenue for days in [start, end].
+    group_by takes any of day, month and status; reads never touch payments itself.
+    """
+    return _fetch_summary(
+        "daily_revenue", REVENUE_SUMMARY_KEYS, REVENUE_SUMMARY_MEASURES, group_by, start, end, filters
+    )
+
+
+@traced
+def fetch_appointment_summary(
+    start=None, end=None, group_by: tuple[str, ...] = ("status",), filters: dict | None = None
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """
+    Appointment counts per group from daily_appointment_stats for days in [start, end].
+    group_by takes any of day, month, dentist_id and status.
+    """
+    return _fetch_summary(
+        "daily_appointment_stats", APPOINTMENT_SUMMARY_KEYS, APPOINTMENT_SUMMARY_MEASURES, group_by, start, end, filters
+    )
+
+
+# Fact tables behind each summary, for the trigger-less refresh job
+# (migrations/003_summary_watermarks.sql):
+# source -> (pk, day column, summary table, triggers, rebuild statement).
+# The rebuild recounts every day from %s onward; the old rows are deleted first.
+SUMMARY_SOURCES = {
+    "payments": (
+        "payment_id",
+        "payment_date",
+        "daily_revenue",
+        ("payments_summary_ai", "payments_summary_au", "payments_summary_ad"),
+        """
+        INSERT INTO daily_revenue (day, status, payments, amount)
+        SELECT DATE(payment_date), status, COUNT(*), SUM(amount) FROM payments
+        WHERE payment_date >= %s AND status IS NOT NULL
+        GROUP BY DATE(payment_date), status
+        """,
+    ),
+    "appointments": (
+        "appointment_id",
+        "scheduled_at",
+        "daily_appointment_stats",
+        ("appointments_summary_ai", "appointments_summary_au", "appointments_summary_ad"),
+        """
+        INSERT INTO daily_appointment_stats (day, dentist_id, status, appointments)
+        SELECT DATE(scheduled_at), dentist_id, status, COUNT(*) FROM appointments
+        WHERE scheduled_at >= %s AND status IS NOT NULL
+        GROUP BY DATE(scheduled_at), dentist_id, status
+        """,
+    ),
+}
+# Days before the previous run that each refresh recounts, so late commits and
+# edits to recent rows (a visit marked completed or no-show) are picked up.
+SUMMARY_LOOKBACK_DAYS = 7
+
+
+@traced
+def refresh_summaries(full: bool = False) -> Tuple[bool, str, Optional[dict[str, int]]]:
+    """
+    Recount the daily summary tables for payments and appointments whose
+    triggers (migrations/002) are missing, and move each watermark up to
+    the newest row, in one transaction. Each run rebuilds every day from
+    SUMMARY_LOOKBACK_DAYS before the previous run onward (future appointments
+    included), reaching further back if a new row is dated earlier; full=True
+    rebuilds all days. Edits to rows older than that are only seen by a full
+    rebuild. Returns the summary rows rebuilt per source.
+    """
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        conn.start_transaction()
+        cur = conn.cursor()
+        cur.execute("SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE TRIGGER_SCHEMA = DATABASE()")
+        triggers = {row[0] for row in cur.fetchall()}
+        rebuilt: dict[str, int] = {}
+        for source, (pk, day_column, summary, needed, rebuild_sql) in SUMMARY_SOURCES.items():
+            # Locks the watermark so overlapping runs cannot rebuild the same days at once.
+            cur.execute(
+                "SELECT last_id, DATE(refreshed_at) - INTERVAL %s DAY FROM summary_watermarks "
+                "WHERE source = %s FOR UPDATE",
+                (SUMMARY_LOOKBACK_DAYS, source),
+            )
+            row = cur.fetchone()
+            if row is None:
+                conn.rollback()
+                return False, "No summary watermarks; apply migrations/003_summary_watermarks.sql.", None
+            last_id, since = row
+            cur.execute(
+                f"SELECT COALESCE(MAX({pk}), 0), DATE(MIN({day_column})) FROM {source} WHERE {pk} > %s", (last_id,)
+            )
+            high, earliest_new = cur.fetchone()
+            high = max(high, last_id)
+            rebuilt[source] = 0
+            if not set(needed) <= triggers:
+                if full or since is None:
+                    since = datetime.date.min
+                elif earliest_new is not None and earliest_new < since:
+                    since = earliest_new
+                cur.execute(f"DELETE FROM {summary} WHERE day >= %s", (since,))
+                cur.execute(rebuild_sql, (since,))
+                rebuilt[source] = cur.rowcount
+            cur.execute(
+                "UPDATE summary_watermarks SET last_id = %s, refreshed_at = NOW() WHERE source = %s",
+                (high, source),
+            )
+        conn.commit()
+        return True, "Summaries refreshed.", rebuilt
+    except Error as exc:
+        try:
+            conn.rollback()
+        except Error:
+            pass
+        return False, f"Summary refresh failed: {exc}", None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@traced
+def fetch_watermark(source: str) -> Tuple[bool, str, Optional[int]]:
+    """Last id processed by a batch job (summary_watermarks), 0 before its first run."""
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT last_id FROM summary_watermarks WHERE source = %s", (source,))
+        row = cur.fetchone()
+        return True, "ok", row[0] if row else 0
+    except Error as exc:
+        return False, f"Query failed: {exc}", None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@traced
+def fetch_plan_candidates(after_id: int, since, limit: int = 1000) -> Tuple[bool, str, Optional[list[dict]]]:
+    """
+    Up to `limit` scheduled appointments with id > after_id, scheduled_at >= since
+    and no appointment_treatments rows, with the patient's birth_date, by id.
+    """
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(PLAN_CANDIDATES_SQL.format(ph="%s"), (after_id, since, limit))
+        rows = cur.fetchall() or []
+        return True, "ok", rows
+    except Error as exc:
+        return False, f"Query failed: {exc}", None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@traced
+def insert_suggested_treatments(
+    rows: list[tuple], source: str, from_id: int, to_id: int
+) -> Tuple[bool, str, int]:
+    """
+    Insert (appointment_id, treatment_id, fee, notes) rows into
+    appointment_treatments and move the source watermark from from_id to to_id,
+    in one transaction. Fails without writing if another run moved the
+    watermark first. Returns (ok, message, inserted_count).
+    """
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", 0
+
+    try:
+        conn.start_transaction()
+        cur = conn.cursor()
+        cur.execute("INSERT IGNORE INTO summary_watermarks (source, last_id) VALUES (%s, 0)", (source,))
+        cur.execute(
+            "UPDATE summary_watermarks SET last_id = %s, refreshed_at = NOW() WHERE source = %s AND last_id = %s",
+            (to_id, source, from_id),
+        )
+        if cur.rowcount != 1:
+            conn.rollback()
+            return False, "Another run already processed these appointments.", 0
+        if rows:
+            cur.executemany(INSERT_APPOINTMENT_TREATMENT_SQL.format(ph="%s"), rows)
+        conn.commit()
+        if rows:
+            _notify_write("appointment_treatments")
+        return True, f"{len(rows)} treatments suggested.", len(rows)
+    except Error as exc:
+        try:
+            conn.rollback()
+        except Error:
+            pass
+        return False, f"Insert failed: {exc}", 0
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _fulltext_search(
+    source: str,
+    exprs: dict[str, str],
+    match_columns: str,
+    term: str,
+    page_size: int,
+    offset: int,
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    try:
+        sql, params = build_fulltext_query(source, exprs, match_columns, term, page_size, offset)
+    except ValueError as exc:
+        return False, str(exc), None
+
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(sql, tuple(params))
+        rows = cur.fetchall() or []
+        return True, "ok", rows
+    except Error as exc:
+        return False, f"Query failed: {exc}", None
+    finally:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+@traced
+def search_patient_history(
+    term: str, page_size: int = 200, offset: int = 0
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Ranked full-text search over diagnosis, notes, prescription and treatment_given."""
+    return _fulltext_search(
+        HISTORY_VIEW_SOURCE, HISTORY_VIEW_COLUMNS, HISTORY_FULLTEXT, term, page_size, offset
+    )
+
+
+@traced
+def search_appointments(
+    term: str, page_size: int = 200, offset: int = 0
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Ranked full-text search over appointment reason and notes."""
+    return _fulltext_search(
+        APPOINTMENT_VIEW_SOURCE, APPOINTMENT_VIEW_COLUMNS, APPOINTMENT_FULLTEXT, term, page_size, offset
+    )
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+
+class PooledConnection:
+    """
+    Thin proxy around a raw connection borrowed from a ConnectionPool.
+    Calling close() hands the connection back to the pool instead of dropping it,
+    so existing `conn.close()` call sites keep working unchanged.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw: Any) -> None:
+        self._pool = pool
+        self._raw = raw
+        self._returned = False
+
+    def close(self) -> None:
+        if self._returned:
+            return
+        self._returned = True
+        self._pool.release(self._raw)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of reusable DB connections.
+
+    - size: max connections open at once.
+    - borrow_timeout: seconds to wait for a free slot before raising PoolError.
+    - idle_timeout: idle connections older than this are closed instead of reused.
+    - health_check_after: connections idle longer than this are pinged on borrow.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int = 5,
+        borrow_timeout: float = 10.0,
+        idle_timeout: float = 300.0,
+        health_check_after: float = 5.0,
+    ) -> None:
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self._factory = factory
+        self.size = size
+        self.borrow_timeout = borrow_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        # Idle connections as (raw, last_used_monotonic); most recently used at the right.
+        self._idle: deque[tuple[Any, float]] = deque()
+        self._in_use = 0
+
+        self._stats = {
+            "borrows": 0,
+            "connects": 0,
+            "reconnects": 0,
+            "health_check_failures": 0,
+            "idle_expired": 0,
+            "exhausted": 0,
+            "wait_total_s": 0.0,
+            "wait_max_s": 0.0,
+        }
+
+    def acquire(self) -> PooledConnection:
+        """Borrow a connection, waiting up to borrow_timeout for a free slot."""
+        start = time.monotonic()
+        deadline = start + self.borrow_timeout
+        with self._cond:
+            while not self._idle and self._in_use >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["exhausted"] += 1
+                    raise PoolError(
+                        msg=f"Connection pool exhausted ({self.size} in use)."
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+            candidate = self._idle.pop() if self._idle else None
+            waited = time.monotonic() - start
+            self._stats["borrows"] += 1
+            self._stats["wait_total_s"] += waited
+            self._stats["wait_max_s"] = max(self._stats["wait_max_s"], waited)
+
+        # Connect/ping outside the lock so slow handshakes do not block other borrowers.
+        try:
+            raw = self._checkout(candidate)
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw)
+
+    def release(self, raw: Any) -> None:
+        """Return a connection to the pool, discarding it if it is broken."""
+        keep = True
+        try:
+            # fetchone() on an unbuffered cursor leaves the rest of the result on the
+            # wire, and rollback() refuses to run ("Unread result found") until it is read.
+            if getattr(raw, "unread_result", False):
+                raw.consume_results()
+            # Never hand out a connection with an open transaction.
+            if getattr(raw, "in_transaction", False):
+                raw.rollback()
+        except Error:
+            keep = False
+        with self._cond:
+            self._in_use -= 1
+            if keep:
+                self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+        if not keep:
+            self._close_quietly(raw)
+
+    def close_all(self) -> None:
+        """Close every idle connection (in-use connections close on release)."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for raw, _ in idle:
+            self._close_quietly(raw)
+
+    def stats(self) -> dict:
+        """Snapshot of pool counters plus current occupancy."""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["size"] = self.size
+            snapshot["in_use"] = self._in_use
+            snapshot["idle"] = len(self._idle)
+        borrows = snapshot["borrows"] or 1
+        snapshot["wait_avg_s"] = snapshot["wait_total_s"] / borrows
+        return snapshot
+
+    def _checkout(self, candidate: tuple[Any, float] | None) -> Any:
+        if candidate is not None:
+            raw, last_used = candidate
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_timeout:
+                self._bump("idle_expired")
+                self._close_quietly(raw)
+            elif idle_for <= self.health_check_after or self._is_healthy(raw):
+                return raw
+            else:
+                self._bump("health_check_failures")
+                self._close_quietly(raw)
+            self._bump("reconnects")
+        raw = self._factory()
+        self._bump("connects")
+        return raw
+
+    def _is_healthy(self, raw: Any) -> bool:
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _bump(self, key: str) -> None:
+        with self._cond:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _close_quietly(raw: Any) -> None:
+        try:
+            raw.close()
+        except Exception:
+            pass
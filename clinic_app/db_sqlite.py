@@ -0,0 +1,744 @@
+"""
+Embedded SQLite backend with the same functions and return shapes as db_mysql.
+
+Each worker thread keeps one open connection to the database file (WAL mode),
+so statements stay compiled in sqlite3's per-connection statement cache and no
+call pays for a connect. Select it with CLINIC_DB_BACKEND=sqlite.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from clinic_app import db as sqlite_db
+from clinic_app.db_common import (
+    APPOINTMENT_COLUMNS,
+    APPOINTMENT_SORT_COLUMNS,
+    APPOINTMENT_SUMMARY_KEYS,
+    APPOINTMENT_SUMMARY_MEASURES,
+    APPOINTMENT_VIEW_COLUMNS as _APPOINTMENT_VIEW_BASE,
+    APPOINTMENT_VIEW_SOURCE,
+    DENTIST_SCHEDULE_SQL,
+    FULLTEXT_MIN_TOKEN,
+    HISTORY_COLUMNS,
+    HISTORY_VIEW_COLUMNS as _HISTORY_VIEW_BASE,
+    HISTORY_VIEW_SOURCE,
+    INSERT_APPOINTMENT_SQL,
+    INSERT_APPOINTMENT_TREATMENT_SQL,
+    INSERT_HISTORY_SQL,
+    INSERT_PATIENT_SQL,
+    INSERT_PAYMENT_SQL,
+    PATIENT_COLUMNS,
+    PAYMENT_COLUMNS,
+    PAYMENT_SORT_COLUMNS,
+    PAYMENT_VIEW_COLUMNS as _PAYMENT_VIEW_BASE,
+    PAYMENT_VIEW_SOURCE,
+    PLAN_CANDIDATES_SQL,
+    REVENUE_SUMMARY_KEYS,
+    REVENUE_SUMMARY_MEASURES,
+    add_write_listener,  # noqa: F401 - same module surface as db_mysql
+    booked_message,
+    build_keyset_query,
+    build_summary_query,
+    fetch_all_pages,  # noqa: F401 - same module surface as db_mysql
+    next_cursor,
+    notify_write as _notify_write,
+    slot_bounds,
+)
+from clinic_app.instrumentation import metrics, traced
+
+Error = sqlite3.Error
+
+_NOW = "datetime('now', 'localtime')"
+
+_path: Path = sqlite_db.DB_PATH
+_seed = True
+_generation = 0
+_local = threading.local()
+_lock = threading.Lock()
+_schema_ready: set[Path] = set()
+_stats = {"connects": 0}
+
+
+def _dict_row(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+def configure(path: str | Path, seed: bool = True) -> None:
+    """
+    Point the backend at another database file; threads reconnect on their next call.
+    seed=False leaves a new file empty instead of loading the dental_clinic.sql rows.
+    """
+    global _path, _seed, _generation
+    with _lock:
+        _path = Path(path)
+        _seed = seed
+        _generation += 1
+
+
+def _thread_connection() -> sqlite3.Connection:
+    cached = getattr(_local, "conn", None)
+    if cached is not None and cached[0] == _generation:
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+    path = _path
+    conn = sqlite_db.get_connection(path)
+    with _lock:
+        if path not in _schema_ready:
+            sqlite_db.init_schema(conn, seed=_seed)
+            _schema_ready.add(path)
+        _stats["connects"] += 1
+    conn.row_factory = _dict_row
+    _local.conn = (_generation, conn)
+    return conn
+
+
+def get_connection():
+    """This thread's connection (traced like db_mysql's); do not close it."""
+    return metrics.connection(_thread_connection)
+
+
+def pool_stats() -> dict:
+    """Connection counters in the same shape as db_mysql.pool_stats()."""
+    with _lock:
+        connects = _stats["connects"]
+    return {
+        "size": connects,
+        "in_use": 0,
+        "idle": connects,
+        "connects": connects,
+        "borrows": 0,
+        "exhausted": 0,
+        "wait_avg_s": 0.0,
+        "wait_max_s": 0.0,
+    }
+
+
+def _fetch_rows(sql: str, params: tuple = ()) -> Tuple[bool, str, Optional[list[dict]]]:
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        return True, "ok", cur.fetchall()
+    except Error as exc:
+        return False, f"Query failed: {exc}", None
+
+
+def _write(sql: str, params: tuple, table: str) -> Tuple[bool, str, Optional[int]]:
+    """Run one INSERT and commit; returns (ok, error message or "", lastrowid)."""
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        conn.commit()
+    except Error as exc:
+        conn.rollback()
+        return False, f"Insert failed: {exc}", None
+    _notify_write(table)
+    return True, "", cur.lastrowid
+
+
+@traced
+def fetch_user_account(username: str) -> Tuple[bool, str, Optional[dict]]:
+    """
+    Return the user_accounts row for username (user_id, username, password_hash,
+    role, status, updated_at), or None if there is no such account.
+    Passwords are checked by clinic_app.auth, not here.
+    """
+    ok, msg, rows = _fetch_rows(
+        "SELECT user_id, username, password_hash, role, status, updated_at FROM user_accounts "
+        "WHERE username = ? LIMIT 1",
+        (username,),
+    )
+    if not ok:
+        return False, msg, None
+    return True, "ok", rows[0] if rows else None
+
+
+@traced
+def update_password_hash(user_id: int, current: str, new_hash: str) -> Tuple[bool, str]:
+    """
+    Replace a user's password_hash, only if it still equals current (so a
+    password changed meanwhile is never overwritten). Returns (ok, message).
+    """
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}"
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE user_accounts SET password_hash = ? WHERE user_id = ? AND password_hash = ?",
+            (new_hash, user_id, current),
+        )
+        conn.commit()
+    except Error as exc:
+        conn.rollback()
+        return False, f"Update failed: {exc}"
+    if cur.rowcount != 1:
+        return False, "Password was changed by someone else."
+    return True, "Password hash updated."
+
+
+@traced
+def fetch_patients() -> Tuple[bool, str, Optional[list[dict]]]:
+    """Return all rows from patients table."""
+    return _fetch_rows("SELECT * FROM patients")
+
+
+@traced
+def fetch_treatments() -> Tuple[bool, str, Optional[list[dict]]]:
+    """Return all rows from treatments table."""
+    return _fetch_rows("SELECT * FROM treatments")
+
+
+@traced
+def insert_patient(
+    first_name: str,
+    last_name: str,
+    birth_date: str,
+    age_group: str,
+    gender: str,
+    phone: str,
+    email: str,
+    address: str | None = None,
+) -> Tuple[bool, str]:
+    """Insert a patient row into patients table with current timestamp."""
+    ok, msg, _ = _write(
+        INSERT_PATIENT_SQL.format(ph="?", now=_NOW),
+        (first_name, last_name, birth_date, age_group, gender, phone, email, address),
+        "patients",
+    )
+    return (True, "Patient added.") if ok else (False, msg)
+
+
+@traced
+def insert_patients_bulk(rows: list[tuple]) -> Tuple[bool, str, int]:
+    """
+    Insert many patients in one transaction. Each row is
+    (first_name, last_name, birth_date, age_group, gender, phone, email, address).
+    Returns (ok, message, inserted_count); nothing is written on failure.
+    """
+    if not rows:
+        return True, "Nothing to insert.", 0
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", 0
+    try:
+        cur = conn.cursor()
+        cur.executemany(INSERT_PATIENT_SQL.format(ph="?", now=_NOW), rows)
+        conn.commit()
+    except Error as exc:
+        conn.rollback()
+        return False, f"Insert failed: {exc}", 0
+    _notify_write("patients")
+    return True, f"{len(rows)} patients added.", len(rows)
+
+
+@traced
+def insert_patients_each(rows: list[tuple]) -> Tuple[bool, str, list[Optional[str]]]:
+    """One transaction per row; see db_mysql.insert_patients_each."""
+    refused: list[Optional[str]] = []
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", refused
+    sql = INSERT_PATIENT_SQL.format(ph="?", now=_NOW)
+    try:
+        for row in rows:
+            try:
+                conn.execute(sql, row)
+                conn.commit()
+                refused.append(None)
+            except (sqlite3.IntegrityError, sqlite3.DataError) as exc:
+                conn.rollback()
+                refused.append(f"Insert failed: {exc}")
+        return True, f"{refused.count(None)} patients added.", refused
+    except Error as exc:
+        conn.rollback()
+        return False, f"Insert failed: {exc}", refused
+    finally:
+        if None in refused:
+            _notify_write("patients")
+
+
+@traced
+def fetch_appointments() -> Tuple[bool, str, Optional[list[dict]]]:
+    """Return all rows from appointments table."""
+    return _fetch_rows("SELECT * FROM appointments")
+
+
+@traced
+def fetch_dentists() -> Tuple[bool, str, Optional[list[dict]]]:
+    """Return all rows from dentists table."""
+    return _fetch_rows("SELECT * FROM dentists")
+
+
+def _slot_taken(cur, dentist_id: int, scheduled_at, status: str) -> Optional[str]:
+    """
+    Inside a BEGIN IMMEDIATE transaction (which holds the database's write lock,
+    so no concurrent booking can commit in between): an error message if one of
+    the dentist's appointments overlaps the slot. Cancelled bookings never conflict.
+    """
+    bounds = slot_bounds(scheduled_at)
+    if status == "cancelled" or bounds is None:
+        return None
+    cur.execute(DENTIST_SCHEDULE_SQL.format(ph="?"), (dentist_id, *bounds))
+    row = cur.fetchone()
+    return booked_message(row["scheduled_at"]) if row else None
+
+
+@traced
+def insert_appointment(
+    patient_id: int,
+    dentist_id: int,
+    scheduled_at: str,
+    status: str,
+    reason: str,
+    notes: str | None = None,
+    created_at: str | None = None,
+) -> Tuple[bool, str, Optional[int]]:
+    """Insert a new appointment row and return its id; refused if the dentist is booked then."""
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+    try:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        taken = _slot_taken(cur, dentist_id, scheduled_at, status)
+        if taken:
+            conn.rollback()
+            return False, taken, None
+        cur.execute(
+            INSERT_APPOINTMENT_SQL.format(ph="?", now=_NOW),
+            (patient_id, dentist_id, scheduled_at, status, reason, notes, created_at),
+        )
+        conn.commit()
+    except Error as exc:
+        conn.rollback()
+        return False, f"Insert failed: {exc}", None
+    _notify_write("appointments")
+    return True, "Appointment recorded.", cur.lastrowid
+
+
+@traced
+def insert_payment(
+    appointment_id: int,
+    patient_id: int,
+    amount: float,
+    method: str,
+    status: str,
+    reference_no: str | None = None,
+    remarks: str | None = None,
+    payment_date: str | None = None,
+) -> Tuple[bool, str]:
+    """Insert a new payment row."""
+    ok, msg, _ = _write(
+        INSERT_PAYMENT_SQL.format(ph="?", now=_NOW),
+        (appointment_id, patient_id, amount, payment_date, method, status, reference_no, remarks),
+        "payments",
+    )
+    return (True, "Payment recorded.") if ok else (False, msg)
+
+
+@traced
+def checkout(
+    patient_id: int,
+    dentist_id: int,
+    scheduled_at: str,
+    reason: str,
+    items: list[dict],
+    amount: float,
+    method: str,
+    payment_status: str,
+    reference_no: str | None = None,
+    remarks: str | None = None,
+    notes: str | None = None,
+    created_at: str | None = None,
+    appointment_status: str = "scheduled",
+) -> Tuple[bool, str, Optional[int]]:
+    """
+    Record an appointment, one appointment_treatments row per item
+    ({"treatment_id", "fee", optional "notes"}) and its payment in a single
+    transaction. Nothing is written if any step fails or the dentist is already
+    booked then. Returns (ok, message, appointment_id).
+    """
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        taken = _slot_taken(cur, dentist_id, scheduled_at, appointment_status)
+        if taken:
+            conn.rollback()
+            return False, taken, None
+        cur.execute(
+            INSERT_APPOINTMENT_SQL.format(ph="?", now=_NOW),
+            (patient_id, dentist_id, scheduled_at, appointment_status, reason, notes, created_at),
+        )
+        appt_id = cur.lastrowid
+        if items:
+            cur.executemany(
+                INSERT_APPOINTMENT_TREATMENT_SQL.format(ph="?"),
+                [(appt_id, item["treatment_id"], item.get("fee"), item.get("notes")) for item in items],
+            )
+        cur.execute(
+            INSERT_PAYMENT_SQL.format(ph="?", now=_NOW),
+            (appt_id, patient_id, amount, None, method, payment_status, reference_no, remarks),
+        )
+        conn.commit()
+    except Error as exc:
+        conn.rollback()
+        return False, f"Checkout failed: {exc}", None
+    for table in ("appointments", "appointment_treatments", "payments"):
+        _notify_write(table)
+    return True, "Payment recorded.", appt_id
+
+
+@traced
+def insert_patient_history(
+    patient_id: int,
+    appointment_id: int,
+    visit_date: str,
+    diagnosis: str | None = None,
+    treatment_given: str | None = None,
+    prescription: str | None = None,
+    follow_up_date: str | None = None,
+    notes: str | None = None,
+) -> Tuple[bool, str]:
+    """Insert a row into patient_history table."""
+    ok, msg, _ = _write(
+        INSERT_HISTORY_SQL.format(ph="?"),
+        (patient_id, appointment_id, visit_date, diagnosis, treatment_given, prescription, follow_up_date, notes),
+        "patient_history",
+    )
+    return (True, "History saved.") if ok else (False, msg)
+
+
+@traced
+def fetch_patient_history() -> Tuple[bool, str, Optional[list[dict]]]:
+    """Return all rows from patient_history table."""
+    return _fetch_rows("SELECT * FROM patient_history")
+
+
+@traced
+def fetch_payments() -> Tuple[bool, str, Optional[list[dict]]]:
+    """Return all rows from payments table."""
+    return _fetch_rows("SELECT * FROM payments")
+
+
+def _fetch_keyset_page(
+    source: str,
+    allowed: tuple[str, ...] | dict[str, str],
+    pk: str,
+    sort_column: str,
+    columns: list[str] | None,
+    page_size: int,
+    after: tuple | None,
+    filters: dict | None,
+    descending: bool,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Keyset page plus next cursor; see db_common.build_keyset_query for the arguments."""
+    try:
+        sql, params = build_keyset_query(
+            source, allowed, pk, sort_column, columns, page_size, after, filters, descending, placeholder="?"
+        )
+    except ValueError as exc:
+        return False, str(exc), None, None
+    ok, msg, rows = _fetch_rows(sql, tuple(params))
+    if not ok:
+        return False, msg, None, None
+    return True, "ok", rows, next_cursor(rows, page_size, sort_column, pk)
+
+
+@traced
+def fetch_patients_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return one page of patients ordered by patient_id, plus the next cursor."""
+    return _fetch_keyset_page(
+        "patients", PATIENT_COLUMNS, "patient_id", "patient_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_appointments_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+    order_by: str = "scheduled_at",
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return one page of appointments ordered by scheduled_at (or appointment_id)."""
+    if order_by not in APPOINTMENT_SORT_COLUMNS:
+        return False, f"Cannot order appointments by {order_by}.", None, None
+    return _fetch_keyset_page(
+        "appointments", APPOINTMENT_COLUMNS, "appointment_id", order_by,
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_payments_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+    order_by: str = "payment_id",
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return one page of payments ordered by payment_id (or payment_date)."""
+    if order_by not in PAYMENT_SORT_COLUMNS:
+        return False, f"Cannot order payments by {order_by}.", None, None
+    return _fetch_keyset_page(
+        "payments", PAYMENT_COLUMNS, "payment_id", order_by,
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_patient_history_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return one page of patient_history ordered by history_id, plus the next cursor."""
+    return _fetch_keyset_page(
+        "patient_history", HISTORY_COLUMNS, "history_id", "history_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+PATIENT_NAME = "TRIM(COALESCE(p.first_name, '') || ' ' || COALESCE(p.last_name, ''))"
+APPOINTMENT_VIEW_COLUMNS = {**_APPOINTMENT_VIEW_BASE, "patient_name": PATIENT_NAME}
+PAYMENT_VIEW_COLUMNS = {**_PAYMENT_VIEW_BASE, "patient_name": PATIENT_NAME}
+HISTORY_VIEW_COLUMNS = {**_HISTORY_VIEW_BASE, "patient_name": PATIENT_NAME}
+
+
+@traced
+def fetch_appointment_view_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+    order_by: str = "scheduled_at",
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return appointments with patient and dentist names, ordered by scheduled_at (or appointment_id)."""
+    if order_by not in APPOINTMENT_SORT_COLUMNS:
+        return False, f"Cannot order appointments by {order_by}.", None, None
+    return _fetch_keyset_page(
+        APPOINTMENT_VIEW_SOURCE, APPOINTMENT_VIEW_COLUMNS, "appointment_id", order_by,
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_payment_view_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return payments with patient name and appointment schedule, ordered by payment_id."""
+    return _fetch_keyset_page(
+        PAYMENT_VIEW_SOURCE, PAYMENT_VIEW_COLUMNS, "payment_id", "payment_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_history_view_page(
+    columns: list[str] | None = None,
+    page_size: int = 200,
+    after: tuple | None = None,
+    filters: dict | None = None,
+    descending: bool = False,
+) -> Tuple[bool, str, Optional[list[dict]], Optional[tuple]]:
+    """Return patient_history rows with patient name and appointment schedule."""
+    return _fetch_keyset_page(
+        HISTORY_VIEW_SOURCE, HISTORY_VIEW_COLUMNS, "history_id", "history_id",
+        columns, page_size, after, filters, descending,
+    )
+
+
+@traced
+def fetch_dentist_schedule(dentist_id: int, start, end) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Booked appointments of one dentist with scheduled_at in [start, end), earliest first."""
+    return _fetch_rows(DENTIST_SCHEDULE_SQL.format(ph="?"), (dentist_id, str(start), str(end)))
+
+
+def _fetch_summary(
+    table: str,
+    keys: dict[str, str],
+    measures: dict[str, str],
+    group_by: tuple[str, ...],
+    start,
+    end,
+    filters: dict | None,
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    try:
+        sql, params = build_summary_query(table, keys, measures, group_by, start, end, filters, placeholder="?")
+    except ValueError as exc:
+        return False, str(exc), None
+    return _fetch_rows(sql, tuple(params))
+
+
+@traced
+def fetch_revenue_summary(
+    start=None, end=None, group_by: tuple[str, ...] = ("day",), filters: dict | None = None
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Payment count and amount per group from daily_revenue for days in [start, end]."""
+    return _fetch_summary(
+        "daily_revenue", REVENUE_SUMMARY_KEYS, REVENUE_SUMMARY_MEASURES, group_by, start, end, filters
+    )
+
+
+@traced
+def fetch_appointment_summary(
+    start=None, end=None, group_by: tuple[str, ...] = ("status",), filters: dict | None = None
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Appointment counts per group from daily_appointment_stats for days in [start, end]."""
+    return _fetch_summary(
+        "daily_appointment_stats", APPOINTMENT_SUMMARY_KEYS, APPOINTMENT_SUMMARY_MEASURES, group_by, start, end, filters
+    )
+
+
+@traced
+def fetch_watermark(source: str) -> Tuple[bool, str, Optional[int]]:
+    """Last id processed by a batch job (summary_watermarks), 0 before its first run."""
+    ok, msg, rows = _fetch_rows("SELECT last_id FROM summary_watermarks WHERE source = ?", (source,))
+    if not ok:
+        return False, msg, None
+    return True, "ok", rows[0]["last_id"] if rows else 0
+
+
+@traced
+def fetch_plan_candidates(after_id: int, since, limit: int = 1000) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Scheduled appointments past after_id with no treatments yet; see db_mysql.fetch_plan_candidates."""
+    return _fetch_rows(PLAN_CANDIDATES_SQL.format(ph="?"), (after_id, str(since), limit))
+
+
+@traced
+def insert_suggested_treatments(
+    rows: list[tuple], source: str, from_id: int, to_id: int
+) -> Tuple[bool, str, int]:
+    """appointment_treatments rows plus the watermark move in one transaction; see db_mysql."""
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", 0
+    try:
+        cur = conn.cursor()
+        cur.execute("INSERT OR IGNORE INTO summary_watermarks (source, last_id) VALUES (?, 0)", (source,))
+        cur.execute(
+            f"UPDATE summary_watermarks SET last_id = ?, refreshed_at = {_NOW} WHERE source = ? AND last_id = ?",
+            (to_id, source, from_id),
+        )
+        if cur.rowcount != 1:
+            conn.rollback()
+            return False, "Another run already processed these appointments.", 0
+        if rows:
+            cur.executemany(INSERT_APPOINTMENT_TREATMENT_SQL.format(ph="?"), rows)
+        conn.commit()
+    except Error as exc:
+        conn.rollback()
+        return False, f"Insert failed: {exc}", 0
+    if rows:
+        _notify_write("appointment_treatments")
+    return True, f"{len(rows)} treatments suggested.", len(rows)
+
+
+# FULLTEXT_MIN_TOKEN as on MySQL, so both backends accept the same search terms.
+HISTORY_SEARCH_COLUMNS = ("h.diagnosis", "h.notes", "h.prescription", "h.treatment_given")
+APPOINTMENT_SEARCH_COLUMNS = ("a.reason", "a.notes")
+
+
+def _fulltext_search(
+    source: str,
+    exprs: dict[str, str],
+    fts_table: str,
+    row_key: str,
+    like_columns: tuple[str, ...],
+    term: str,
+    page_size: int,
+    offset: int,
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """
+    Ranked FTS5 search requiring every word as a prefix; score is the negated
+    bm25 rank so that, as on MySQL, higher means more relevant. Without FTS5
+    it falls back to an unranked LIKE scan over the same columns.
+    """
+    words = [w for w in re.findall(r"\w+", term) if len(w) >= FULLTEXT_MIN_TOKEN]
+    if not words:
+        return False, f"Search words need at least {FULLTEXT_MIN_TOKEN} characters.", None
+    select_sql = ", ".join(f"{expr} AS {name}" for name, expr in exprs.items())
+
+    try:
+        conn = get_connection()
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+    if sqlite_db.has_fulltext(conn):
+        query = " ".join(f'"{w}"*' for w in words)
+        return _fetch_rows(
+            f"""
+            SELECT {select_sql}, -bm25({fts_table}) AS score
+            FROM {source} JOIN {fts_table} ON {fts_table}.rowid = {row_key}
+            WHERE {fts_table} MATCH ?
+            ORDER BY score DESC
+            LIMIT ? OFFSET ?
+            """,
+            (query, page_size, offset),
+        )
+    haystack = " || ' ' || ".join(f"COALESCE({c}, '')" for c in like_columns)
+    clauses = " AND ".join(f"({haystack}) LIKE ?" for _ in words)
+    return _fetch_rows(
+        f"SELECT {select_sql}, 0 AS score FROM {source} WHERE {clauses} LIMIT ? OFFSET ?",
+        (*(f"%{w}%" for w in words), page_size, offset),
+    )
+
+
+@traced
+def search_patient_history(
+    term: str, page_size: int = 200, offset: int = 0
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Ranked full-text search over diagnosis, notes, prescription and treatment_given."""
+    return _fulltext_search(
+        HISTORY_VIEW_SOURCE, HISTORY_VIEW_COLUMNS, "patient_history_fts", "h.history_id",
+        HISTORY_SEARCH_COLUMNS, term, page_size, offset,
+    )
+
+
+@traced
+def search_appointments(
+    term: str, page_size: int = 200, offset: int = 0
+) -> Tuple[bool, str, Optional[list[dict]]]:
+    """Ranked full-text search over appointment reason and notes."""
+    return _fulltext_search(
+        APPOINTMENT_VIEW_SOURCE, APPOINTMENT_VIEW_COLUMNS, "appointments_fts", "a.appointment_id",
+        APPOINTMENT_SEARCH_COLUMNS, term, page_size, offset,
+    )
@@ -0,0 +1,205 @@
+"""
+Bulk patient import from CSV.
+
+    python -m clinic_app.importer patients.csv [--chunk-size 1000] [--restart]
+
+Expected headers: first_name, last_name, birth_date (YYYY-MM-DD), gender,
+phone, email, address. age_group is derived from birth_date. Rows are
+validated, then inserted one chunk per transaction. Progress is saved after
+each committed chunk, so an interrupted import resumes where it stopped. A chunk
+the database refuses is retried row by row. Rejected rows (invalid, or refused
+by the database) are written to <csv>.rejects.csv with the reason.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from clinic_app.repository import store
+from clinic_app.logic.treatment import get_age_group
+from clinic_app.planning import ages_on
+
+GENDERS = {"m": "male", "male": "male", "f": "female", "female": "female", "other": "other", "o": "other"}
+# varchar sizes of the patients columns (dental_clinic.sql).
+MAX_LENGTHS = {"first_name": 100, "last_name": 100, "phone": 30, "email": 120}
+_UNTRIED = object()
+
+
+def validate_patient_row(raw: dict, today: datetime.date) -> tuple[Optional[tuple], Optional[str]]:
+    """Return (insert tuple, None) for a good row or (None, reason) for a rejected one."""
+    first = (raw.get("first_name") or "").strip()
+    last = (raw.get("last_name") or "").strip()
+    if not first or not last:
+        return None, "first_name and last_name are required"
+
+    birth_text = (raw.get("birth_date") or "").strip()
+    try:
+        birth = datetime.date.fromisoformat(birth_text)
+    except ValueError:
+        return None, f"invalid birth_date {birth_text!r}"
+    age = ages_on([birth], [today])[0]
+    if age is None:
+        return None, f"birth_date {birth_text} is in the future"
+    age_group = get_age_group(age)
+
+    gender_text = (raw.get("gender") or "").strip().lower()
+    gender = GENDERS.get(gender_text) if gender_text else None
+    if gender_text and gender is None:
+        return None, f"invalid gender {gender_text!r}"
+
+    def opt(key: str) -> Optional[str]:
+        value = (raw.get(key) or "").strip()
+        return value or None
+
+    email = opt("email")
+    if email and "@" not in email:
+        return None, f"invalid email {email!r}"
+
+    phone = opt("phone")
+    for key, value in (("first_name", first), ("last_name", last), ("phone", phone), ("email", email)):
+        if value and len(value) > MAX_LENGTHS[key]:
+            return None, f"{key} is longer than {MAX_LENGTHS[key]} characters"
+
+    return (first, last, birth.isoformat(), age_group, gender, phone, email, opt("address")), None
+
+
+def _progress_path(csv_path: Path) -> Path:
+    return csv_path.with_name(csv_path.name + ".progress.json")
+
+
+def _load_progress(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text())
+    return {"rows_done": 0, "inserted": 0, "rejected": 0}
+
+
+def _save_progress(path: Path, progress: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(progress))
+    os.replace(tmp, path)
+
+
+def import_patients_csv(
+    csv_path: str | Path,
+    chunk_size: int = 1000,
+    resume: bool = True,
+    report: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Stream csv_path into patients in chunk_size transactions. Returns a summary
+    dict (rows_done, inserted, rejected, seconds, rows_per_sec, ok, message);
+    report(summary) is called after every committed chunk.
+    """
+    csv_path = Path(csv_path)
+    progress_file = _progress_path(csv_path)
+    reject_file = csv_path.with_name(csv_path.name + ".rejects.csv")
+    progress = _load_progress(progress_file) if resume else {"rows_done": 0, "inserted": 0, "rejected": 0}
+    skip = progress["rows_done"]
+    today = datetime.date.today()
+    started = time.monotonic()
+    inserted_this_run = 0
+
+    def summary(ok: bool = True, message: str = "ok") -> dict:
+        elapsed = time.monotonic() - started
+        return {
+            **progress,
+            "seconds": elapsed,
+            "rows_per_sec": inserted_this_run / elapsed if elapsed > 0 else 0.0,
+            "ok": ok,
+            "message": message,
+        }
+
+    with open(csv_path, newline="", encoding="utf-8-sig") as fh, open(
+        reject_file, "a" if skip else "w", newline="", encoding="utf-8"
+    ) as rejects_fh:
+        reader = csv.DictReader(fh)
+        rejects = csv.writer(rejects_fh)
+        if not skip:
+            rejects.writerow(["line", "error", *(reader.fieldnames or [])])
+
+        # (line number, raw values, insert tuple or None, reject reason or None) per line read.
+        pending: list[tuple[int, list, Optional[tuple], Optional[str]]] = []
+
+        def save(lines: list[tuple[int, list, Optional[tuple], Optional[str]]], count: int) -> None:
+            nonlocal inserted_this_run
+            rejected = [[line_no, error, *values] for line_no, values, _, error in lines if error]
+            rejects.writerows(rejected)
+            rejects_fh.flush()
+            progress["rows_done"] += len(lines)
+            progress["inserted"] += count
+            progress["rejected"] += len(rejected)
+            inserted_this_run += count
+            _save_progress(progress_file, progress)
+
+        def flush() -> Optional[str]:
+            nonlocal pending
+            rows = [row for _, _, row, _ in pending if row is not None]
+            ok, msg, count = store.insert_patients_bulk(rows)
+            if ok:
+                save(pending, count)
+            else:
+                # One row the database refuses fails the whole chunk, so retry it row by row: rows
+                # it rejects go to the rejects file. On any other failure insert_patients_each stops,
+                # and only the lines before the first row it did not try count as done.
+                ok, msg, refused = store.insert_patients_each(rows)
+                outcomes = iter(refused)
+                handled = []
+                for line_no, values, row, error in pending:
+                    if row is not None:
+                        reason = next(outcomes, _UNTRIED)
+                        if reason is _UNTRIED:
+                            break
+                        if reason is not None:
+                            row, error = None, reason
+                    handled.append((line_no, values, row, error))
+                save(handled, refused.count(None))
+                if not ok:
+                    return msg
+            pending = []
+            if report is not None:
+                report(summary())
+            return None
+
+        for line_no, raw in enumerate(reader, start=1):
+            if line_no <= skip:
+                continue
+            row, error = validate_patient_row(raw, today)
+            pending.append((line_no, list(raw.values()), row, error))
+            if len(pending) >= chunk_size:
+                error = flush()
+                if error:
+                    return summary(False, error)
+        if pending:
+            error = flush()
+            if error:
+                return summary(False, error)
+
+    return summary(True, "Import complete.")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import patients from a CSV file.")
+    parser.add_argument("csv_path")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress and start from the first row")
+    args = parser.parse_args(argv)
+
+    def report(s: dict) -> None:
+        print(
+            f"{s['rows_done']} rows read, {s['inserted']} inserted, {s['rejected']} rejected "
+            f"({s['rows_per_sec']:.0f} rows/s)"
+        )
+
+    result = import_patients_csv(args.csv_path, args.chunk_size, resume=not args.restart, report=report)
+    print(result["message"])
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("clinic_app.db")
+
+
+class CallRecord:
+    """Timings and volume for one db_mysql call, filled in by the traced connection/cursor."""
+
+    __slots__ = ("name", "connect_s", "execute_s", "fetch_s", "rows", "bytes", "statement")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.connect_s = 0.0
+        self.execute_s = 0.0
+        self.fetch_s = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.statement: Optional[str] = None
+
+
+def _value_bytes(value: Any) -> int:
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return 8
+
+
+# Rows past this many are not measured one by one; their size is extrapolated.
+_BYTES_SAMPLE = 64
+
+
+def _estimate_bytes(rows: list) -> int:
+    """Approximate payload size of fetched rows (text length, 8 bytes per scalar)."""
+    if not rows:
+        return 0
+    sample = rows[:_BYTES_SAMPLE]
+    total = 0
+    for row in sample:
+        values = row.values() if isinstance(row, dict) else row
+        total += sum(_value_bytes(v) for v in values)
+    return total * len(rows) // len(sample)
+
+
+class TracedCursor:
+    """Cursor proxy that charges execute/fetch time and fetched rows to a CallRecord."""
+
+    def __init__(self, cursor, record: CallRecord) -> None:
+        self._cursor = cursor
+        self._record = record
+
+    def _run(self, method: str, operation, *args, **kwargs):
+        if self._record.statement is None:
+            self._record.statement = operation
+        start = time.perf_counter()
+        try:
+            return getattr(self._cursor, method)(operation, *args, **kwargs)
+        finally:
+            self._record.execute_s += time.perf_counter() - start
+
+    def execute(self, operation, *args, **kwargs):
+        return self._run("execute", operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._run("executemany", operation, *args, **kwargs)
+
+    def _fetch(self, method: str, *args):
+        start = time.perf_counter()
+        try:
+            result = getattr(self._cursor, method)(*args)
+        finally:
+            self._record.fetch_s += time.perf_counter() - start
+        rows = result if isinstance(result, list) else ([result] if result is not None else [])
+        self._record.rows += len(rows)
+        self._record.bytes += _estimate_bytes(rows)
+        return result
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchmany(self, *args):
+        return self._fetch("fetchmany", *args)
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    """Connection proxy whose cursors report into the active CallRecord; commit counts as execute time."""
+
+    def __init__(self, conn, record: CallRecord) -> None:
+        self._conn = conn
+        self._record = record
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._conn.cursor(*args, **kwargs), self._record)
+
+    def commit(self) -> None:
+        start = time.perf_counter()
+        try:
+            self._conn.commit()
+        finally:
+            self._record.execute_s += time.perf_counter() - start
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+
+class _FunctionStats:
+    def __init__(self, window: int) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.connect_s = 0.0
+        self.execute_s = 0.0
+        self.fetch_s = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.recent: deque[float] = deque(maxlen=window)
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def _one_line(sql: Optional[str], limit: int = 200) -> str:
+    text = re.sub(r"\s+", " ", sql or "").strip()
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+class Instrumentation:
+    """
+    Per-function counters for db_mysql calls: call count, errors, connect/execute/
+    fetch time, rows and approximate bytes, plus rolling p50/p95/p99 over the last
+    `window` calls. Calls slower than slow_ms are logged to the clinic_app.db logger
+    and kept in a short list for the diagnostics panel.
+    """
+
+    def __init__(self, window: int = 512, slow_ms: float = 250.0, enabled: bool = True) -> None:
+        self.window = window
+        self.slow_ms = slow_ms
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: dict[str, _FunctionStats] = {}
+        self._slow: deque[dict] = deque(maxlen=50)
+        self._local = threading.local()
+
+    # -- recording --------------------------------------------------------
+    def _current(self) -> Optional[CallRecord]:
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+
+    def traced(self, fn: Callable) -> Callable:
+        """Decorator for db_mysql functions; results shaped (ok, ...) with ok False count as errors."""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            record = CallRecord(name)
+            stack = getattr(self._local, "stack", None)
+            if stack is None:
+                stack = self._local.stack = []
+            stack.append(record)
+            failed = True
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+                failed = isinstance(result, tuple) and bool(result) and result[0] is False
+                return result
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                self._finish(record, elapsed, failed)
+
+        return wrapper
+
+    def traced_async(self, fn: Callable) -> Callable:
+        """
+        traced() for coroutines (db_async). Concurrent calls share one thread, so
+        only the total time and errors are recorded, without the connect/execute split.
+        """
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return await fn(*args, **kwargs)
+            record = CallRecord(name)
+            failed = True
+            start = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+                failed = isinstance(result, tuple) and bool(result) and result[0] is False
+                return result
+            finally:
+                self._finish(record, time.perf_counter() - start, failed)
+
+        return wrapper
+
+    def connection(self, acquire: Callable[[], Any]):
+        """Borrow a connection via acquire(), charging the wait to the active call."""
+        record = self._current() if self.enabled else None
+        if record is None:
+            return acquire()
+        start = time.perf_counter()
+        try:
+            conn = acquire()
+        finally:
+            record.connect_s += time.perf_counter() - start
+        return TracedConnection(conn, record)
+
+    def _finish(self, record: CallRecord, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            stats = self._stats.get(record.name)
+            if stats is None:
+                stats = self._stats[record.name] = _FunctionStats(self.window)
+            stats.calls += 1
+            stats.errors += failed
+            stats.total_s += elapsed
+            stats.connect_s += record.connect_s
+            stats.execute_s += record.execute_s
+            stats.fetch_s += record.fetch_s
+            stats.rows += record.rows
+            stats.bytes += record.bytes
+            stats.recent.append(elapsed)
+        if elapsed * 1000 >= self.slow_ms:
+            entry = {
+                "function": record.name,
+                "at": time.time(),
+                "total_ms": elapsed * 1000,
+                "connect_ms": record.connect_s * 1000,
+                "execute_ms": record.execute_s * 1000,
+                "fetch_ms": record.fetch_s * 1000,
+                "rows": record.rows,
+                "statement": _one_line(record.statement),
+            }
+            with self._lock:
+                self._slow.append(entry)
+            logger.warning(
+                "slow query %s %.1fms (connect %.1f, execute %.1f, fetch %.1f) rows=%d: %s",
+                record.name,
+                entry["total_ms"],
+                entry["connect_ms"],
+                entry["execute_ms"],
+                entry["fetch_ms"],
+                record.rows,
+                entry["statement"],
+            )
+
+    # -- reporting --------------------------------------------------------
+    def snapshot(self) -> dict:
+        """Point-in-time copy of all counters; times are in milliseconds."""
+        with self._lock:
+            items = [(name, s, sorted(s.recent)) for name, s in self._stats.items()]
+            slow = list(self._slow)
+        functions = {}
+        for name, s, ordered in items:
+            calls = s.calls or 1
+            functions[name] = {
+                "calls": s.calls,
+                "errors": s.errors,
+                "total_ms": s.total_s * 1000,
+                "avg_ms": s.total_s * 1000 / calls,
+                "p50_ms": _percentile(ordered, 0.50) * 1000,
+                "p95_ms": _percentile(ordered, 0.95) * 1000,
+                "p99_ms": _percentile(ordered, 0.99) * 1000,
+                "avg_connect_ms": s.connect_s * 1000 / calls,
+                "avg_execute_ms": s.execute_s * 1000 / calls,
+                "avg_fetch_ms": s.fetch_s * 1000 / calls,
+                "rows": s.rows,
+                "bytes": s.bytes,
+            }
+        return {"generated_at": time.time(), "slow_ms": self.slow_ms, "functions": functions, "slow": slow}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition of the snapshot, one metric family at a time."""
+        functions = sorted(self.snapshot()["functions"].items())
+        families: list[tuple[str, str, Callable[[str, dict], list[str]]]] = [
+            ("clinic_db_calls_total", "counter", lambda lbl, f: [f"{{{lbl}}} {f['calls']}"]),
+            ("clinic_db_errors_total", "counter", lambda lbl, f: [f"{{{lbl}}} {f['errors']}"]),
+            (
+                "clinic_db_call_seconds",
+                "summary",
+                lambda lbl, f: [
+                    *(
+                        f'{{{lbl},quantile="{q}"}} {f[key] / 1000:.6f}'
+                        for q, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms"))
+                    ),
+                    f"_sum{{{lbl}}} {f['total_ms'] / 1000:.6f}",
+                    f"_count{{{lbl}}} {f['calls']}",
+                ],
+            ),
+            (
+                "clinic_db_phase_seconds_total",
+                "counter",
+                lambda lbl, f: [
+                    f'{{{lbl},phase="{phase}"}} {f[f"avg_{phase}_ms"] * f["calls"] / 1000:.6f}'
+                    for phase in ("connect", "execute", "fetch")
+                ],
+            ),
+            ("clinic_db_rows_total", "counter", lambda lbl, f: [f"{{{lbl}}} {f['rows']}"]),
+            ("clinic_db_bytes_total", "counter", lambda lbl, f: [f"{{{lbl}}} {f['bytes']}"]),
+        ]
+        lines = []
+        for metric, kind, render in families:
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, f in functions:
+                lines.extend(metric + sample for sample in render(f'function="{name}"', f))
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> str:
+        """Write the snapshot to path; .prom/.txt files get Prometheus text, anything else JSON."""
+        if path.endswith((".prom", ".txt")):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), indent=2)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+        return path
+
+
+metrics = Instrumentation(
+    window=int(os.getenv("DB_METRICS_WINDOW", "512")),
+    slow_ms=float(os.getenv("DB_SLOW_QUERY_MS", "250")),
+    enabled=os.getenv("DB_INSTRUMENT", "1") != "0",
+)
+traced = metrics.traced
+traced_async = metrics.traced_async
+
+# DB_METRICS_FILE=path writes a final snapshot when the app exits.
+if os.getenv("DB_METRICS_FILE"):
+    atexit.register(metrics.export, os.environ["DB_METRICS_FILE"])
@@ -0,0 +1,180 @@
+"""
+Dentist schedule: double-booking checks and free-slot search for the pickers.
+
+An appointment occupies SLOT_MINUTES from its scheduled_at. For each dentist the
+index keeps the sorted start times of booked appointments over the active
+horizon (today and the next HORIZON_DAYS days), loaded with one indexed range
+query and searched with bisect: "is this slot free" is O(log n), and the next
+free slots are found by jumping straight past each booked run. Times outside the
+horizon fall back to the same range query for just the window asked about.
+Any appointment write drops the index, which reloads on the next lookup.
+"""
+from __future__ import annotations
+
+import datetime
+import threading
+from bisect import bisect_right
+from typing import Optional, Tuple
+
+from clinic_app.db_common import SLOT_MINUTES, add_write_listener
+from clinic_app.repository import store
+
+# Same opening hours the demo data generator books into; the slot length is the
+# one the backends' double-booking check uses.
+OPEN_HOUR, CLOSE_HOUR = 8, 17
+HORIZON_DAYS = 60
+SLOT = datetime.timedelta(minutes=SLOT_MINUTES)
+
+# How scheduled_at is written; the pickers fill "YYYY-MM-DD" and "HH:MM AM/PM".
+STORE_FORMAT = "%Y-%m-%d %H:%M:%S"
+_FORMATS = (STORE_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d %I:%M %p")
+
+
+def parse_when(value) -> Optional[datetime.datetime]:
+    """scheduled_at as a datetime (MySQL rows, ISO text or picker text); None if unparseable."""
+    if isinstance(value, datetime.datetime):
+        return value
+    if value is None:
+        return None
+    text = " ".join(str(value).split()).upper()
+    for fmt in _FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def opening(day: datetime.date) -> tuple[datetime.datetime, datetime.datetime]:
+    return (
+        datetime.datetime.combine(day, datetime.time(OPEN_HOUR)),
+        datetime.datetime.combine(day, datetime.time(CLOSE_HOUR)),
+    )
+
+
+def within_hours(when: datetime.datetime) -> bool:
+    """True if a slot starting at when ends by closing time."""
+    open_at, close_at = opening(when.date())
+    return open_at <= when and when + SLOT <= close_at
+
+
+def next_slot_start(when: datetime.datetime) -> datetime.datetime:
+    """First slot on the SLOT_MINUTES grid starting at or after when, inside opening hours."""
+    open_at, close_at = opening(when.date())
+    if when > open_at:
+        steps = -(-(when - open_at) // SLOT)
+        open_at += steps * SLOT
+    if open_at + SLOT > close_at:
+        return opening(when.date() + datetime.timedelta(days=1))[0]
+    return open_at
+
+
+def _conflict(starts: list[datetime.datetime], when: datetime.datetime) -> Optional[datetime.datetime]:
+    """Start of a booked appointment overlapping [when, when + SLOT), or None."""
+    i = bisect_right(starts, when - SLOT)
+    if i < len(starts) and starts[i] < when + SLOT:
+        return starts[i]
+    return None
+
+
+class DentistSchedule:
+    """
+    Per-dentist sorted start times of booked appointments over the active
+    horizon. Thread-safe; lists are replaced whole, never mutated in place.
+    """
+
+    def __init__(self, horizon_days: int = HORIZON_DAYS) -> None:
+        self.horizon_days = horizon_days
+        self._lock = threading.Lock()
+        self._starts: dict[int, list[datetime.datetime]] = {}
+        self._horizon_from: Optional[datetime.date] = None
+        # Bumped by invalidate() so a load that raced a write is not kept.
+        self._generation = 0
+
+    def _horizon(self) -> tuple[datetime.datetime, datetime.datetime]:
+        today = datetime.date.today()
+        start = datetime.datetime.combine(today, datetime.time())
+        return start, start + datetime.timedelta(days=self.horizon_days + 1)
+
+    @staticmethod
+    def _fetch(dentist_id: int, start, end) -> Tuple[bool, str, Optional[list[datetime.datetime]]]:
+        ok, msg, rows = store.fetch_dentist_schedule(
+            dentist_id, start.strftime(STORE_FORMAT), end.strftime(STORE_FORMAT)
+        )
+        if not ok:
+            return False, msg, None
+        starts = (parse_when(r["scheduled_at"]) for r in rows or [])
+        return True, "ok", sorted(s for s in starts if s is not None)
+
+    def _window(
+        self, dentist_id: int, start: datetime.datetime, end: datetime.datetime
+    ) -> Tuple[bool, str, Optional[list[datetime.datetime]]]:
+        """Sorted booked starts covering [start, end): the horizon index if it spans it, else a cold query."""
+        h_start, h_end = self._horizon()
+        if not (h_start <= start - SLOT and end + SLOT <= h_end):
+            return self._fetch(dentist_id, start - SLOT, end + SLOT)
+        with self._lock:
+            if self._horizon_from != h_start.date():
+                self._starts.clear()
+                self._horizon_from = h_start.date()
+            starts = self._starts.get(dentist_id)
+            generation = self._generation
+        if starts is not None:
+            return True, "ok", starts
+        ok, msg, starts = self._fetch(dentist_id, h_start, h_end)
+        if ok:
+            with self._lock:
+                if self._generation == generation and self._horizon_from == h_start.date():
+                    self._starts[dentist_id] = starts
+        return ok, msg, starts
+
+    def is_free(self, dentist_id: int, when: datetime.datetime) -> Tuple[bool, str, bool]:
+        """
+        (ok, message, free) for booking dentist_id at when; message says why a
+        slot is not free (outside opening hours or overlapping an appointment).
+        """
+        if not within_hours(when):
+            return True, f"Outside clinic hours ({OPEN_HOUR:02d}:00-{CLOSE_HOUR:02d}:00).", False
+        ok, msg, starts = self._window(dentist_id, when, when + SLOT)
+        if not ok:
+            return False, msg, False
+        taken = _conflict(starts, when)
+        if taken is not None:
+            return True, f"Dentist is already booked at {taken:%Y-%m-%d %I:%M %p}.", False
+        return True, "ok", True
+
+    def next_free_slots(
+        self, dentist_id: int, after: datetime.datetime | None = None, n: int = 5, days: int | None = None
+    ) -> Tuple[bool, str, Optional[list[datetime.datetime]]]:
+        """Up to n free slot starts for dentist_id from after (default now) within the next `days` days."""
+        after = after or datetime.datetime.now()
+        end = after + datetime.timedelta(days=self.horizon_days if days is None else days)
+        ok, msg, starts = self._window(dentist_id, after, end)
+        if not ok:
+            return False, msg, None
+        free: list[datetime.datetime] = []
+        when = next_slot_start(after)
+        while len(free) < n and when < end:
+            taken = _conflict(starts, when)
+            if taken is not None:
+                when = next_slot_start(taken + SLOT)
+                continue
+            free.append(when)
+            when = next_slot_start(when + SLOT)
+        return True, "ok", free
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._starts.clear()
+            self._generation += 1
+
+
+schedule = DentistSchedule()
+
+
+def _on_write(table: str) -> None:
+    if table == "appointments":
+        schedule.invalidate()
+
+
+add_write_listener(_on_write)
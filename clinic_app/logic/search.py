@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+
+def normalize(value) -> str:
+    """Lowercase text form of a cell value used for matching (None becomes empty)."""
+    if value is None:
+        return ""
+    return str(value).casefold()
+
+
+class SearchIndex:
+    """
+    In-memory substring search over a list of row dicts.
+
+    Each row's searchable text is normalized once into a haystack, so a keystroke
+    costs one `term in haystack` per candidate instead of re-stringifying rows.
+    Results are narrowed incrementally: when the new term contains the previous
+    one, only the previous hits are re-checked.
+    """
+
+    # Separator between fields so a term never matches across two cells.
+    _SEP = "\x1f"
+
+    def __init__(self, rows: Iterable[dict] = (), fields: Optional[list[str]] = None) -> None:
+        self.fields = fields
+        self.rows: list[dict] = []
+        self._haystacks: list[str] = []
+        self._last_term = ""
+        self._last_hits: Optional[list[int]] = None
+        self.add(rows)
+
+    def _haystack(self, row: dict) -> str:
+        values = row.values() if self.fields is None else (row.get(f) for f in self.fields)
+        return self._SEP.join(normalize(v) for v in values)
+
+    def add(self, rows: Iterable[dict]) -> list[dict]:
+        """
+        Index more rows (e.g. a freshly streamed page) and return the ones that
+        match the active term, so callers can append them to a filtered view.
+        """
+        start = len(self.rows)
+        for row in rows:
+            self.rows.append(row)
+            self._haystacks.append(self._haystack(row))
+        new_idx = range(start, len(self.rows))
+        if not self._last_term:
+            return self.rows[start:]
+        hits = [i for i in new_idx if self._last_term in self._haystacks[i]]
+        # Keep the cached hit list complete so later narrowing stays correct.
+        if self._last_hits is not None:
+            self._last_hits.extend(hits)
+        return [self.rows[i] for i in hits]
+
+    def search(self, term: str) -> list[dict]:
+        """Return rows whose fields contain term (case-insensitive); empty term returns all."""
+        term = normalize(term).strip()
+        if not term:
+            self._last_term, self._last_hits = "", None
+            return self.rows
+        if self._last_hits is not None and self._last_term and self._last_term in term:
+            candidates: Iterable[int] = self._last_hits
+        else:
+            candidates = range(len(self.rows))
+        haystacks = self._haystacks
+        hits = [i for i in candidates if term in haystacks[i]]
+        self._last_term, self._last_hits = term, hits
+        return [self.rows[i] for i in hits]
+
+    def insert(self, position: int, row: dict) -> Optional[int]:
+        """
+        Index row at position in rows (so a sorted list stays sorted). Returns its
+        position among the current search results, or None if it does not match.
+        """
+        haystack = self._haystack(row)
+        self.rows.insert(position, row)
+        self._haystacks.insert(position, haystack)
+        if not self._last_term:
+            return position
+        hits = self._last_hits if self._last_hits is not None else []
+        at = bisect_left(hits, position)
+        for i in range(at, len(hits)):
+            hits[i] += 1
+        if self._last_term not in haystack:
+            return None
+        hits.insert(at, position)
+        return at
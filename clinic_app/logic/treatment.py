@@ -1,3 +1,25 @@
+"""
+Treatment suggestions from the patient's age and reason for visit.
+
+The rules are data: reason keywords in priority order, a plan per (age group,
+reason key) and the catalog treatments each reason suggests. A RuleTable
+compiles the keywords into one regex that classifies a reason in a single scan,
+and memoizes classifications and plans, so recommend_many() can score every
+upcoming appointment cheaply. Rules load from a JSON file (CLINIC_TREATMENT_RULES)
+and catalog treatments from the treatments table rows.
+
+This is just sample logic for a school/project system (NOT real medical advice).
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+
 def get_age_group(age: int) -> str:
     """Return age group string based on age."""
     if age < 0:
@@ -9,83 +31,235 @@ def get_age_group(age: int) -> str:
     return "old"  # senior / elderly
 
 
+# Reason keywords in priority order: the first key with a keyword anywhere in the reason wins.
+REASON_KEYWORDS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("checkup", ("check",)),
+    ("cleaning", ("clean", "prophy")),
+    ("braces", ("braces", "ortho")),
+    ("toothache", ("pain", "ache", "toothache")),
+)
+DEFAULT_REASON = "other"
+
+# (age group, reason key) -> (recommended treatment, notes).
+PLANS: dict[tuple[str, str], tuple[str, str]] = {
+    ("child", "checkup"): (
+        "Oral exam, fluoride application, check if sealants are needed.",
+        "Focus on prevention and monitoring tooth/jaw development.",
+    ),
+    ("child", "cleaning"): (
+        "Prophylaxis (cleaning) with fluoride treatment.",
+        "Teach proper brushing and flossing in a child-friendly way.",
+    ),
+    ("child", "toothache"): (
+        "Exam, X-ray, filling or pulp therapy for affected baby/permanent tooth.",
+        "Use child behavior management techniques; involve parents.",
+    ),
+    ("child", "braces"): (
+        "Orthodontic assessment (crowding, bite, jaw growth).",
+        "May schedule full ortho workup if needed.",
+    ),
+    ("child", "other"): (
+        "Basic exam, then refer to pediatric dentist if case is complex.",
+        "Clarify complaint; focus on comfort and reassurance.",
+    ),
+    ("adult", "checkup"): (
+        "Comprehensive exam, X-ray as needed, treatment plan discussion.",
+        "Review dental history, lifestyle, and habits.",
+    ),
+    ("adult", "cleaning"): (
+        "Scaling and polishing; oral hygiene instructions.",
+        "Check for early gum disease and stains.",
+    ),
+    ("adult", "toothache"): (
+        "Exam, X-ray, possible filling, root canal, or extraction.",
+        "Explain options, cost, and follow-up visits.",
+    ),
+    ("adult", "braces"): (
+        "Orthodontic consultation (malocclusion, spacing, crowding).",
+        "Discuss braces vs clear aligners if available.",
+    ),
+    ("adult", "other"): (
+        "Initial exam and diagnosis; refer to specialist if needed.",
+        "May involve endodontist, periodontist, or oral surgeon.",
+    ),
+    ("old", "checkup"): (
+        "Exam of teeth, gums, dentures/implants; X-ray if needed.",
+        "Consider medical history and medications (e.g., diabetes, hypertension).",
+    ),
+    ("old", "cleaning"): (
+        "Gentle scaling (may be deep cleaning) and polishing.",
+        "Gums and bone may be fragile; check for periodontal disease.",
+    ),
+    ("old", "toothache"): (
+        "Exam, X-ray, check old fillings/crowns, treat root or gum problems.",
+        "Consider pain control, systemic health, and ability to heal.",
+    ),
+    ("old", "braces"): (
+        "Consultation for bite/teeth alignment and prosthetic planning.",
+        "More common to adjust dentures/implants than full ortho treatment.",
+    ),
+    ("old", "other"): (
+        "Exam plus review of existing dentures/implants and oral hygiene.",
+        "Focus on comfort, function, and quality of life.",
+    ),
+}
+
+# Catalog treatments (by name) each reason suggests; the catalog's own age_group
+# column decides who is eligible (e.g. Fluoride is for children only).
+SUGGESTED_TREATMENTS: dict[str, tuple[str, ...]] = {
+    "checkup": ("Fluoride",),
+    "cleaning": ("Cleaning", "Fluoride"),
+    "toothache": ("Filling",),
+}
+
+# Distinct free-text reasons remembered per table.
+REASON_CACHE_SIZE = 4096
+
+
+class RuleTable:
+    """
+    Compiled treatment rules. Every reason keyword becomes one alternative of a
+    single regex scanned once per reason; a named group per reason key says which
+    key matched. Treat instances as immutable: derive new ones with with_catalog().
+    """
+
+    def __init__(
+        self,
+        keywords: Sequence[tuple[str, Sequence[str]]] = REASON_KEYWORDS,
+        plans: dict[tuple[str, str], tuple[str, str]] | None = None,
+        suggested: dict[str, Sequence[str]] | None = None,
+        catalog: Iterable[dict] = (),
+        default_reason: str = DEFAULT_REASON,
+    ) -> None:
+        self.keywords = tuple((key, tuple(words)) for key, words in keywords)
+        self.plans = dict(PLANS if plans is None else plans)
+        self.suggested = {k: tuple(v) for k, v in (SUGGESTED_TREATMENTS if suggested is None else suggested).items()}
+        self.catalog = tuple(catalog)
+        self.default_reason = default_reason
+
+        groups = [
+            f"(?P<k{i}>{'|'.join(re.escape(w.lower()) for w in words)})"
+            for i, (_key, words) in enumerate(self.keywords)
+            if words
+        ]
+        # Lookahead so keywords that overlap inside the text are all seen in one scan.
+        self._pattern = re.compile(f"(?=(?:{'|'.join(groups)}))") if groups else None
+        self.reason_key = lru_cache(maxsize=REASON_CACHE_SIZE)(self._classify)
+        self.plan = lru_cache(maxsize=None)(self._plan)
+        self.treatments_for = lru_cache(maxsize=None)(self._treatments_for)
+
+    # -- loading --------------------------------------------------------------
+    @classmethod
+    def from_file(cls, path: str | Path) -> "RuleTable":
+        """
+        Load rules from JSON: {"keywords": [[key, [word, ...]], ...] in priority
+        order, "plans": {age_group: {key: [treatment, notes]}}, optional
+        "suggested": {key: [treatment name, ...]} and "default_reason"}.
+        Raises OSError or ValueError for a missing or malformed file.
+        """
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        try:
+            plans = {
+                (group, key): (str(plan[0]), str(plan[1]))
+                for group, by_key in data["plans"].items()
+                for key, plan in by_key.items()
+            }
+            return cls(
+                keywords=[(str(key), [str(w) for w in words]) for key, words in data["keywords"]],
+                plans=plans,
+                suggested=data.get("suggested", SUGGESTED_TREATMENTS),
+                default_reason=data.get("default_reason", DEFAULT_REASON),
+            )
+        except (KeyError, TypeError, IndexError) as exc:
+            raise ValueError(f"Malformed treatment rules in {path}: {exc!r}") from None
+
+    def with_catalog(self, treatments: Iterable[dict]) -> "RuleTable":
+        """Same rules, with suggestions resolved against these treatments rows."""
+        return RuleTable(self.keywords, self.plans, self.suggested, treatments, self.default_reason)
+
+    # -- lookups (memoized per instance) -------------------------------------
+    def _classify(self, reason: str) -> str:
+        """Reason key for a free-text reason for visit."""
+        text = reason.lower().strip()
+        best: Optional[int] = None
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                index = int(match.lastgroup[1:])
+                if best is None or index < best:
+                    best = index
+                    if best == 0:
+                        break
+        return self.default_reason if best is None else self.keywords[best][0]
+
+    def _plan(self, age_group: str, reason_key: str) -> tuple[str, str]:
+        """(recommended treatment, notes); falls back to the group's default plan."""
+        return self.plans.get((age_group, reason_key)) or self.plans.get((age_group, self.default_reason)) or ("", "")
+
+    def _treatments_for(self, age_group: str, reason_key: str) -> tuple[dict, ...]:
+        """Catalog rows suggested for this reason that the age group is eligible for."""
+        by_name = {str(row.get("name", "")).casefold(): row for row in self.catalog}
+        rows = (by_name.get(name.casefold()) for name in self.suggested.get(reason_key, ()))
+        return tuple(
+            row for row in rows
+            if row is not None and (row.get("age_group") or "any") in ("any", age_group)
+        )
+
+    # -- recommendations ------------------------------------------------------
+    def recommend(self, age: int, reason: str) -> dict:
+        age_group = get_age_group(age)
+        reason_key = self.reason_key(reason)
+        treatment, notes = self.plan(age_group, reason_key)
+        return {
+            "age": age,
+            "age_group": age_group,
+            "reason": reason_key,
+            "recommended_treatment": treatment,
+            "notes": notes,
+        }
+
+    def recommend_many(self, ages: Sequence[int], reasons: Sequence[str]) -> list[dict]:
+        """
+        recommend() for parallel sequences of ages and reasons. Each distinct
+        reason is classified once per batch. Raises ValueError when the lengths
+        differ or an age is negative.
+        """
+        if len(ages) != len(reasons):
+            raise ValueError("ages and reasons must have the same length.")
+        groups = [get_age_group(age) for age in ages]
+        keys = {reason: self.reason_key(reason) for reason in set(reasons)}
+        plans = []
+        for age, group, reason in zip(ages, groups, reasons):
+            key = keys[reason]
+            treatment, notes = self.plan(group, key)
+            plans.append(
+                {
+                    "age": age,
+                    "age_group": group,
+                    "reason": key,
+                    "recommended_treatment": treatment,
+                    "notes": notes,
+                }
+            )
+        return plans
+
+
+def load_rules() -> RuleTable:
+    """Rules from CLINIC_TREATMENT_RULES (a JSON file) if set, else the built-in table."""
+    path = os.getenv("CLINIC_TREATMENT_RULES")
+    return RuleTable.from_file(path) if path else RuleTable()
+
+
+default_rules = load_rules()
+
+
 def get_basic_treatment(age: int, reason: str) -> dict:
     """
     Return a basic treatment plan based on age and reason for visit.
     This is just sample logic for a school/project system (NOT real medical advice).
     """
-    reason = reason.lower().strip()
-    age_group = get_age_group(age)
-
-    # Standardize reason keywords
-    if "check" in reason:
-        reason_key = "checkup"
-    elif "clean" in reason or "prophy" in reason:
-        reason_key = "cleaning"
-    elif "braces" in reason or "ortho" in reason:
-        reason_key = "braces"
-    elif "pain" in reason or "ache" in reason or "toothache" in reason:
-        reason_key = "toothache"
-    else:
-        reason_key = "other"
-
-    treatment = {
-        "age": age,
-        "age_group": age_group,
-        "reason": reason_key,
-        "recommended_treatment": "",
-        "notes": "",
-    }
-
-    if age_group == "child":
-        if reason_key == "checkup":
-            treatment["recommended_treatment"] = "Oral exam, fluoride application, check if sealants are needed."
-            treatment["notes"] = "Focus on prevention and monitoring tooth/jaw development."
-        elif reason_key == "cleaning":
-            treatment["recommended_treatment"] = "Prophylaxis (cleaning) with fluoride treatment."
-            treatment["notes"] = "Teach proper brushing and flossing in a child-friendly way."
-        elif reason_key == "toothache":
-            treatment["recommended_treatment"] = "Exam, X-ray, filling or pulp therapy for affected baby/permanent tooth."
-            treatment["notes"] = "Use child behavior management techniques; involve parents."
-        elif reason_key == "braces":
-            treatment["recommended_treatment"] = "Orthodontic assessment (crowding, bite, jaw growth)."
-            treatment["notes"] = "May schedule full ortho workup if needed."
-        else:
-            treatment["recommended_treatment"] = "Basic exam, then refer to pediatric dentist if case is complex."
-            treatment["notes"] = "Clarify complaint; focus on comfort and reassurance."
-
-    elif age_group == "adult":
-        if reason_key == "checkup":
-            treatment["recommended_treatment"] = "Comprehensive exam, X-ray as needed, treatment plan discussion."
-            treatment["notes"] = "Review dental history, lifestyle, and habits."
-        elif reason_key == "cleaning":
-            treatment["recommended_treatment"] = "Scaling and polishing; oral hygiene instructions."
-            treatment["notes"] = "Check for early gum disease and stains."
-        elif reason_key == "toothache":
-            treatment["recommended_treatment"] = "Exam, X-ray, possible filling, root canal, or extraction."
-            treatment["notes"] = "Explain options, cost, and follow-up visits."
-        elif reason_key == "braces":
-            treatment["recommended_treatment"] = "Orthodontic consultation (malocclusion, spacing, crowding)."
-            treatment["notes"] = "Discuss braces vs clear aligners if available."
-        else:
-            treatment["recommended_treatment"] = "Initial exam and diagnosis; refer to specialist if needed."
-            treatment["notes"] = "May involve endodontist, periodontist, or oral surgeon."
-
-    else:  # age_group == "old"
-        if reason_key == "checkup":
-            treatment["recommended_treatment"] = "Exam of teeth, gums, dentures/implants; X-ray if needed."
-            treatment["notes"] = "Consider medical history and medications (e.g., diabetes, hypertension)."
-        elif reason_key == "cleaning":
-            treatment["recommended_treatment"] = "Gentle scaling (may be deep cleaning) and polishing."
-            treatment["notes"] = "Gums and bone may be fragile; check for periodontal disease."
-        elif reason_key == "toothache":
-            treatment["recommended_treatment"] = "Exam, X-ray, check old fillings/crowns, treat root or gum problems."
-            treatment["notes"] = "Consider pain control, systemic health, and ability to heal."
-        elif reason_key == "braces":
-            treatment["recommended_treatment"] = "Consultation for bite/teeth alignment and prosthetic planning."
-            treatment["notes"] = "More common to adjust dentures/implants than full ortho treatment."
-        else:
-            treatment["recommended_treatment"] = "Exam plus review of existing dentures/implants and oral hygiene."
-            treatment["notes"] = "Focus on comfort, function, and quality of life."
-
-    return treatment
+    return default_rules.recommend(age, reason)
+
+
+def recommend_many(ages: Sequence[int], reasons: Sequence[str], rules: RuleTable | None = None) -> list[dict]:
+    """get_basic_treatment() for many appointments at once (see RuleTable.recommend_many)."""
+    return (rules or default_rules).recommend_many(ages, reasons)
@@ -0,0 +1,341 @@
+"""
+Versioned schema migrations for the MySQL/MariaDB database.
+
+    python -m clinic_app.migrations               # apply pending migrations
+    python -m clinic_app.migrations --status      # list applied and pending versions
+    python -m clinic_app.migrations --baseline 3  # record 001-003 as applied without running them
+    python -m clinic_app.migrations --explain     # check the hot queries use the indexes
+
+Migrations are the migrations/NNN_name.sql scripts, applied in version order
+and recorded in schema_migrations. Scripts may switch the terminator with
+DELIMITER lines like the mysql client. MySQL commits DDL as it goes, so a
+migration that fails partway is not rolled back: fix the cause, undo what ran
+if needed and run again. Databases that had scripts applied by hand before the
+runner existed need --baseline first. Set CLINIC_MIGRATE_ON_START=1 to apply
+pending migrations when the app starts. The SQLite backend creates its own
+schema (clinic_app.db) and does not use these scripts.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+from mysql.connector import Error
+
+from clinic_app import db_mysql
+from clinic_app.db_common import (
+    APPOINTMENT_COLUMNS,
+    DENTIST_SCHEDULE_SQL,
+    HISTORY_COLUMNS,
+    PAYMENT_COLUMNS,
+    build_keyset_query,
+    build_slot_lock_query,
+    split_sql,
+)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+# Named lock so two clients starting at once do not run the same migration twice.
+LOCK_NAME = "clinic_app.migrations"
+LOCK_TIMEOUT = 60
+# Errors that usually mean the script was already applied by hand.
+ALREADY_APPLIED_ERRORS = {1050, 1060, 1061, 1359}
+
+SCHEMA_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+  version int(11) NOT NULL,
+  name varchar(255) NOT NULL,
+  checksum char(64) NOT NULL,
+  applied_at datetime NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (version)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+"""
+
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[tuple[int, str, Path]]:
+    """
+    (version, name, path) for every NNN_name.sql script, in version order.
+    Raises ValueError when two scripts share a version number.
+    """
+    found: dict[int, tuple[int, str, Path]] = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILENAME.match(path.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in found:
+            raise ValueError(f"Migrations {found[version][2].name} and {path.name} share version {version}.")
+        found[version] = (version, match.group(2), path)
+    return [found[v] for v in sorted(found)]
+
+
+def _checksum(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _applied(cur) -> dict[int, tuple[str, object]]:
+    cur.execute(SCHEMA_TABLE)
+    cur.execute("SELECT version, checksum, applied_at FROM schema_migrations")
+    return {version: (checksum, applied_at) for version, checksum, applied_at in cur.fetchall()}
+
+
+def _borrow(conn):
+    """(connection, owned): the given connection, or one from the db_mysql pool that the caller must close."""
+    if conn is not None:
+        return conn, False
+    return db_mysql.get_connection(), True
+
+
+def migrate(conn=None, target: Optional[int] = None) -> Tuple[bool, str, list[str]]:
+    """
+    Apply every pending migration up to target (default: all), each recorded in
+    schema_migrations once its last statement has run. Returns the file names applied.
+    """
+    try:
+        migrations = discover()
+    except ValueError as exc:
+        return False, str(exc), []
+    try:
+        conn, owned = _borrow(conn)
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", []
+
+    ran: list[str] = []
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+        if cur.fetchone()[0] != 1:
+            return False, "Another client is running migrations; try again shortly.", ran
+        try:
+            applied = _applied(cur)
+            for version, name, path in migrations:
+                if version in applied or (target is not None and version > target):
+                    continue
+                for index, stmt in enumerate(split_sql(path.read_text(encoding="utf-8")), 1):
+                    try:
+                        cur.execute(stmt)
+                        if cur.with_rows:
+                            cur.fetchall()
+                    except Error as exc:
+                        conn.rollback()
+                        msg = f"{path.name} failed at statement {index}: {exc}"
+                        if exc.errno in ALREADY_APPLIED_ERRORS:
+                            msg += f" (applied by hand already? record it with --baseline {version})"
+                        return False, msg, ran
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (version, name, _checksum(path)),
+                )
+                conn.commit()
+                ran.append(path.name)
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cur.fetchall()
+        return True, f"Applied {len(ran)} migration(s)." if ran else "Schema is up to date.", ran
+    except Error as exc:
+        return False, f"Migration failed: {exc}", ran
+    finally:
+        if owned:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def baseline(version: int, conn=None) -> Tuple[bool, str]:
+    """Record migrations up to version as applied without running them (scripts applied by hand)."""
+    try:
+        migrations = [m for m in discover() if m[0] <= version]
+    except ValueError as exc:
+        return False, str(exc)
+    try:
+        conn, owned = _borrow(conn)
+    except Error as exc:
+        return False, f"DB connection failed: {exc}"
+
+    try:
+        cur = conn.cursor()
+        applied = _applied(cur)
+        missing = [m for m in migrations if m[0] not in applied]
+        cur.executemany(
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+            [(v, name, _checksum(path)) for v, name, path in missing],
+        )
+        conn.commit()
+        return True, f"Recorded {len(missing)} migration(s) as applied."
+    except Error as exc:
+        return False, f"Baseline failed: {exc}"
+    finally:
+        if owned:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def status(conn=None) -> Tuple[bool, str, Optional[list[dict]]]:
+    """
+    One row per known version: version, name, state (applied, pending, changed
+    when the script was edited after it ran, or missing when its file is gone)
+    and applied_at.
+    """
+    try:
+        migrations = discover()
+    except ValueError as exc:
+        return False, str(exc), None
+    try:
+        conn, owned = _borrow(conn)
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        applied = _applied(conn.cursor())
+        conn.commit()
+    except Error as exc:
+        return False, f"Query failed: {exc}", None
+    finally:
+        if owned:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    rows = []
+    for version, name, path in migrations:
+        checksum, applied_at = applied.get(version, (None, None))
+        if checksum is None:
+            state = "pending"
+        else:
+            state = "applied" if checksum == _checksum(path) else "changed"
+        rows.append({"version": version, "name": name, "state": state, "applied_at": applied_at})
+    known = {m[0] for m in migrations}
+    for version in sorted(set(applied) - known):
+        rows.append({"version": version, "name": "?", "state": "missing", "applied_at": applied[version][1]})
+    return True, "ok", rows
+
+
+def _keyset(table: str, columns: tuple[str, ...], pk: str, sort: str, after=None, filters=None) -> tuple[str, list]:
+    return build_keyset_query(table, columns, pk, sort, None, 200, after, filters, False)
+
+
+def explain_queries() -> list[tuple[str, str, str, str, list]]:
+    """
+    (label, table, expected index, sql, params) for the queries the 004 indexes
+    serve, built the way db_mysql and the replica build them.
+    """
+    slot_sql, slot_params = build_slot_lock_query(1, "2030-01-01 09:00:00", "scheduled")
+    return [
+        ("appointment pages by time", "appointments", "idx_appointments_time",
+         *_keyset("appointments", APPOINTMENT_COLUMNS, "appointment_id", "scheduled_at",
+                  after=("2030-01-01 09:00:00", 1))),
+        ("one dentist's appointments", "appointments", "idx_appointments_dentist_time",
+         *_keyset("appointments", APPOINTMENT_COLUMNS, "appointment_id", "scheduled_at", filters={"dentist_id": 1})),
+        ("appointments by status", "appointments", "idx_appointments_status",
+         *_keyset("appointments", APPOINTMENT_COLUMNS, "appointment_id", "scheduled_at",
+                  filters={"status": "no_show"})),
+        ("dentist slot check", "appointments", "idx_appointments_dentist_time",
+         slot_sql, list(slot_params)),
+        ("dentist schedule range", "appointments", "idx_appointments_dentist_time",
+         DENTIST_SCHEDULE_SQL.format(ph="%s"), [1, "2030-01-01 00:00:00", "2030-03-01 00:00:00"]),
+        ("payment pages by date", "payments", "idx_payments_date",
+         *_keyset("payments", PAYMENT_COLUMNS, "payment_id", "payment_date", after=("2030-01-01 00:00:00", 1))),
+        ("one patient's history", "patient_history", "idx_history_patient",
+         *_keyset("patient_history", HISTORY_COLUMNS, "history_id", "history_id", filters={"patient_id": 1})),
+        ("patient natural key", "patients", "idx_patients_name",
+         "SELECT patient_id FROM patients "
+         "WHERE first_name = %s AND last_name = %s AND birth_date <=> %s AND phone <=> %s LIMIT 1",
+         ["Maria", "Santos", "1990-01-01", None]),
+    ]
+
+
+def explain_checks(conn=None) -> Tuple[bool, str, Optional[list[dict]]]:
+    """
+    EXPLAIN each query from explain_queries() and report the index MySQL picks.
+    Rows: label, table, expected, key, type, rows, ok. Run it on a database with
+    realistic row counts; on a handful of rows MySQL may prefer a full scan.
+    """
+    try:
+        conn, owned = _borrow(conn)
+    except Error as exc:
+        return False, f"DB connection failed: {exc}", None
+
+    try:
+        cur = conn.cursor(dictionary=True)
+        results = []
+        for label, table, expected, sql, params in explain_queries():
+            cur.execute(f"EXPLAIN {sql}", tuple(params))
+            plan = [row for row in cur.fetchall() if row.get("table") == table] or [{}]
+            key = plan[0].get("key")
+            results.append(
+                {
+                    "label": label,
+                    "table": table,
+                    "expected": expected,
+                    "key": key,
+                    "type": plan[0].get("type"),
+                    "rows": plan[0].get("rows"),
+                    "ok": key == expected,
+                }
+            )
+        failed = sum(1 for r in results if not r["ok"])
+        return True, f"{failed} of {len(results)} queries miss their index." if failed else "ok", results
+    except Error as exc:
+        return False, f"EXPLAIN failed: {exc}", None
+    finally:
+        if owned:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def migrate_on_startup() -> None:
+    """Apply pending migrations when CLINIC_MIGRATE_ON_START=1 and the backend uses MySQL; failures are only reported."""
+    if os.getenv("CLINIC_MIGRATE_ON_START", "").strip().lower() not in ("1", "true", "yes"):
+        return
+    from clinic_app.repository import backend_name
+
+    if backend_name() == "sqlite":
+        return
+    ok, msg, ran = migrate()
+    if not ok or ran:
+        print(f"Migrations: {msg}", file=sys.stderr)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply or inspect the migrations/ schema scripts.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    mode.add_argument("--baseline", type=int, metavar="VERSION", help="record migrations up to VERSION as applied")
+    mode.add_argument("--explain", action="store_true", help="check the indexed queries with EXPLAIN")
+    parser.add_argument("--target", type=int, metavar="VERSION", help="apply migrations up to VERSION only")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        ok, msg, rows = status()
+        for row in rows or []:
+            print(f"{row['version']:>4}  {row['name']:<32} {row['state']:<8} {row['applied_at'] or ''}")
+    elif args.baseline is not None:
+        ok, msg = baseline(args.baseline)
+    elif args.explain:
+        ok, msg, rows = explain_checks()
+        for row in rows or []:
+            flag = "ok" if row["ok"] else f"MISSING (uses {row['key'] or 'no index'}, {row['type']})"
+            print(f"{row['label']:<30} {row['expected']:<32} {flag}")
+        ok = ok and all(row["ok"] for row in rows or [])
+    else:
+        ok, msg, ran = migrate(target=args.target)
+        for name in ran:
+            print(f"applied {name}")
+    print(msg)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
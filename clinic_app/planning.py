@@ -0,0 +1,133 @@
+"""
+Batch treatment planning for upcoming appointments.
+
+    python -m clinic_app.planning [--interval SECONDS] [--batch N]
+
+Streams scheduled, upcoming appointments that have no appointment_treatments
+rows yet and are newer than the 'treatment_plans' watermark, with each
+patient's birth date. Ages at the visit are computed for the whole batch, the
+treatment recommender runs over it, and the suggested catalog treatments (at
+their default fee) are written together with the new watermark in one
+transaction per batch. Later runs therefore only look at new appointments.
+Schedule it with cron / Task Scheduler, or keep it running with --interval.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import time
+from typing import Optional, Sequence, Tuple
+
+from clinic_app.logic.schedule import STORE_FORMAT, parse_when
+from clinic_app.logic.treatment import RuleTable, default_rules
+from clinic_app.reference_cache import get_treatments
+from clinic_app.repository import store
+
+PLAN_SOURCE = "treatment_plans"
+BATCH_SIZE = 1000
+# appointment_treatments.notes of a suggested row: this prefix plus the plan text.
+SUGGESTED_PREFIX = "Suggested: "
+
+
+def _as_date(value) -> Optional[datetime.date]:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value)[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def ages_on(births: Sequence, days: Sequence) -> list[Optional[int]]:
+    """Whole years from each birth date to the matching day; None where either is missing or invalid."""
+    ages: list[Optional[int]] = []
+    for birth, day in zip(map(_as_date, births), days):
+        if birth is None or day is None or birth > day:
+            ages.append(None)
+        else:
+            ages.append(day.year - birth.year - ((day.month, day.day) < (birth.month, birth.day)))
+    return ages
+
+
+def plan_batch(rows: list[dict], rules: RuleTable) -> list[tuple]:
+    """
+    appointment_treatments rows (appointment_id, treatment_id, fee, notes)
+    suggested for candidate rows from store.fetch_plan_candidates. Appointments
+    whose patient has no usable birth date get no suggestions.
+    """
+    visits = [parse_when(r["scheduled_at"]) for r in rows]
+    ages = ages_on([r["birth_date"] for r in rows], [v.date() if v else None for v in visits])
+    known = [i for i, age in enumerate(ages) if age is not None]
+    plans = rules.recommend_many([ages[i] for i in known], [rows[i]["reason"] or "" for i in known])
+    suggested = []
+    for i, plan in zip(known, plans):
+        notes = f"{SUGGESTED_PREFIX}{plan['recommended_treatment']}"
+        for treatment in rules.treatments_for(plan["age_group"], plan["reason"]):
+            suggested.append((rows[i]["appointment_id"], treatment["treatment_id"], treatment.get("default_fee"), notes))
+    return suggested
+
+
+def plan_once(
+    batch_size: int = BATCH_SIZE, today: datetime.date | None = None
+) -> Tuple[bool, str, dict[str, int]]:
+    """
+    Plan every new candidate appointment. Returns (ok, message, counts) with the
+    appointments scanned and treatment rows written, including batches saved
+    before a failure.
+    """
+    counts = {"appointments": 0, "treatments": 0}
+    ok, msg, catalog = get_treatments()
+    if not ok:
+        return False, msg, counts
+    rules = default_rules.with_catalog(catalog or [])
+    ok, msg, last_id = store.fetch_watermark(PLAN_SOURCE)
+    if not ok:
+        return False, msg, counts
+    since = datetime.datetime.combine(today or datetime.date.today(), datetime.time()).strftime(STORE_FORMAT)
+
+    while True:
+        ok, msg, rows = store.fetch_plan_candidates(last_id, since, batch_size)
+        if not ok:
+            return False, msg, counts
+        if not rows:
+            break
+        high = rows[-1]["appointment_id"]
+        ok, msg, written = store.insert_suggested_treatments(plan_batch(rows, rules), PLAN_SOURCE, last_id, high)
+        if not ok:
+            return False, msg, counts
+        counts["appointments"] += len(rows)
+        counts["treatments"] += written
+        last_id = high
+        if len(rows) < batch_size:
+            break
+    return True, "Treatment plans updated.", counts
+
+
+def run_once(batch_size: int = BATCH_SIZE) -> bool:
+    ok, msg, counts = plan_once(batch_size)
+    print(f"{msg} {counts['treatments']} treatments suggested for {counts['appointments']} appointments.")
+    return ok
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Attach suggested treatments to new scheduled appointments.")
+    parser.add_argument(
+        "--interval", type=float, default=0, help="keep running, planning every INTERVAL seconds"
+    )
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="appointments per transaction")
+    args = parser.parse_args(argv)
+
+    if args.interval <= 0:
+        return 0 if run_once(args.batch) else 1
+    try:
+        while True:
+            run_once(args.batch)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+from clinic_app.db_common import add_write_listener, fetch_all_pages
+from clinic_app.repository import store
+
+
+class TTLCache:
+    """
+    Small thread-safe cache for loader results shaped like the store returns
+    (ok, msg, data). Only successful loads are cached; each entry expires after
+    its TTL or when invalidated explicitly. A load that overlaps an invalidation
+    is returned but not cached, since it may have read the data before the write.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[float, Any]] = {}
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(
+        self, key: str, loader: Callable[[], Tuple[bool, str, Any]], ttl: float
+    ) -> Tuple[bool, str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._stats["hits"] += 1
+                return True, "ok", entry[1]
+            self._stats["misses"] += 1
+            generation = self._generation
+        ok, msg, data = loader()
+        if ok:
+            with self._lock:
+                if self._generation == generation:
+                    self._entries[key] = (time.monotonic() + ttl, data)
+        return ok, msg, data
+
+    def invalidate(self, *keys: str) -> None:
+        with self._lock:
+            # Bumped even for keys not cached yet: a load of them may be in flight.
+            self._generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["entries"] = len(self._entries)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
+
+
+# Reference data changes rarely; patient names change whenever someone is registered.
+DENTISTS_TTL = 600.0
+TREATMENTS_TTL = 600.0
+PATIENT_NAMES_TTL = 120.0
+
+# Which cache keys a write to each table makes stale.
+DEPENDENCIES = {
+    "dentists": ("dentists",),
+    "treatments": ("treatments",),
+    "patients": ("patient_names",),
+}
+
+cache = TTLCache()
+
+
+def _on_write(table: str) -> None:
+    keys = DEPENDENCIES.get(table)
+    if keys:
+        cache.invalidate(*keys)
+
+
+add_write_listener(_on_write)
+
+
+def get_dentists() -> Tuple[bool, str, Optional[list[dict]]]:
+    """Dentist rows, cached for DENTISTS_TTL seconds."""
+    return cache.get("dentists", store.fetch_dentists, DENTISTS_TTL)
+
+
+def get_treatments() -> Tuple[bool, str, Optional[list[dict]]]:
+    """Treatment catalog rows, cached for TREATMENTS_TTL seconds."""
+    return cache.get("treatments", store.fetch_treatments, TREATMENTS_TTL)
+
+
+def _load_patient_names() -> Tuple[bool, str, Optional[dict[int, str]]]:
+    ok, msg, rows = fetch_all_pages(store.fetch_patients_page, columns=["first_name", "last_name"])
+    if not ok:
+        return False, msg, None
+    names: dict[int, str] = {}
+    for r in rows or []:
+        full_name = f"{(r.get('first_name') or '').strip()} {(r.get('last_name') or '').strip()}".strip()
+        if full_name:
+            names[r["patient_id"]] = full_name
+    return True, "ok", names
+
+
+def get_patient_name_map() -> Tuple[bool, str, Optional[dict[int, str]]]:
+    """patient_id -> "First Last", cached and dropped whenever a patient is inserted."""
+    return cache.get("patient_names", _load_patient_names, PATIENT_NAMES_TTL)
+
+
+def invalidate(*keys: str) -> None:
+    """Drop cached entries by key (dentists, treatments, patient_names); no keys clears all."""
+    if keys:
+        cache.invalidate(*keys)
+    else:
+        cache.clear()
+
+
+def cache_stats() -> dict:
+    return cache.stats()
@@ -0,0 +1,822 @@
+"""
+Offline-first replica backend (CLINIC_DB_BACKEND=replica).
+
+Screens read the working set (patients, dentists, treatments and upcoming
+appointments) from a local SQLite file, so they answer instantly even while
+MySQL is slow or unreachable. Inserts are written to that file and to a durable
+outbox in one local transaction; a background syncer flushes the outbox to
+MySQL in batches and pulls new server rows by primary-key watermark.
+
+Rows created locally carry a temporary negative id (-op_id of their outbox
+entry). Once the entry is applied the server id replaces it in the replica, and
+later entries that reference it are rewritten before they are sent.
+
+Conflict rules:
+- Each entry is looked up on the server by natural key first. Replaying an entry
+  that was applied but not yet marked done (crash between the two commits)
+  therefore adopts the existing row, and a patient already registered at another
+  desk (same name, birth date and phone) is merged into the server's record.
+- An appointment whose dentist and time slot were booked on the server for a
+  different patient is a conflict: the server wins, the local row is dropped and
+  the entry, plus every entry that depends on it, is parked as 'conflict'.
+- Entries the server rejects (constraint or data errors) are retried up to
+  MAX_ATTEMPTS times, then parked as 'failed' so they stop blocking the queue.
+
+Payments, patient history, the daily KPI summaries and logins are not
+replicated: those reads go to MySQL, and payment/history inserts only pass
+through the outbox. Status changes made on the server to already-pulled rows are
+not picked up (the tables have no updated_at column and the app never updates
+rows).
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Optional, Tuple
+
+from mysql.connector import Error as MySQLError
+from mysql.connector.errors import DataError, IntegrityError
+
+from clinic_app import db as sqlite_db
+from clinic_app import db_mysql, db_sqlite
+from clinic_app.db_common import (
+    add_write_listener,  # noqa: F401 - same module surface as db_mysql
+    booked_message,
+    fetch_all_pages,  # noqa: F401 - same module surface as db_mysql
+    notify_write as _notify_write,
+)
+from clinic_app.instrumentation import traced
+
+Error = sqlite3.Error
+
+REPLICA_PATH = Path(os.getenv("CLINIC_REPLICA_PATH") or sqlite_db.DB_PATH.with_name("replica.db"))
+SYNC_INTERVAL = float(os.getenv("CLINIC_SYNC_INTERVAL", "5"))
+MAX_BACKOFF = 60.0
+FLUSH_BATCH = 100
+PULL_PAGE = 1000
+MAX_ATTEMPTS = 5
+# Dentists and treatments are re-read whole, so only every few minutes.
+REFERENCE_REFRESH = 300.0
+# Applied entries are kept this long so late dependents can still resolve their ids.
+KEEP_DONE_DAYS = 7
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    op_id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'done', 'conflict', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    remote_id INTEGER,
+    created_at TIMESTAMP NOT NULL DEFAULT (datetime('now', 'localtime')),
+    synced_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, op_id);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Replica table each entry kind creates a local row in, with its primary key.
+_LOCAL_ROWS = {
+    "patients": ("patients", "patient_id"),
+    "appointments": ("appointments", "appointment_id"),
+    "checkout": ("appointments", "appointment_id"),
+}
+
+
+def _init_replica(path: Path) -> None:
+    conn = sqlite_db.get_connection(path)
+    try:
+        sqlite_db.init_schema(conn, seed=False)
+        conn.executescript(OUTBOX_SCHEMA)
+        conn.commit()
+    finally:
+        conn.close()
+    db_sqlite.configure(path, seed=False)
+
+
+def _local():
+    """This thread's replica connection (shared with db_sqlite; do not close it)."""
+    return db_sqlite.get_connection()
+
+
+def _now() -> str:
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# -- working-set reads --------------------------------------------------------
+fetch_patients = db_sqlite.fetch_patients
+fetch_treatments = db_sqlite.fetch_treatments
+fetch_dentists = db_sqlite.fetch_dentists
+fetch_appointments = db_sqlite.fetch_appointments
+fetch_patients_page = db_sqlite.fetch_patients_page
+fetch_appointments_page = db_sqlite.fetch_appointments_page
+fetch_appointment_view_page = db_sqlite.fetch_appointment_view_page
+search_appointments = db_sqlite.search_appointments
+fetch_dentist_schedule = db_sqlite.fetch_dentist_schedule
+
+# -- not replicated: straight to the server -----------------------------------
+fetch_user_account = db_mysql.fetch_user_account
+update_password_hash = db_mysql.update_password_hash
+fetch_payments = db_mysql.fetch_payments
+fetch_patient_history = db_mysql.fetch_patient_history
+fetch_payments_page = db_mysql.fetch_payments_page
+fetch_patient_history_page = db_mysql.fetch_patient_history_page
+fetch_payment_view_page = db_mysql.fetch_payment_view_page
+fetch_history_view_page = db_mysql.fetch_history_view_page
+search_patient_history = db_mysql.search_patient_history
+# The replica only holds upcoming appointments, so KPIs come from the server's summaries.
+fetch_revenue_summary = db_mysql.fetch_revenue_summary
+fetch_appointment_summary = db_mysql.fetch_appointment_summary
+# The treatment planner is a server-side batch job.
+fetch_watermark = db_mysql.fetch_watermark
+fetch_plan_candidates = db_mysql.fetch_plan_candidates
+insert_suggested_treatments = db_mysql.insert_suggested_treatments
+
+
+# -- local writes -------------------------------------------------------------
+def _insert_local(conn, table: str, row: dict) -> None:
+    cols = ", ".join(row)
+    conn.execute(f"INSERT INTO {table} ({cols}) VALUES ({', '.join('?' * len(row))})", tuple(row.values()))
+
+
+def _enqueue(conn, kind: str, payload: dict) -> int:
+    cur = conn.cursor()
+    cur.execute("INSERT INTO outbox (kind, payload) VALUES (?, ?)", (kind, json.dumps(payload, default=str)))
+    return cur.lastrowid
+
+
+def _queue_writes(kind: str, payloads: list[dict]) -> Tuple[bool, str, list[int]]:
+    """
+    Enqueue one outbox entry per payload (and its local row, for replicated kinds)
+    in a single local transaction. Returns (ok, error message, temporary ids).
+    """
+    try:
+        conn = _local()
+    except Error as exc:
+        return False, f"Local replica unavailable: {exc}", []
+    ids: list[int] = []
+    try:
+        for payload in payloads:
+            op_id = _enqueue(conn, kind, payload)
+            if kind in _LOCAL_ROWS:
+                table, pk = _LOCAL_ROWS[kind]
+                row = payload["appointment"] if kind == "checkout" else payload
+                _insert_local(conn, table, {pk: -op_id, **row})
+            ids.append(-op_id)
+        conn.commit()
+    except Error as exc:
+        conn.rollback()
+        return False, f"Insert failed: {exc}", []
+    if kind in _LOCAL_ROWS:
+        _notify_write(_LOCAL_ROWS[kind][0])
+    syncer.wake()
+    return True, "", ids
+
+
+@traced
+def insert_patient(
+    first_name: str,
+    last_name: str,
+    birth_date: str,
+    age_group: str,
+    gender: str,
+    phone: str,
+    email: str,
+    address: str | None = None,
+) -> Tuple[bool, str]:
+    """Add a patient to the replica and queue it for the server."""
+    ok, msg, _ = _queue_writes("patients", [{
+        "first_name": first_name, "last_name": last_name, "birth_date": birth_date,
+        "age_group": age_group, "gender": gender, "phone": phone, "email": email,
+        "address": address, "created_at": _now(),
+    }])
+    return (True, "Patient added.") if ok else (False, msg)
+
+
+@traced
+def insert_patients_bulk(rows: list[tuple]) -> Tuple[bool, str, int]:
+    """
+    Add many patients, each (first_name, last_name, birth_date, age_group, gender,
+    phone, email, address), in one local transaction. Returns (ok, message, count).
+    """
+    if not rows:
+        return True, "Nothing to insert.", 0
+    now = _now()
+    keys = ("first_name", "last_name", "birth_date", "age_group", "gender", "phone", "email", "address")
+    ok, msg, ids = _queue_writes("patients", [{**dict(zip(keys, row)), "created_at": now} for row in rows])
+    if not ok:
+        return False, msg, 0
+    return True, f"{len(ids)} patients added.", len(ids)
+
+
+@traced
+def insert_patients_each(rows: list[tuple]) -> Tuple[bool, str, list[Optional[str]]]:
+    """Queue each patient as its own local write; see db_mysql.insert_patients_each."""
+    refused: list[Optional[str]] = []
+    for row in rows:
+        ok, msg, _count = insert_patients_bulk([row])
+        if not ok:
+            return False, msg, refused
+        refused.append(None)
+    return True, f"{len(refused)} patients added.", refused
+
+
+@traced
+def insert_appointment(
+    patient_id: int,
+    dentist_id: int,
+    scheduled_at: str,
+    status: str,
+    reason: str,
+    notes: str | None = None,
+    created_at: str | None = None,
+) -> Tuple[bool, str, Optional[int]]:
+    """Add an appointment to the replica; the returned id is temporary (negative) until synced."""
+    ok, msg, ids = _queue_writes("appointments", [{
+        "patient_id": patient_id, "dentist_id": dentist_id, "scheduled_at": scheduled_at,
+        "status": status, "reason": reason, "notes": notes, "created_at": created_at or _now(),
+    }])
+    return (True, "Appointment recorded.", ids[0]) if ok else (False, msg, None)
+
+
+@traced
+def insert_payment(
+    appointment_id: int,
+    patient_id: int,
+    amount: float,
+    method: str,
+    status: str,
+    reference_no: str | None = None,
+    remarks: str | None = None,
+    payment_date: str | None = None,
+) -> Tuple[bool, str]:
+    """Queue a payment for the server."""
+    ok, msg, _ = _queue_writes("payments", [{
+        "appointment_id": appointment_id, "patient_id": patient_id, "amount": amount,
+        "payment_date": payment_date or _now(), "method": method, "status": status,
+        "reference_no": reference_no, "remarks": remarks,
+    }])
+    return (True, "Payment recorded.") if ok else (False, msg)
+
+
+@traced
+def checkout(
+    patient_id: int,
+    dentist_id: int,
+    scheduled_at: str,
+    reason: str,
+    items: list[dict],
+    amount: float,
+    method: str,
+    payment_status: str,
+    reference_no: str | None = None,
+    remarks: str | None = None,
+    notes: str | None = None,
+    created_at: str | None = None,
+    appointment_status: str = "scheduled",
+) -> Tuple[bool, str, Optional[int]]:
+    """
+    Queue an appointment, its line items and payment as one outbox entry, applied
+    on the server in a single transaction. Returns (ok, message, temporary appointment id).
+    """
+    ok, msg, ids = _queue_writes("checkout", [{
+        "appointment": {
+            "patient_id": patient_id, "dentist_id": dentist_id, "scheduled_at": scheduled_at,
+            "status": appointment_status, "reason": reason, "notes": notes,
+            "created_at": created_at or _now(),
+        },
+        "items": [
+            {"treatment_id": item["treatment_id"], "fee": item.get("fee"), "notes": item.get("notes")}
+            for item in items
+        ],
+        "payment": {
+            "patient_id": patient_id, "amount": amount, "payment_date": _now(), "method": method,
+            "status": payment_status, "reference_no": reference_no, "remarks": remarks,
+        },
+    }])
+    return (True, "Payment recorded.", ids[0]) if ok else (False, msg, None)
+
+
+@traced
+def insert_patient_history(
+    patient_id: int,
+    appointment_id: int,
+    visit_date: str,
+    diagnosis: str | None = None,
+    treatment_given: str | None = None,
+    prescription: str | None = None,
+    follow_up_date: str | None = None,
+    notes: str | None = None,
+) -> Tuple[bool, str]:
+    """Queue a patient_history row for the server."""
+    ok, msg, _ = _queue_writes("patient_history", [{
+        "patient_id": patient_id, "appointment_id": appointment_id, "visit_date": visit_date,
+        "diagnosis": diagnosis, "treatment_given": treatment_given, "prescription": prescription,
+        "follow_up_date": follow_up_date, "notes": notes,
+    }])
+    return (True, "History saved.") if ok else (False, msg)
+
+
+# -- flushing the outbox ------------------------------------------------------
+class _Parked(Exception):
+    """Entry cannot be applied as-is; status is 'conflict' or 'failed'."""
+
+    def __init__(self, status: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _insert_remote(cur, table: str, row: dict) -> int:
+    cols = ", ".join(row)
+    cur.execute(f"INSERT INTO {table} ({cols}) VALUES ({', '.join(['%s'] * len(row))})", tuple(row.values()))
+    return cur.lastrowid
+
+
+def _existing_id(cur, sql: str, params: tuple) -> Optional[int]:
+    cur.execute(sql, params)
+    found = cur.fetchone()
+    return found[0] if found else None
+
+
+def _apply_patient(cur, row: dict) -> int:
+    found = _existing_id(
+        cur,
+        """
+        SELECT patient_id FROM patients
+        WHERE first_name = %s AND last_name = %s AND birth_date <=> %s AND phone <=> %s
+        LIMIT 1
+        """,
+        (row["first_name"], row["last_name"], row["birth_date"], row["phone"]),
+    )
+    return found if found is not None else _insert_remote(cur, "patients", row)
+
+
+def _claim_slot(cur, appt: dict) -> Optional[int]:
+    """
+    Lock the dentist's bookings overlapping appt's slot, as db_mysql's inserts do.
+    The patient's own overlapping booking is this same appointment (already on
+    the server): return its id. Raises _Parked if another patient's overlaps it.
+    """
+    overlapping = db_mysql._lock_slot(cur, appt["dentist_id"], appt["scheduled_at"], appt["status"])
+    for appointment_id, patient_id, _scheduled_at, _status in overlapping:
+        if patient_id == appt["patient_id"]:
+            return appointment_id
+    if overlapping:
+        raise _Parked("conflict", booked_message(overlapping[0][2]))
+    return None
+
+
+def _apply_appointment(cur, row: dict) -> int:
+    found = _claim_slot(cur, row)
+    return found if found is not None else _insert_remote(cur, "appointments", row)
+
+
+def _existing_payment(cur, row: dict) -> Optional[int]:
+    return _existing_id(
+        cur,
+        """
+        SELECT payment_id FROM payments
+        WHERE appointment_id = %s AND patient_id = %s AND amount = %s AND method = %s AND payment_date = %s
+        LIMIT 1
+        """,
+        (row["appointment_id"], row["patient_id"], row["amount"], row["method"], row["payment_date"]),
+    )
+
+
+def _apply_payment(cur, row: dict) -> int:
+    found = _existing_payment(cur, row)
+    return found if found is not None else _insert_remote(cur, "payments", row)
+
+
+def _apply_history(cur, row: dict) -> int:
+    found = _existing_id(
+        cur,
+        """
+        SELECT history_id FROM patient_history
+        WHERE patient_id = %s AND appointment_id <=> %s AND visit_date <=> %s
+        LIMIT 1
+        """,
+        (row["patient_id"], row["appointment_id"], row["visit_date"]),
+    )
+    return found if found is not None else _insert_remote(cur, "patient_history", row)
+
+
+def _apply_checkout(cur, payload: dict) -> int:
+    appt_id = _claim_slot(cur, payload["appointment"])
+    if appt_id is not None:
+        # An earlier flush applied the whole checkout in one server transaction only
+        # if this payment is there; otherwise the booking was made separately (or
+        # by an appointment entry) and still needs its items and payment.
+        if _existing_payment(cur, {"appointment_id": appt_id, **payload["payment"]}) is not None:
+            return appt_id
+    else:
+        appt_id = _insert_remote(cur, "appointments", payload["appointment"])
+    for item in payload["items"]:
+        _insert_remote(cur, "appointment_treatments", {"appointment_id": appt_id, **item})
+    _insert_remote(cur, "payments", {"appointment_id": appt_id, **payload["payment"]})
+    return appt_id
+
+
+_APPLY = {
+    "patients": _apply_patient,
+    "appointments": _apply_appointment,
+    "payments": _apply_payment,
+    "patient_history": _apply_history,
+    "checkout": _apply_checkout,
+}
+
+
+def _resolve_refs(payload: dict, remote_id_for) -> None:
+    """Swap temporary (negative) patient/appointment ids for server ids, in place."""
+    for key, value in payload.items():
+        if isinstance(value, dict):
+            _resolve_refs(value, remote_id_for)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    _resolve_refs(item, remote_id_for)
+        elif key in ("patient_id", "appointment_id") and isinstance(value, int) and value < 0:
+            payload[key] = remote_id_for(-value)
+
+
+def _remote_id(conn, outcomes: dict[int, tuple], op_id: int) -> int:
+    """Server id for the row created by entry op_id (settled earlier, or earlier in this batch)."""
+    status, remote_id, _ = outcomes.get(op_id) or (None, None, None)
+    if status is None:
+        row = conn.execute("SELECT status, remote_id FROM outbox WHERE op_id = ?", (op_id,)).fetchone()
+        if row is None:
+            raise _Parked("failed", f"Depends on unknown outbox entry #{op_id}.")
+        status, remote_id = row["status"], row["remote_id"]
+    if status != "done":
+        raise _Parked("conflict" if status == "conflict" else "failed", f"Depends on {status} outbox entry #{op_id}.")
+    return remote_id
+
+
+def _adopt_id(conn, table: str, pk: str, temp_id: int, remote_id: int) -> None:
+    """Give a locally created row its server id (or drop it if the server row is already here)."""
+    if conn.execute(f"SELECT 1 FROM {table} WHERE {pk} = ?", (remote_id,)).fetchone():
+        conn.execute(f"DELETE FROM {table} WHERE {pk} = ?", (temp_id,))
+    else:
+        conn.execute(f"UPDATE {table} SET {pk} = ? WHERE {pk} = ?", (remote_id, temp_id))
+    if table == "patients":
+        conn.execute("UPDATE appointments SET patient_id = ? WHERE patient_id = ?", (remote_id, temp_id))
+
+
+def _drop_local(conn, table: str, pk: str, temp_id: int) -> None:
+    if table == "patients":
+        conn.execute("DELETE FROM appointments WHERE patient_id = ?", (temp_id,))
+    conn.execute(f"DELETE FROM {table} WHERE {pk} = ?", (temp_id,))
+
+
+def _record_outcomes(conn, kinds: dict[int, str], outcomes: dict, retry: Optional[tuple[int, str]]) -> set[str]:
+    """Mark applied/parked entries and fix up the local rows; returns the replica tables touched."""
+    touched: set[str] = set()
+    # Temporary and server ids swap in several statements; check references at commit.
+    conn.execute("PRAGMA defer_foreign_keys = ON")
+    for op_id, (status, remote_id, note) in outcomes.items():
+        conn.execute(
+            "UPDATE outbox SET status = ?, remote_id = ?, last_error = ?, attempts = attempts + 1,"
+            " synced_at = datetime('now', 'localtime') WHERE op_id = ?",
+            (status, remote_id, note, op_id),
+        )
+        local = _LOCAL_ROWS.get(kinds[op_id])
+        if local is None:
+            continue
+        table, pk = local
+        if status == "done":
+            _adopt_id(conn, table, pk, -op_id, remote_id)
+        else:
+            _drop_local(conn, table, pk, -op_id)
+        touched.add(table)
+    if retry is not None:
+        conn.execute(
+            "UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE op_id = ?", (retry[1], retry[0])
+        )
+    conn.commit()
+    return touched
+
+
+@traced
+def flush(batch_size: int = FLUSH_BATCH) -> Tuple[bool, str, int]:
+    """
+    Apply up to batch_size pending outbox entries, oldest first, in one MySQL
+    transaction. A rejected entry stops the batch (order matters: later entries
+    may depend on it) and is retried next time. Returns (ok, message, entries settled).
+    """
+    try:
+        conn = _local()
+        entries = conn.execute(
+            "SELECT op_id, kind, payload, attempts FROM outbox WHERE status = 'pending' ORDER BY op_id LIMIT ?",
+            (batch_size,),
+        ).fetchall()
+    except Error as exc:
+        return False, f"Local replica unavailable: {exc}", 0
+    if not entries:
+        return True, "Outbox empty.", 0
+    try:
+        remote = db_mysql.get_connection()
+    except MySQLError as exc:
+        return False, f"DB connection failed: {exc}", 0
+
+    outcomes: dict[int, tuple[str, Optional[int], Optional[str]]] = {}
+    retry: Optional[tuple[int, str]] = None
+    try:
+        remote.start_transaction()
+        cur = remote.cursor(buffered=True)
+        for entry in entries:
+            op_id = entry["op_id"]
+            payload = json.loads(entry["payload"])
+            cur.execute("SAVEPOINT outbox_entry")
+            try:
+                _resolve_refs(payload, partial(_remote_id, conn, outcomes))
+                outcomes[op_id] = ("done", _APPLY[entry["kind"]](cur, payload), None)
+            except _Parked as exc:
+                cur.execute("ROLLBACK TO SAVEPOINT outbox_entry")
+                outcomes[op_id] = (exc.status, None, str(exc))
+            except (IntegrityError, DataError) as exc:
+                cur.execute("ROLLBACK TO SAVEPOINT outbox_entry")
+                if entry["attempts"] + 1 < MAX_ATTEMPTS:
+                    retry = (op_id, str(exc))
+                    break
+                outcomes[op_id] = ("failed", None, str(exc))
+        remote.commit()
+    except MySQLError as exc:
+        try:
+            remote.rollback()
+        except MySQLError:
+            pass
+        return False, f"Sync failed: {exc}", 0
+    finally:
+        try:
+            remote.close()
+        except Exception:
+            pass
+
+    kinds = {entry["op_id"]: entry["kind"] for entry in entries}
+    try:
+        touched = _record_outcomes(conn, kinds, outcomes, retry)
+    except Error as exc:
+        conn.rollback()
+        # The server has the rows; the natural-key lookups adopt them on the next flush.
+        return False, f"Local replica update failed: {exc}", 0
+    for table in touched:
+        _notify_write(table)
+    if retry is not None:
+        return False, f"Outbox entry #{retry[0]} rejected: {retry[1]}", len(outcomes)
+    return True, f"{len(outcomes)} outbox entries synced.", len(outcomes)
+
+
+# -- pulling server rows ------------------------------------------------------
+_table_columns: dict[str, list[str]] = {}
+_reference_pulled_at = 0.0
+
+
+def _columns(conn, table: str) -> list[str]:
+    if table not in _table_columns:
+        _table_columns[table] = [r["name"] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    return _table_columns[table]
+
+
+def _upsert(conn, table: str, pk: str, rows: list[dict]) -> None:
+    if not rows:
+        return
+    cols = [c for c in _columns(conn, table) if c in rows[0]]
+    updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c != pk)
+    conn.executemany(
+        f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+        f" ON CONFLICT ({pk}) DO UPDATE SET {updates}",
+        [tuple(r[c] for c in cols) for r in rows],
+    )
+
+
+def _watermark(conn, table: str) -> int:
+    row = conn.execute("SELECT value FROM sync_state WHERE name = ?", (table,)).fetchone()
+    return row["value"] if row else 0
+
+
+def _pull_new_rows(conn, table: str, pk: str, fetch_page, page_size: int, keep=None) -> Tuple[bool, str, int]:
+    """Page through server rows with pk above the stored watermark, upserting those keep() accepts."""
+    mark = _watermark(conn, table)
+    pulled = 0
+    while True:
+        ok, msg, rows, cursor = fetch_page(page_size=page_size, after=(mark, mark))
+        if not ok:
+            return False, msg, pulled
+        if not rows:
+            return True, "ok", pulled
+        kept = [r for r in rows if keep is None or keep(r)]
+        try:
+            _upsert(conn, table, pk, kept)
+            conn.execute(
+                "INSERT INTO sync_state (name, value) VALUES (?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                (table, rows[-1][pk]),
+            )
+            conn.commit()
+        except Error as exc:
+            # Typically a row referencing a parent created after that parent's pull; retried next cycle.
+            conn.rollback()
+            return False, f"Pulling {table} stopped: {exc}", pulled
+        pulled += len(kept)
+        if cursor is None:
+            return True, "ok", pulled
+        mark = rows[-1][pk]
+
+
+@traced
+def pull(page_size: int = PULL_PAGE) -> Tuple[bool, str, int]:
+    """
+    Copy new server rows into the replica: dentists and treatments in full every
+    REFERENCE_REFRESH seconds, then patients and upcoming appointments above their
+    id watermarks. Past appointments and old applied outbox entries are pruned.
+    Returns (ok, message, rows pulled).
+    """
+    global _reference_pulled_at
+    try:
+        conn = _local()
+    except Error as exc:
+        return False, f"Local replica unavailable: {exc}", 0
+    pulled = 0
+    if time.monotonic() - _reference_pulled_at > REFERENCE_REFRESH:
+        for table, pk, fetch in (
+            ("dentists", "dentist_id", db_mysql.fetch_dentists),
+            ("treatments", "treatment_id", db_mysql.fetch_treatments),
+        ):
+            ok, msg, rows = fetch()
+            if not ok:
+                return False, msg, pulled
+            try:
+                _upsert(conn, table, pk, rows or [])
+                conn.commit()
+            except Error as exc:
+                conn.rollback()
+                return False, f"Pulling {table} stopped: {exc}", pulled
+            pulled += len(rows or [])
+        _reference_pulled_at = time.monotonic()
+
+    ok, msg, count = _pull_new_rows(conn, "patients", "patient_id", db_mysql.fetch_patients_page, page_size)
+    pulled += count
+    if not ok:
+        return False, msg, pulled
+
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    ok, msg, count = _pull_new_rows(
+        conn, "appointments", "appointment_id",
+        partial(db_mysql.fetch_appointments_page, order_by="appointment_id"), page_size,
+        keep=lambda r: r["scheduled_at"] is not None and r["scheduled_at"] >= today,
+    )
+    pulled += count
+    if not ok:
+        return False, msg, pulled
+
+    try:
+        conn.execute("DELETE FROM appointments WHERE appointment_id > 0 AND scheduled_at < ?", (today,))
+        conn.execute(
+            "DELETE FROM outbox WHERE status = 'done' AND synced_at < datetime('now', 'localtime', ?)",
+            (f"-{KEEP_DONE_DAYS} days",),
+        )
+        conn.commit()
+    except Error as exc:
+        conn.rollback()
+        return False, f"Pruning the replica failed: {exc}", pulled
+    if pulled:
+        for table in ("dentists", "treatments", "patients", "appointments"):
+            _notify_write(table)
+    return True, f"{pulled} rows pulled.", pulled
+
+
+# -- outbox review ------------------------------------------------------------
+def outbox_counts() -> dict:
+    """Number of outbox entries per status (pending, conflict, failed)."""
+    counts = {"pending": 0, "conflict": 0, "failed": 0}
+    try:
+        rows = _local().execute(
+            "SELECT status, COUNT(*) AS n FROM outbox WHERE status <> 'done' GROUP BY status"
+        ).fetchall()
+    except Error:
+        return counts
+    counts.update({r["status"]: r["n"] for r in rows})
+    return counts
+
+
+def list_outbox(status: str = "conflict") -> Tuple[bool, str, Optional[list[dict]]]:
+    """Outbox entries with the given status, oldest first, payload decoded."""
+    try:
+        rows = _local().execute(
+            "SELECT op_id, kind, payload, status, attempts, last_error, created_at, synced_at"
+            " FROM outbox WHERE status = ? ORDER BY op_id",
+            (status,),
+        ).fetchall()
+    except Error as exc:
+        return False, f"Local replica unavailable: {exc}", None
+    for row in rows:
+        row["payload"] = json.loads(row["payload"])
+    return True, "ok", rows
+
+
+def requeue(op_id: int) -> Tuple[bool, str]:
+    """Send a parked entry again on the next flush (e.g. after freeing the slot it conflicted with)."""
+    try:
+        conn = _local()
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE outbox SET status = 'pending', attempts = 0 WHERE op_id = ? AND status IN ('conflict', 'failed')",
+            (op_id,),
+        )
+        conn.commit()
+    except Error as exc:
+        return False, f"Requeue failed: {exc}"
+    if not cur.rowcount:
+        return False, f"Outbox entry #{op_id} is not parked."
+    syncer.wake()
+    return True, "Entry requeued."
+
+
+def pool_stats() -> dict:
+    """db_mysql pool counters plus outbox_pending/outbox_conflict/outbox_failed."""
+    stats = db_mysql.pool_stats()
+    stats.update({f"outbox_{status}": n for status, n in outbox_counts().items()})
+    return stats
+
+
+# -- background syncer --------------------------------------------------------
+class ReplicaSyncer:
+    """
+    Daemon thread that flushes the outbox and then pulls, every `interval`
+    seconds or as soon as a local write wakes it. While MySQL is unreachable the
+    wait doubles up to MAX_BACKOFF.
+    """
+
+    def __init__(self, interval: float = SYNC_INTERVAL) -> None:
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._status = {"last_sync": None, "last_error": None, "failures": 0}
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def sync_once(self) -> Tuple[bool, str]:
+        """Flush until the outbox is empty (or a batch fails), then pull."""
+        while True:
+            ok, msg, settled = flush()
+            if not ok:
+                return False, msg
+            if settled < FLUSH_BATCH:
+                break
+        ok, msg, _ = pull()
+        return ok, msg
+
+    def status(self) -> dict:
+        with self._lock:
+            status = dict(self._status)
+        status.update(outbox_counts())
+        return status
+
+    def _run(self) -> None:
+        delay = self.interval
+        while not self._stop.is_set():
+            try:
+                ok, msg = self.sync_once()
+            except Exception as exc:  # keep the thread alive; report like any other failure
+                ok, msg = False, f"Sync failed: {exc}"
+            with self._lock:
+                if ok:
+                    self._status.update(last_sync=_now(), last_error=None, failures=0)
+                else:
+                    self._status.update(last_error=msg, failures=self._status["failures"] + 1)
+            delay = self.interval if ok else min(MAX_BACKOFF, delay * 2)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+
+_init_replica(REPLICA_PATH)
+syncer = ReplicaSyncer()
+if os.getenv("CLINIC_REPLICA_SYNC", "1") != "0":
+    syncer.start()
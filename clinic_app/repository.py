@@ -0,0 +1,111 @@
+"""
+Backend selection for the data layer.
+
+The UI and tools call `store.<function>` instead of importing db_mysql, so the
+same screens run against the MySQL server, the embedded SQLite file or the
+offline-first replica in front of MySQL. Choose with
+CLINIC_DB_BACKEND=mysql|sqlite|replica (default mysql).
+"""
+from __future__ import annotations
+
+import importlib
+import os
+from functools import lru_cache
+from typing import Callable, Optional, Protocol, Tuple
+
+BACKENDS = {
+    "mysql": "clinic_app.db_mysql",
+    "sqlite": "clinic_app.db_sqlite",
+    "replica": "clinic_app.replica",
+}
+
+Rows = Tuple[bool, str, Optional[list[dict]]]
+Page = Tuple[bool, str, Optional[list[dict]], Optional[tuple]]
+
+
+class ClinicStore(Protocol):
+    """Functions every backend module provides, with db_mysql's signatures and return shapes."""
+
+    def fetch_user_account(self, username: str) -> Tuple[bool, str, Optional[dict]]: ...
+    def update_password_hash(self, user_id: int, current: str, new_hash: str) -> Tuple[bool, str]: ...
+    def fetch_patients(self) -> Rows: ...
+    def fetch_treatments(self) -> Rows: ...
+    def fetch_appointments(self) -> Rows: ...
+    def fetch_dentists(self) -> Rows: ...
+    def fetch_patient_history(self) -> Rows: ...
+    def fetch_payments(self) -> Rows: ...
+    def insert_patient(self, first_name: str, last_name: str, birth_date: str, age_group: str,
+                       gender: str, phone: str, email: str, address: str | None = None) -> Tuple[bool, str]: ...
+    def insert_patients_bulk(self, rows: list[tuple]) -> Tuple[bool, str, int]: ...
+    def insert_patients_each(self, rows: list[tuple]) -> Tuple[bool, str, list[Optional[str]]]: ...
+    def insert_appointment(self, patient_id: int, dentist_id: int, scheduled_at: str, status: str, reason: str,
+                           notes: str | None = None, created_at: str | None = None
+                           ) -> Tuple[bool, str, Optional[int]]: ...
+    def insert_payment(self, appointment_id: int, patient_id: int, amount: float, method: str, status: str,
+                       reference_no: str | None = None, remarks: str | None = None,
+                       payment_date: str | None = None) -> Tuple[bool, str]: ...
+    def checkout(self, patient_id: int, dentist_id: int, scheduled_at: str, reason: str, items: list[dict],
+                 amount: float, method: str, payment_status: str, reference_no: str | None = None,
+                 remarks: str | None = None, notes: str | None = None, created_at: str | None = None,
+                 appointment_status: str = "scheduled") -> Tuple[bool, str, Optional[int]]: ...
+    def insert_patient_history(self, patient_id: int, appointment_id: int, visit_date: str,
+                               diagnosis: str | None = None, treatment_given: str | None = None,
+                               prescription: str | None = None, follow_up_date: str | None = None,
+                               notes: str | None = None) -> Tuple[bool, str]: ...
+    def fetch_patients_page(self, columns: list[str] | None = None, page_size: int = 200,
+                            after: tuple | None = None, filters: dict | None = None,
+                            descending: bool = False) -> Page: ...
+    def fetch_appointments_page(self, columns: list[str] | None = None, page_size: int = 200,
+                                after: tuple | None = None, filters: dict | None = None,
+                                descending: bool = False, order_by: str = "scheduled_at") -> Page: ...
+    def fetch_payments_page(self, columns: list[str] | None = None, page_size: int = 200,
+                            after: tuple | None = None, filters: dict | None = None,
+                            descending: bool = False, order_by: str = "payment_id") -> Page: ...
+    def fetch_patient_history_page(self, columns: list[str] | None = None, page_size: int = 200,
+                                   after: tuple | None = None, filters: dict | None = None,
+                                   descending: bool = False) -> Page: ...
+    def fetch_appointment_view_page(self, columns: list[str] | None = None, page_size: int = 200,
+                                    after: tuple | None = None, filters: dict | None = None,
+                                    descending: bool = False, order_by: str = "scheduled_at") -> Page: ...
+    def fetch_payment_view_page(self, columns: list[str] | None = None, page_size: int = 200,
+                                after: tuple | None = None, filters: dict | None = None,
+                                descending: bool = False) -> Page: ...
+    def fetch_history_view_page(self, columns: list[str] | None = None, page_size: int = 200,
+                                after: tuple | None = None, filters: dict | None = None,
+                                descending: bool = False) -> Page: ...
+    def fetch_all_pages(self, fetch_page: Callable[..., Page], page_size: int = 1000, **kwargs) -> Rows: ...
+    def search_patient_history(self, term: str, page_size: int = 200, offset: int = 0) -> Rows: ...
+    def search_appointments(self, term: str, page_size: int = 200, offset: int = 0) -> Rows: ...
+    def fetch_dentist_schedule(self, dentist_id: int, start, end) -> Rows: ...
+    def fetch_revenue_summary(self, start=None, end=None, group_by: tuple[str, ...] = ("day",),
+                              filters: dict | None = None) -> Rows: ...
+    def fetch_appointment_summary(self, start=None, end=None, group_by: tuple[str, ...] = ("status",),
+                                  filters: dict | None = None) -> Rows: ...
+    def fetch_watermark(self, source: str) -> Tuple[bool, str, Optional[int]]: ...
+    def fetch_plan_candidates(self, after_id: int, since, limit: int = 1000) -> Rows: ...
+    def insert_suggested_treatments(self, rows: list[tuple], source: str, from_id: int,
+                                    to_id: int) -> Tuple[bool, str, int]: ...
+    def add_write_listener(self, listener: Callable[[str], None]) -> None: ...
+    def pool_stats(self) -> dict: ...
+
+
+def backend_name() -> str:
+    """Configured backend name (CLINIC_DB_BACKEND, default mysql)."""
+    return (os.getenv("CLINIC_DB_BACKEND") or "mysql").strip().lower()
+
+
+@lru_cache(maxsize=None)
+def get_store(name: str | None = None) -> ClinicStore:
+    """
+    Return the backend module for name (or the configured backend).
+    Raises ValueError for an unknown backend name.
+    """
+    name = name or backend_name()
+    try:
+        module = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown database backend {name!r}; choose one of {', '.join(BACKENDS)}.") from None
+    return importlib.import_module(module)
+
+
+store: ClinicStore = get_store()
@@ -0,0 +1,179 @@
+"""
+The signed-in user: account row, role and permissions, loaded once at login.
+
+SessionManager.sign_in() verifies the password (clinic_app.auth), reads the
+user_accounts row once and keeps a Session in memory for the life of the
+dashboard, so authorization is a set lookup rather than a query. refresh()
+re-reads only the row: an unchanged row (same updated_at, role and status)
+keeps the session, a changed one reloads role and permissions (or ends the
+session if the account was disabled). close() ends it on sign-out.
+
+    @requires("patients.write")
+    def save_patient(...): ...
+
+runs the function only if the current session has that permission.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Tuple
+
+from clinic_app.auth import ACTIVE_STATUSES, AuthToken, service as auth
+from clinic_app.repository import store
+
+_STAFF = frozenset(
+    {"patients.view", "patients.write", "appointments.view", "treatments.view", "payments.view", "payments.write"}
+)
+ROLE_PERMISSIONS: dict[str, frozenset[str]] = {
+    "admin": _STAFF | {"history.view", "history.write", "diagnostics.view"},
+    "dentist": _STAFF | {"history.view", "history.write"},
+    "staff": _STAFF | {"history.view"},
+    "receptionist": _STAFF,
+    "patient": frozenset(),
+}
+NOT_PERMITTED = "Your account is not allowed to do that."
+
+
+@dataclass(frozen=True)
+class Session:
+    """A signed-in user; treat as immutable (refresh() swaps in a new one)."""
+
+    token: str
+    user_id: int
+    username: str
+    role: str
+    permissions: frozenset[str]
+    updated_at: Any
+    account: dict = field(compare=False, repr=False)
+
+    @classmethod
+    def from_account(cls, token: str, row: dict) -> "Session":
+        role = (row.get("role") or "").lower()
+        return cls(
+            token=token,
+            user_id=row["user_id"],
+            username=row["username"],
+            role=role,
+            permissions=ROLE_PERMISSIONS.get(role, frozenset()),
+            updated_at=row.get("updated_at"),
+            account={k: v for k, v in row.items() if k != "password_hash"},
+        )
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.username} ({self.role or 'user'})"
+
+    def can(self, permission: str) -> bool:
+        return permission in self.permissions
+
+
+class SessionManager:
+    """Holds the current Session. Thread-safe; share one instance (see `sessions`)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._current: Optional[Session] = None
+
+    def current(self) -> Optional[Session]:
+        with self._lock:
+            return self._current
+
+    def can(self, permission: str) -> bool:
+        current = self.current()
+        return current is not None and current.can(permission)
+
+    def _open(self, token: AuthToken) -> Tuple[bool, str, Optional[Session]]:
+        ok, msg, row = store.fetch_user_account(token.username)
+        if not ok or row is None:
+            auth.logout(token.token)
+            return False, msg if not ok else "Account no longer exists.", None
+        session = Session.from_account(token.token, row)
+        with self._lock:
+            self._current = session
+        return True, "Login successful.", session
+
+    def sign_in(self, username: str, password: str) -> Tuple[bool, str, Optional[Session]]:
+        """Verify the password and load the account. Returns (ok, message, session)."""
+        ok, msg, token = auth.login(username, password)
+        if not ok:
+            return False, msg, None
+        self.close()
+        return self._open(token)
+
+    def unlock(self, password: str) -> Tuple[bool, str, Optional[Session]]:
+        """
+        Re-enter the password for the current (locked) session; see auth.unlock.
+        Ends the session if auth signed its token out (account disabled or removed).
+        """
+        current = self.current()
+        if current is None:
+            return False, "Session expired. Sign in again.", None
+        ok, msg, token = auth.unlock(current.token, password)
+        if not ok:
+            if auth.resume(current.token) is None:
+                self.close()
+            return False, msg, None
+        if token.token == current.token:
+            return True, msg, current
+        # The token had expired and auth signed in afresh.
+        return self._open(token)
+
+    def refresh(self) -> Tuple[bool, str, Optional[Session]]:
+        """
+        Compare the account row (updated_at, role, status) with the session's and
+        reload role and permissions if it changed. The session is None when there is none or
+        the account was disabled or removed; a failed read keeps the session.
+        """
+        current = self.current()
+        if current is None:
+            return True, "Signed out.", None
+        ok, msg, row = store.fetch_user_account(current.username)
+        if not ok:
+            return False, msg, current
+        # updated_at has one-second resolution, so compare the rest of the (already fetched) row too.
+        if row is not None and Session.from_account(current.token, row).account == current.account:
+            return True, "ok", current
+        if row is None or row["user_id"] != current.user_id or (
+            (row.get("status") or "").lower() not in ACTIVE_STATUSES
+        ):
+            self.close()
+            return True, "Your account was changed. Sign in again.", None
+        session = Session.from_account(current.token, row)
+        with self._lock:
+            if self._current is not current:
+                return True, "ok", self._current
+            self._current = session
+        return True, "Session reloaded.", session
+
+    def close(self) -> None:
+        """Sign out: forget the session and its auth token."""
+        with self._lock:
+            current, self._current = self._current, None
+        if current is not None:
+            auth.logout(current.token)
+
+
+sessions = SessionManager()
+
+
+def requires(permission: str, denied: Callable[..., Any] | None = None) -> Callable:
+    """
+    Decorator: call the function only if the current session has permission.
+    Otherwise return denied(*args, **kwargs), or (False, NOT_PERMITTED) without
+    one (the shape of the insert_* results). The check never queries.
+    """
+
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if sessions.can(permission):
+                return fn(*args, **kwargs)
+            if denied is not None:
+                return denied(*args, **kwargs)
+            return False, NOT_PERMITTED
+
+        return wrapper
+
+    return decorate
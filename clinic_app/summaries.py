@@ -0,0 +1,52 @@
+"""
+Scheduled refresh of the daily summary tables on MySQL.
+
+    python -m clinic_app.summaries [--interval SECONDS] [--full]
+
+Recounts daily_revenue and daily_appointment_stats from the payments and
+appointments dated from a week before the last run onward (plus any new rows
+dated earlier), using the watermarks from migrations/003_summary_watermarks.sql,
+so late commits, status changes and deletes are picked up. --full recounts every
+day. It is only needed where the server refused the 002 triggers; with the
+triggers installed a run just moves the watermarks. Schedule it with cron /
+Task Scheduler, or keep it running with --interval.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Optional
+
+from clinic_app import db_mysql
+
+
+def refresh_once(full: bool = False) -> bool:
+    ok, msg, rebuilt = db_mysql.refresh_summaries(full)
+    if not ok:
+        print(msg)
+        return False
+    print(f"{msg} Rebuilt {', '.join(f'{count} {source}' for source, count in rebuilt.items())} summary rows.")
+    return True
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recount recent payments and appointments into the daily summaries.")
+    parser.add_argument(
+        "--interval", type=float, default=0, help="keep running, refreshing every INTERVAL seconds"
+    )
+    parser.add_argument("--full", action="store_true", help="recount every day, not just the recent ones")
+    args = parser.parse_args(argv)
+
+    if args.interval <= 0:
+        return 0 if refresh_once(args.full) else 1
+    try:
+        refresh_once(args.full)
+        while True:
+            time.sleep(args.interval)
+            refresh_once()
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,36 +1,72 @@
 import customtkinter as ctk
 import tkinter as tk
+import asyncio
 import datetime
 import calendar
 import random
 import string
+import threading
 from pathlib import Path
 try:
     from PIL import Image
 except ImportError:
     Image = None
 
+from clinic_app import analytics
+from clinic_app.db_common import add_write_listener, remove_write_listener
+from clinic_app.instrumentation import metrics
+from clinic_app.reference_cache import cache_stats, get_dentists, get_patient_name_map, get_treatments
+from clinic_app.logic.schedule import STORE_FORMAT, parse_when, schedule
 from clinic_app.logic.treatment import get_basic_treatment
-from clinic_app.db_mysql import (
-    fetch_patients,
-    fetch_appointments,
-    fetch_dentists,
-    fetch_treatments,
-    insert_patient,
-    insert_appointment,
-    insert_payment,
-    insert_patient_history,
-    fetch_patient_history,
-    fetch_payments,
-)
+from clinic_app.session import Session, requires, sessions
+from clinic_app.ui.table_model import TableModel
+from clinic_app.ui.virtual_table import VirtualTable
+from clinic_app.ui.worker import BackgroundRunner
+from clinic_app.repository import store
 
 
 class DashboardFrame(ctk.CTkFrame):
     """Main dashboard showing treatment helper after login."""
 
-    def __init__(self, master: ctk.CTkBaseClass, username: str) -> None:
+    # Rows pulled per keyset page when streaming tables in.
+    PAGE_SIZE = 200
+    # Quiet period after the last keystroke before a search filter runs.
+    SEARCH_DEBOUNCE_MS = 150
+    # Screens with server-side search stop loading rows here and search in MySQL instead.
+    MAX_LOCAL_ROWS = 5000
+    # How often the diagnostics panel re-reads the query metrics.
+    DIAGNOSTICS_REFRESH_MS = 1000
+    # How often writes reported by the data layer are checked against the visible table.
+    CHANGE_POLL_MS = 500
+    # How often the signed-in account's updated_at is compared with the session's.
+    SESSION_CHECK_MS = 60_000
+    # Pie slice colors for the appointment status mix.
+    STATUS_COLORS = {
+        "scheduled": "#0ea5e9",
+        "completed": "#22c55e",
+        "cancelled": "#94a3b8",
+        "no_show": "#f97316",
+    }
+
+    def __init__(self, master: ctk.CTkBaseClass, session: Session, on_lock=None, on_logout=None) -> None:
         super().__init__(master)
-        self.username = username
+        # Loaded once at login; modules and writes authorize against it with @requires.
+        self.session = session
+        self.username = session.display_name
+        # Called by the drawer's Lock / Sign out entries (and when the account is disabled).
+        self.on_lock = on_lock
+        self.on_logout = on_logout
+        # DB calls run here so the window keeps painting while MySQL answers.
+        # Loads for the visible module use group="content" and are cancelled on switch.
+        self.tasks = BackgroundRunner(self)
+        # Tables written since the last poll (listeners fire on worker threads) and
+        # the (tables, refresh) pair of the module on screen.
+        self._changed_tables: set[str] = set()
+        self._changed_lock = threading.Lock()
+        self._watch = None
+        add_write_listener(self._on_write)
+        self._change_poll = self.after(self.CHANGE_POLL_MS, self._poll_changes)
+        self._session_check = self.after(self.SESSION_CHECK_MS, self._check_session)
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
@@ -76,7 +112,7 @@ class DashboardFrame(ctk.CTkFrame):
         toggle_btn.grid(row=0, column=0, padx=(0, 8), pady=4, sticky="w")
 
         # Drawer content
-        for i, label in enumerate(["Patient history", "Treatments", "Appointments", "Patients", "Payment history"]):
+        for i, label in enumerate(["Patient history", "Treatments", "Appointments", "Patients", "Payment history", "Diagnostics"]):
             ctk.CTkButton(
                 self.drawer,
                 text=label,
@@ -86,6 +122,26 @@ class DashboardFrame(ctk.CTkFrame):
                 anchor="w",
                 command=lambda name=label: self._show_module(name),
             ).grid(row=i, column=0, padx=12, pady=6, sticky="ew")
+        if on_lock is not None:
+            ctk.CTkButton(
+                self.drawer,
+                text="Lock",
+                fg_color="#111827",
+                hover_color="#0b1220",
+                width=160,
+                anchor="w",
+                command=on_lock,
+            ).grid(row=6, column=0, padx=12, pady=(18, 6), sticky="ew")
+        if on_logout is not None:
+            ctk.CTkButton(
+                self.drawer,
+                text="Sign out",
+                fg_color="#111827",
+                hover_color="#0b1220",
+                width=160,
+                anchor="w",
+                command=on_logout,
+            ).grid(row=7, column=0, padx=12, pady=6, sticky="ew")
 
         # Main content area (switchable per module)
         self.content = ctk.CTkFrame(body, fg_color="transparent")
@@ -133,7 +189,7 @@ class DashboardFrame(ctk.CTkFrame):
             fee_val = float(fee)
         except (TypeError, ValueError):
             fee_val = 0.0
-        self.selected_treatments.append({"name": name, "fee": fee_val})
+        self.selected_treatments.append({"name": name, "fee": fee_val, "treatment_id": row.get("treatment_id")})
         # Reset payment when items change
         self.payment_amount = 0.0
         self._update_receipt()
@@ -205,43 +261,58 @@ class DashboardFrame(ctk.CTkFrame):
                     note_text = ""
             created_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            ok_ins, msg_ins, appt_id = insert_appointment(
-                self.treatment_patient_id,
-                self.treatment_dentist_id,
-                self.treatment_schedule,
-                "scheduled",
-                reason,
-                note_text,
-                created_at,
-            )
-            if not ok_ins or not appt_id:
-                status_lbl.configure(text=msg_ins)
-                return
+            patient_id = self.treatment_patient_id
+            dentist_id = self.treatment_dentist_id
+            schedule = self.treatment_schedule
 
+            items = [
+                {"treatment_id": item["treatment_id"], "fee": item["fee"]}
+                for item in self.selected_treatments
+                if item.get("treatment_id") is not None
+            ]
             ref = "".join(random.choices(string.ascii_uppercase + string.digits, k=10))
-            ok_pay, msg_pay = insert_payment(
-                appointment_id=appt_id,
-                patient_id=self.treatment_patient_id,
-                amount=amt,
-                method="cash",
-                status="paid",
-                reference_no=ref,
-                remarks="Dr. Paolo De Leon",
-            )
+
+            @requires("payments.write")
+            def write() -> tuple[bool, str]:
+                ok, msg, _appt_id = store.checkout(
+                    patient_id=patient_id,
+                    dentist_id=dentist_id,
+                    scheduled_at=schedule,
+                    reason=reason,
+                    items=items,
+                    amount=amt,
+                    method="cash",
+                    payment_status="paid",
+                    reference_no=ref,
+                    remarks="Dr. Paolo De Leon",
+                    notes=note_text,
+                    created_at=created_at,
+                )
+                return ok, msg
+
+            confirm_btn.configure(state="disabled")
+            status_lbl.configure(text="Saving...")
+            self.tasks.submit(write, on_done=paid)
+
+        def paid(result) -> None:
+            ok_pay, msg_pay = result
+            if not top.winfo_exists():
+                return
             if not ok_pay:
+                confirm_btn.configure(state="normal")
                 status_lbl.configure(text=msg_pay)
                 return
             # Successful payment: clear receipt.
             self.payment_amount = 0.0
             self.selected_treatments = []
             self.current_total = 0.0
-            self._update_receipt()
-            self.status.configure(text="Payment saved and receipt cleared.")
+            if self.receipt_box.winfo_exists():
+                self._update_receipt()
+                self.status.configure(text="Payment saved and receipt cleared.")
             top.destroy()
 
-        ctk.CTkButton(top, text="Confirm", command=do_pay).grid(
-            row=2, column=0, columnspan=2, padx=12, pady=12, sticky="ew"
-        )
+        confirm_btn = ctk.CTkButton(top, text="Confirm", command=do_pay)
+        confirm_btn.grid(row=2, column=0, columnspan=2, padx=12, pady=12, sticky="ew")
 
     
     def _update_receipt(self) -> None:
@@ -310,19 +381,22 @@ class DashboardFrame(ctk.CTkFrame):
 
     def _prompt_treatment_patient(self) -> None:
         """Prompt for patient selection before adding treatments."""
-        ok, msg, rows = fetch_patients()
-        if not ok or not rows:
+        self.status.configure(text="Loading patients and dentists...")
+
+        async def load() -> tuple:
+            return await asyncio.gather(asyncio.to_thread(get_patient_name_map), asyncio.to_thread(get_dentists))
+
+        self.tasks.submit_async(load(), on_done=self._show_treatment_patient_modal, group="content")
+
+    def _show_treatment_patient_modal(self, loaded: tuple) -> None:
+        """Build the patient/dentist/schedule picker once its lists have loaded."""
+        (ok, msg, name_by_id), (ok_den, msg_den, dentists) = loaded
+        self.status.configure(text="")
+        if not ok or not name_by_id:
             self.status.configure(text=msg or "No patients available.")
             return
-        names = []
-        patient_map: dict[str, int] = {}
-        for r in rows:
-            full_name = f"{r.get('first_name','').strip()} {r.get('last_name','').strip()}".strip()
-            if full_name:
-                names.append(full_name)
-                if r.get("patient_id") is not None:
-                    patient_map[full_name] = r.get("patient_id")
-        ok_den, msg_den, dentists = fetch_dentists()
+        names = list(name_by_id.values())
+        patient_map: dict[str, int] = {name: pid for pid, name in name_by_id.items()}
         dentist_names = []
         dentist_map: dict[str, int] = {}
         if ok_den and dentists:
@@ -345,7 +419,7 @@ class DashboardFrame(ctk.CTkFrame):
 
         modal = ctk.CTkToplevel(self)
         modal.title("Select patient and dentist")
-        modal.geometry("420x320")
+        modal.geometry("420x380")
         modal.grab_set()
         modal.grid_columnconfigure(0, weight=1)
         modal.grid_columnconfigure(1, weight=1)
@@ -355,21 +429,21 @@ class DashboardFrame(ctk.CTkFrame):
         patient_bar.grid(row=0, column=0, columnspan=3, padx=12, pady=(12, 4), sticky="ew")
         patient_bar.grid_columnconfigure(0, weight=1)
         ctk.CTkLabel(patient_bar, text="Choose patient for treatments:").grid(row=0, column=0, sticky="w")
-        def _refresh_lists():
-            ok_new, _, new_rows = fetch_patients()
-            if ok_new and new_rows:
-                new_names = []
+        def _apply_refreshed(result) -> None:
+            ok_new, _, new_map = result
+            if not combo_patient.winfo_exists():
+                return
+            if ok_new and new_map:
+                new_names = list(new_map.values())
                 patient_map.clear()
-                for r in new_rows:
-                    nm = f"{r.get('first_name','').strip()} {r.get('last_name','').strip()}".strip()
-                    if nm:
-                        new_names.append(nm)
-                        if r.get("patient_id") is not None:
-                            patient_map[nm] = r.get("patient_id")
+                patient_map.update({name: pid for pid, name in new_map.items()})
                 if new_names:
                     combo_patient.configure(values=new_names)
                     combo_patient.set(new_names[0])
-            return
+
+        def _refresh_lists():
+            # insert_patient already invalidated the cached name map.
+            self.tasks.submit(get_patient_name_map, on_done=_apply_refreshed)
         ctk.CTkButton(
             patient_bar,
             text="+",
@@ -378,7 +452,7 @@ class DashboardFrame(ctk.CTkFrame):
             fg_color="#0ea5e9",
             hover_color="#0284c7",
             text_color="#ffffff",
-            command=lambda: (self._show_add_patient_modal(), self.after(500, _refresh_lists)),
+            command=lambda: self._show_add_patient_modal(on_saved=_refresh_lists),
         ).grid(row=0, column=1, padx=(8, 0), sticky="e")
 
         combo_patient = ctk.CTkComboBox(modal, values=names, state="readonly")
@@ -388,7 +462,9 @@ class DashboardFrame(ctk.CTkFrame):
         ctk.CTkLabel(modal, text="Choose dentist:").grid(
             row=2, column=0, columnspan=2, padx=12, pady=(12, 4), sticky="w"
         )
-        combo_dentist = ctk.CTkComboBox(modal, values=dentist_names, state="readonly")
+        combo_dentist = ctk.CTkComboBox(
+            modal, values=dentist_names, state="readonly", command=lambda _v: load_free_slots()
+        )
         combo_dentist.set(dentist_names[0])
         combo_dentist.grid(row=3, column=0, columnspan=2, padx=12, pady=4, sticky="ew")
 
@@ -406,7 +482,7 @@ class DashboardFrame(ctk.CTkFrame):
             sched_frame,
             text="📅",
             width=40,
-            command=lambda ent=sched_date: self._show_calendar_modal(ent),
+            command=lambda ent=sched_date: self._show_calendar_modal(ent, on_pick=lambda _d: load_free_slots()),
         ).grid(row=0, column=2, padx=(0, 8), pady=(0, 4), sticky="w")
         sched_time = ctk.CTkEntry(sched_frame, placeholder_text="HH:MM AM/PM")
         sched_time.grid(row=0, column=3, padx=(0, 4), pady=(0, 4), sticky="ew")
@@ -417,6 +493,45 @@ class DashboardFrame(ctk.CTkFrame):
             command=lambda ent=sched_time: self._show_time_modal(ent),
         ).grid(row=0, column=4, padx=(0, 0), pady=(0, 4), sticky="w")
 
+        # Next free slots of the chosen dentist from the chosen date (or now).
+        free_frame = ctk.CTkFrame(modal, fg_color="transparent")
+        free_frame.grid(row=5, column=0, columnspan=2, padx=12, pady=4, sticky="ew")
+        free_frame.grid_columnconfigure(1, weight=1)
+        ctk.CTkLabel(free_frame, text="Free slots:").grid(row=0, column=0, padx=(0, 8), sticky="w")
+        free_slots: dict[str, datetime.datetime] = {}
+
+        def use_free_slot(label: str) -> None:
+            when = free_slots.get(label)
+            if when is None:
+                return
+            sched_date.delete(0, "end")
+            sched_date.insert(0, f"{when:%Y-%m-%d}")
+            sched_time.delete(0, "end")
+            sched_time.insert(0, f"{when:%I:%M %p}")
+
+        combo_free = ctk.CTkComboBox(free_frame, values=[], state="readonly", command=use_free_slot)
+        combo_free.grid(row=0, column=1, sticky="ew")
+
+        def load_free_slots() -> None:
+            dentist_id = dentist_map.get(combo_dentist.get().strip())
+            if dentist_id is None:
+                return
+            now = datetime.datetime.now()
+            after = parse_when(f"{sched_date.get().strip()} 00:00")
+            after = max(after, now) if after else now
+            combo_free.set("Loading...")
+            self.tasks.submit(schedule.next_free_slots, dentist_id, after, 8, on_done=show_free_slots)
+
+        def show_free_slots(result) -> None:
+            ok_free, msg_free, slots = result
+            if not combo_free.winfo_exists():
+                return
+            free_slots.clear()
+            free_slots.update({f"{when:%a %Y-%m-%d %I:%M %p}": when for when in slots or []})
+            labels = list(free_slots)
+            combo_free.configure(values=labels)
+            combo_free.set("Pick a free slot" if labels else (msg_free if not ok_free else "No free slots"))
+
         status_lbl = ctk.CTkLabel(modal, text="", text_color="orange")
         status_lbl.grid(row=6, column=0, columnspan=2, padx=12, pady=(4, 0), sticky="w")
 
@@ -434,27 +549,53 @@ class DashboardFrame(ctk.CTkFrame):
             if not sdate or not stime:
                 status_lbl.configure(text="Enter schedule date/time.")
                 return
+            when = parse_when(f"{sdate} {stime}")
+            if when is None:
+                status_lbl.configure(text="Use YYYY-MM-DD and HH:MM AM/PM.")
+                return
+            dentist_id = dentist_map.get(dval)
+            if dentist_id is None:
+                status_lbl.configure(text="Select a dentist.")
+                return
+            confirm_btn.configure(state="disabled")
+            status_lbl.configure(text="Checking schedule...")
+            self.tasks.submit(
+                schedule.is_free, dentist_id, when,
+                on_done=lambda result: slot_checked(pval, dval, dentist_id, when, result),
+            )
+
+        def slot_checked(pval: str, dval: str, dentist_id, when: datetime.datetime, result) -> None:
+            ok_slot, msg_slot, free = result
+            if not modal.winfo_exists():
+                return
+            confirm_btn.configure(state="normal")
+            if not ok_slot or not free:
+                status_lbl.configure(text=msg_slot)
+                load_free_slots()
+                return
             self.treatment_patient_name = pval
             self.treatment_dentist_name = dval
             self.treatment_patient_id = patient_map.get(pval)
-            self.treatment_dentist_id = dentist_map.get(dval)
-            self.treatment_schedule = f"{sdate} {stime}"
+            self.treatment_dentist_id = dentist_id
+            self.treatment_schedule = when.strftime(STORE_FORMAT)
             self.status.configure(
-                text=f"Patient: {pval} | Dentist: {dval} | Schedule: {self.treatment_schedule}"
+                text=f"Patient: {pval} | Dentist: {dval} | Schedule: {when:%Y-%m-%d %I:%M %p}"
             )
             modal.destroy()
 
-        ctk.CTkButton(
+        confirm_btn = ctk.CTkButton(
             modal,
             text="Confirm",
             fg_color="#123055",
             hover_color="#0c2340",
             text_color="#ffffff",
             command=confirm_patient,
-        ).grid(row=7, column=0, columnspan=2, padx=12, pady=12, sticky="ew")
+        )
+        confirm_btn.grid(row=7, column=0, columnspan=2, padx=12, pady=12, sticky="ew")
+        load_free_slots()
 
-    def _show_calendar_modal(self, target_entry: ctk.CTkEntry) -> None:
-        """Simple calendar picker to fill YYYY-MM-DD."""
+    def _show_calendar_modal(self, target_entry: ctk.CTkEntry, on_pick=None) -> None:
+        """Simple calendar picker to fill YYYY-MM-DD; on_pick(date) runs after a pick."""
         today = datetime.date.today()
         year = today.year
         month = today.month
@@ -497,6 +638,8 @@ class DashboardFrame(ctk.CTkFrame):
             target_entry.delete(0, "end")
             target_entry.insert(0, f"{y:04d}-{m:02d}-{d:02d}")
             top.destroy()
+            if on_pick is not None:
+                on_pick(datetime.date(y, m, d))
 
         def shift(delta: int) -> None:
             nonlocal year, month
@@ -552,8 +695,8 @@ class DashboardFrame(ctk.CTkFrame):
             row=2, column=0, columnspan=3, padx=12, pady=12, sticky="ew"
         )
 
-    def _show_add_patient_modal(self) -> None:
-        """Modal to capture new patient info."""
+    def _show_add_patient_modal(self, on_saved=None) -> None:
+        """Modal to capture new patient info; on_saved runs after a successful insert."""
         top = ctk.CTkToplevel(self)
         top.title("Add patient")
         top.geometry("420x360")
@@ -600,7 +743,9 @@ class DashboardFrame(ctk.CTkFrame):
                 else:
                     data[key] = widget.get().strip()
 
-            ok, msg = insert_patient(
+            status_lbl.configure(text="Saving...")
+            self.tasks.submit(
+                requires("patients.write")(store.insert_patient),
                 data.get("first_name", ""),
                 data.get("last_name", ""),
                 data.get("birth_date", ""),
@@ -609,7 +754,13 @@ class DashboardFrame(ctk.CTkFrame):
                 data.get("phone", ""),
                 data.get("email", ""),
                 data.get("address", ""),
+                on_done=saved,
             )
+
+        def saved(result) -> None:
+            ok, msg = result
+            if not top.winfo_exists():
+                return
             if not ok:
                 status_lbl.configure(text=msg)
                 return
@@ -639,8 +790,10 @@ class DashboardFrame(ctk.CTkFrame):
             ).grid(row=1, column=0, padx=12, pady=(4, 12), sticky="ew")
 
             top.destroy()
-            # Refresh patients view
-            self._render_patients()
+            if on_saved is not None:
+                on_saved()
+            # Patch the new row into the visible table now rather than on the next poll.
+            self._apply_changes()
 
         ctk.CTkButton(
             top,
@@ -681,6 +834,8 @@ class DashboardFrame(ctk.CTkFrame):
             self._render_appointments()
         elif name.lower().startswith("payment"):
             self._render_payment_history()
+        elif name.lower().startswith("diag"):
+            self._render_diagnostics()
         else:
             self._render_dashboard()
 
@@ -700,10 +855,185 @@ class DashboardFrame(ctk.CTkFrame):
         if self.drawer_width != target:
             self.after(delay_ms, lambda: self._animate_drawer(opening, step, delay_ms))
 
+    def destroy(self) -> None:
+        remove_write_listener(self._on_write)
+        self.after_cancel(self._change_poll)
+        self.after_cancel(self._session_check)
+        self.tasks.shutdown()
+        super().destroy()
+
     def _clear_content(self) -> None:
+        self.tasks.cancel_group("content")
+        self.tasks.cancel_group("search")
+        self._watch = None
         for child in self.content.winfo_children():
             child.destroy()
 
+    def _stream_pages(self, fetch_page, on_page, on_error, max_rows=None, on_complete=None, **kwargs) -> None:
+        """
+        Fetch keyset pages on the worker pool and hand each to on_page(rows, first)
+        on the Tk thread. Pending pages are dropped once the module is switched.
+        With max_rows, loading stops early and on_complete(truncated=True) is called.
+        """
+        loaded = 0
+
+        def step(after=None) -> None:
+            def done(result) -> None:
+                nonlocal loaded
+                ok, msg, rows, cursor = result
+                if not ok:
+                    on_error(msg)
+                    return
+                on_page(rows or [], after is None)
+                loaded += len(rows or [])
+                truncated = cursor is not None and max_rows is not None and loaded >= max_rows
+                if cursor is not None and not truncated:
+                    step(cursor)
+                elif on_complete is not None:
+                    on_complete(truncated)
+
+            self.tasks.submit(
+                fetch_page, page_size=self.PAGE_SIZE, after=after, on_done=done, group="content", **kwargs
+            )
+
+        step()
+
+    def _on_write(self, table: str) -> None:
+        """Write listener; may run on any thread, so it only records the table name."""
+        with self._changed_lock:
+            self._changed_tables.add(table)
+
+    def _poll_changes(self) -> None:
+        self._change_poll = self.after(self.CHANGE_POLL_MS, self._poll_changes)
+        self._apply_changes()
+
+    def _check_session(self) -> None:
+        """Reload role and permissions if the account row changed; sign out if it was disabled."""
+        self._session_check = self.after(self.SESSION_CHECK_MS, self._check_session)
+
+        def checked(result) -> None:
+            ok, _msg, session = result
+            if not ok:
+                return
+            if session is None:
+                if self.on_logout is not None:
+                    self.on_logout()
+                return
+            self.session = session
+            self.username = session.display_name
+
+        self.tasks.submit(sessions.refresh, on_done=checked)
+
+    def _apply_changes(self) -> None:
+        """Refresh the visible table if one of the tables it shows was written to."""
+        with self._changed_lock:
+            changed, self._changed_tables = self._changed_tables, set()
+        if self._watch is not None and changed & self._watch[0]:
+            self._watch[1]()
+
+    def _watch_table(self, model: TableModel, tables: set[str], fetch_page, columns=None, **kwargs) -> None:
+        """
+        Keep model current after writes to tables: read the highest key now, then
+        on each write fetch only rows past it (fetch_page must order by the key).
+        columns are the ones the screen loaded, so delta rows have the same shape.
+        """
+        key = model.key
+
+        def marked(result) -> None:
+            ok, _msg, rows, _cursor = result
+            if ok and model.watermark is None:
+                model.watermark = rows[0][key] if rows else 0
+
+        self.tasks.submit(
+            fetch_page, columns=[key], page_size=1, descending=True, on_done=marked, group="content", **kwargs
+        )
+        self._watch = (tables, lambda: self._fetch_deltas(model, fetch_page, columns=columns, **kwargs))
+
+    def _fetch_deltas(self, model: TableModel, fetch_page, **kwargs) -> None:
+        if model.watermark is None:
+            # Still loading; the stream and the watermark read will include the new rows.
+            return
+        if model.fetching:
+            model.stale = True
+            return
+        model.fetching = True
+        model.stale = False
+
+        def done(result) -> None:
+            model.fetching = False
+            ok, _msg, rows, cursor = result
+            if not ok:
+                return
+            model.apply(rows or [])
+            if cursor is not None or model.stale:
+                self._fetch_deltas(model, fetch_page, **kwargs)
+
+        mark = model.watermark
+        self.tasks.submit(
+            fetch_page, page_size=self.PAGE_SIZE, after=(mark, mark), on_done=done, group="content", **kwargs
+        )
+
+    def _bind_search(
+        self,
+        entry: ctk.CTkEntry,
+        model: TableModel,
+        remote=None,
+        use_remote=None,
+    ) -> None:
+        """
+        Filter the model's table through its index as the user types, once per
+        debounce window. When use_remote() is true (only part of the data is loaded),
+        non-empty terms go to remote(term) -> (ok, msg, rows) on the worker pool instead.
+        """
+        index, table = model.index, model.table
+        pending = None
+
+        def run() -> None:
+            nonlocal pending
+            pending = None
+            if not table.winfo_exists():
+                return
+            term = entry.get().strip()
+            if remote is not None and term and use_remote is not None and use_remote():
+                model.remote_view = True
+                table.set_loading(True)
+                table.set_rows([])
+                self.tasks.cancel_group("search")
+                self.tasks.submit(remote, term, on_done=lambda r: show_remote(term, r), group="search")
+                return
+            model.remote_view = False
+            table.set_rows(index.search(term))
+
+        def show_remote(term: str, result) -> None:
+            if not table.winfo_exists() or entry.get().strip() != term:
+                return
+            ok, msg, rows = result
+            table.set_loading(False)
+            table.set_rows(rows or [])
+            if not ok:
+                table.show_message(msg)
+
+        def on_key(_event=None) -> None:
+            nonlocal pending
+            if pending is not None:
+                self.after_cancel(pending)
+            pending = self.after(self.SEARCH_DEBOUNCE_MS, run)
+
+        entry.bind("<KeyRelease>", on_key)
+
+    def _render_denied(self, *_args, **_kwargs) -> None:
+        """Shown instead of a module the session's role may not open (see @requires)."""
+        self._clear_content()
+        self.content.grid_columnconfigure(0, weight=1)
+        ctk.CTkLabel(
+            self.content,
+            text=f"{self.username} cannot open this module.",
+            font=ctk.CTkFont(size=16, weight="bold"),
+        ).grid(row=0, column=0, padx=12, pady=(0, 4), sticky="w")
+        ctk.CTkLabel(self.content, text="Ask an administrator if you need access.").grid(
+            row=1, column=0, padx=12, pady=(0, 12), sticky="w"
+        )
+
     def _render_dashboard(self) -> None:
         self._clear_content()
         self.content.grid_columnconfigure(0, weight=1)
@@ -714,6 +1044,9 @@ class DashboardFrame(ctk.CTkFrame):
             text=f"Welcome, {self.username}",
             font=ctk.CTkFont(size=20, weight="bold"),
         ).grid(row=0, column=0, padx=12, pady=(0, 4), sticky="w")
+        if not sessions.can("payments.view"):
+            # The figures below include revenue; other roles only get the greeting.
+            return
 
         ctk.CTkLabel(
             self.content,
@@ -737,6 +1070,10 @@ class DashboardFrame(ctk.CTkFrame):
                 text_color="#e5e7eb",
             ).grid(row=0, column=0, padx=12, pady=24)
 
+        kpi_frame = ctk.CTkFrame(self.content)
+        kpi_frame.grid(row=3, column=0, padx=12, pady=(0, 12), sticky="ew")
+        self._render_kpis(kpi_frame)
+
         form = ctk.CTkFrame(self.content)
         form.grid(row=4, column=0, padx=12, pady=8, sticky="ew")
         form.grid_columnconfigure(1, weight=1)
@@ -767,6 +1104,91 @@ class DashboardFrame(ctk.CTkFrame):
         self.status = ctk.CTkLabel(self.content, text="", text_color="orange")
         self.status.grid(row=7, column=0, padx=12, pady=(4, 0), sticky="w")
 
+    def _render_kpis(self, frame: ctk.CTkFrame) -> None:
+        """
+        Revenue and utilization KPIs read from the daily summary tables, reloaded
+        whenever a payment or appointment is inserted while the dashboard is open.
+        Only for sessions with payments.view (see _render_dashboard).
+        """
+        frame.grid_columnconfigure((0, 1), weight=1)
+        totals = ctk.CTkLabel(frame, text="Loading figures…", justify="left", anchor="w")
+        totals.grid(row=0, column=0, columnspan=2, padx=10, pady=(8, 4), sticky="w")
+
+        ctk.CTkLabel(frame, text="Revenue, last 30 days").grid(row=1, column=0, padx=10, sticky="w")
+        ctk.CTkLabel(frame, text="Appointments this month").grid(row=1, column=1, padx=10, sticky="w")
+        revenue_canvas = tk.Canvas(frame, width=420, height=200, bg="#0b1220", highlightthickness=0)
+        revenue_canvas.grid(row=2, column=0, padx=10, pady=4, sticky="w")
+        mix_canvas = tk.Canvas(frame, width=360, height=200, bg="#0b1220", highlightthickness=0)
+        mix_canvas.grid(row=2, column=1, padx=10, pady=4, sticky="w")
+
+        load_table = VirtualTable(
+            frame,
+            [
+                ("dentist", "Dentist", 3),
+                ("appointments", "Appointments", 1),
+                ("completed", "Completed", 1),
+                ("no_show", "No-shows", 1),
+                ("no_show_rate", "No-show rate", 1),
+            ],
+            minsize={"dentist": 200, "appointments": 100, "completed": 90, "no_show": 90, "no_show_rate": 100},
+            height=160,
+            empty_text="No appointments this month.",
+        )
+        load_table.grid(row=3, column=0, columnspan=2, padx=10, pady=(4, 10), sticky="ew")
+
+        loading = False
+        stale = False
+
+        def load() -> None:
+            nonlocal loading, stale
+            if not sessions.can("payments.view"):
+                # The role changed while the dashboard was open.
+                totals.configure(text="Figures unavailable.")
+                return
+            if loading:
+                stale = True
+                return
+            loading, stale = True, False
+            self.tasks.submit_async(analytics.snapshot_async(), on_done=show, group="content")
+
+        def show(result) -> None:
+            nonlocal loading
+            loading = False
+            if not totals.winfo_exists():
+                return
+            ok, msg, kpis = result
+            if not ok:
+                totals.configure(text=f"Figures unavailable: {msg}")
+                return
+            totals.configure(
+                text=(
+                    f"Revenue today ₱{kpis['revenue_today']:,.2f}   "
+                    f"This month ₱{kpis['revenue_month']:,.2f}   "
+                    f"Appointments this month {kpis['appointments_month']}   "
+                    f"No-show rate {kpis['no_show_rate']:.0%}"
+                )
+            )
+            revenue_canvas.delete("all")
+            self._draw_line_chart(revenue_canvas, [amount for _day, amount in kpis["daily_revenue"]])
+            mix_canvas.delete("all")
+            self._draw_pie_chart(
+                mix_canvas,
+                {
+                    status.replace("_", "-").capitalize(): (self.STATUS_COLORS.get(status, "#64748b"), count)
+                    for status, count in kpis["status_mix"].items()
+                },
+            )
+            load_table.set_rows(
+                [{**row, "no_show_rate": f"{row['no_show_rate']:.0%}"} for row in kpis["dentist_load"]],
+                keep_offset=True,
+            )
+            if stale:
+                load()
+
+        load()
+        self._watch = ({"payments", "appointments"}, load)
+
+    @requires("treatments.view", denied=_render_denied)
     def _render_treatments(self) -> None:
         """Show treatment shortcut buttons."""
         self._clear_content()
@@ -780,21 +1202,6 @@ class DashboardFrame(ctk.CTkFrame):
             font=ctk.CTkFont(size=20, weight="bold"),
         ).grid(row=0, column=0, columnspan=2, padx=12, pady=(0, 8), sticky="w")
 
-        # Load catalog once
-        if not self.treatment_catalog:
-            ok, msg, rows = fetch_treatments()
-            if not ok:
-                ctk.CTkLabel(self.content, text=msg, text_color="orange").grid(
-                    row=1, column=0, padx=12, pady=12, sticky="w"
-                )
-                return
-            for r in rows:
-                name = r.get("name")
-                if not name:
-                    continue
-                self.treatment_catalog[name] = r
-        # Require patient selection
-        self._prompt_treatment_patient()
 
         # Layout: buttons cluster on the left, receipt column on the right
         tray = ctk.CTkFrame(self.content, fg_color="transparent")
@@ -898,6 +1305,24 @@ class DashboardFrame(ctk.CTkFrame):
         self.status = ctk.CTkLabel(self.content, text="", text_color="orange")
         self.status.grid(row=7, column=0, padx=12, pady=(4, 0), sticky="w")
 
+        # Catalog comes from the shared reference cache (cheap after the first load).
+        self.tasks.submit(get_treatments, on_done=self._load_treatment_catalog, group="content")
+        # Require patient selection
+        self._prompt_treatment_patient()
+
+    def _load_treatment_catalog(self, result) -> None:
+        ok, msg, rows = result
+        if not ok:
+            self.status.configure(text=msg)
+            return
+        self.treatment_catalog = {}
+        for r in rows:
+            name = r.get("name")
+            if not name:
+                continue
+            self.treatment_catalog[name] = r
+
+    @requires("history.view", denied=_render_denied)
     def _render_patient_history(self) -> None:
         self._clear_content()
         self.content.grid_columnconfigure(0, weight=1)
@@ -909,26 +1334,6 @@ class DashboardFrame(ctk.CTkFrame):
             font=ctk.CTkFont(size=20, weight="bold"),
         ).grid(row=0, column=0, padx=12, pady=(0, 8), sticky="w")
 
-        ok_hist, msg_hist, hist_rows = fetch_patient_history()
-        if not ok_hist:
-            ctk.CTkLabel(self.content, text=msg_hist, text_color="orange").grid(
-                row=1, column=0, padx=12, pady=12, sticky="w"
-            )
-            return
-
-        ok_pat, _, patient_rows = fetch_patients()
-        ok_app, _, appt_rows = fetch_appointments()
-        patient_map = {}
-        if ok_pat and patient_rows:
-            for r in patient_rows:
-                pid = r.get("patient_id")
-                name = f"{r.get('first_name','').strip()} {r.get('last_name','').strip()}".strip()
-                patient_map[pid] = name or str(pid)
-        appt_map = {}
-        if ok_app and appt_rows:
-            for r in appt_rows:
-                appt_map[r.get("appointment_id")] = r
-
         search_frame = ctk.CTkFrame(self.content, fg_color="transparent")
         search_frame.grid(row=1, column=0, padx=12, pady=(0, 8), sticky="ew")
         search_frame.grid_columnconfigure(1, weight=1)
@@ -936,113 +1341,80 @@ class DashboardFrame(ctk.CTkFrame):
         search_entry = ctk.CTkEntry(search_frame, placeholder_text="Type to filter history")
         search_entry.grid(row=0, column=1, padx=(0, 8), pady=4, sticky="ew")
 
-        scroll = ctk.CTkScrollableFrame(self.content, fg_color="transparent")
-        scroll.grid(row=2, column=0, padx=12, pady=(0, 12), sticky="nsew")
-        scroll.grid_columnconfigure(0, weight=1)
-        scroll.grid_rowconfigure(0, weight=1)
-        scroll.grid_rowconfigure(0, weight=1)
-
         columns = [
-            ("patient", "Patient", 2),
+            ("patient_name", "Patient", 2),
             ("visit_date", "Visit date", 1),
             ("diagnosis", "Diagnosis", 2),
             ("treatment_given", "Treatment", 2),
             ("prescription", "Prescription", 2),
             ("follow_up_date", "Follow-up", 1),
             ("notes", "Notes", 3),
-            ("appointment", "Appointment", 2),
+            ("scheduled_at", "Appointment", 2),
         ]
         minsize = {
-            "patient": 180,
+            "patient_name": 180,
             "visit_date": 160,
             "diagnosis": 180,
             "treatment_given": 200,
             "prescription": 200,
             "follow_up_date": 160,
             "notes": 260,
-            "appointment": 200,
+            "scheduled_at": 200,
         }
 
-        table = ctk.CTkFrame(
-            scroll,
-            corner_radius=6,
-            fg_color="#ffffff",
-            border_width=1,
-            border_color="#e5e7eb",
-        )
-        table.grid(row=0, column=0, sticky="nsew", padx=2, pady=2)
-        table.grid_columnconfigure(tuple(range(len(columns))), weight=1)
+        table = VirtualTable(self.content, columns, minsize, empty_text="No history records match.")
+        table.grid(row=2, column=0, padx=12, pady=(0, 12), sticky="nsew")
+        table.set_loading(True)
 
-        header_font = ctk.CTkFont(size=12, weight="bold")
-        cell_font = ctk.CTkFont(size=12)
+        def shape(row: dict) -> dict:
+            # Name/schedule come pre-joined; fall back to ids/blank for orphaned rows.
+            return {
+                **row,
+                "patient_name": row.get("patient_name") or row.get("patient_id", ""),
+                "scheduled_at": row.get("scheduled_at") or "",
+            }
 
-        for c_idx, (key, header, weight) in enumerate(columns):
-            table.grid_columnconfigure(c_idx, weight=weight, minsize=minsize.get(key, 120))
-            ctk.CTkLabel(
-                table,
-                text=header,
-                font=header_font,
-                text_color="#111827",
-                fg_color="#f5f5f5",
-            ).grid(row=0, column=c_idx, padx=4, pady=4, sticky="nsew")
-
-        self.history_rows = hist_rows or []
-
-        def build_table(row_data: list[dict]) -> None:
-            for child in table.grid_slaves():
-                if int(child.grid_info().get("row", 1)) > 0:
-                    child.destroy()
-
-            if not row_data:
-                ctk.CTkLabel(table, text="No history records match.").grid(
-                    row=1, column=0, padx=8, pady=8, sticky="w", columnspan=len(columns)
-                )
-                return
+        # Newest first, so rows saved later go to the top.
+        model = TableModel(table, "history_id", lambda r: r["history_id"], shape, descending=True)
+        self.history_rows = model.rows
 
-            for r_idx, row in enumerate(row_data, start=1):
-                bg = "#ffffff" if r_idx % 2 else "#f9fafb"
-                pid = row.get("patient_id")
-                patient_name = patient_map.get(pid, pid)
-                appt = appt_map.get(row.get("appointment_id"))
-                appt_label = ""
-                if appt:
-                    appt_label = f"{appt.get('scheduled_at','')}"
-                values = {
-                    "patient": patient_name,
-                    "visit_date": row.get("visit_date", ""),
-                    "diagnosis": row.get("diagnosis", ""),
-                    "treatment_given": row.get("treatment_given", ""),
-                    "prescription": row.get("prescription", ""),
-                    "follow_up_date": row.get("follow_up_date", ""),
-                    "notes": row.get("notes", ""),
-                    "appointment": appt_label,
-                }
-                for c_idx, (key, _, _) in enumerate(columns):
-                    ctk.CTkLabel(
-                        table,
-                        text=str(values.get(key, "")),
-                        font=cell_font,
-                        text_color="#111827",
-                        anchor="w",
-                        fg_color=bg,
-                    ).grid(row=r_idx, column=c_idx, padx=4, pady=4, sticky="nsew")
-
-        build_table(self.history_rows)
-
-        def apply_filter(*_args) -> None:
-            term = search_entry.get().strip().lower()
-            if not term:
-                filtered = self.history_rows
-            else:
-                filtered = []
-                for r in self.history_rows:
-                    haystack = " ".join(str(v) for v in r.values()).lower()
-                    if term in haystack:
-                        filtered.append(r)
-            build_table(filtered)
+        def on_page(rows: list[dict], first: bool) -> None:
+            if first:
+                table.set_loading(False)
+            model.load_page(rows)
+
+        def on_error(msg: str) -> None:
+            table.grid_forget()
+            search_frame.grid_forget()
+            ctk.CTkLabel(self.content, text=msg, text_color="orange").grid(
+                row=1, column=0, padx=12, pady=12, sticky="w"
+            )
 
-        search_entry.bind("<KeyRelease>", apply_filter)
+        # Large histories are only partly loaded (newest first); search then runs in MySQL.
+        partial = False
+
+        def on_complete(truncated: bool) -> None:
+            nonlocal partial
+            partial = truncated
+            model.complete = not truncated
+
+        def remote(term: str) -> tuple:
+            ok, msg, rows = store.search_patient_history(term)
+            return ok, msg, [shape(r) for r in rows or []]
+
+        self._stream_pages(
+            store.fetch_history_view_page,
+            on_page,
+            on_error,
+            max_rows=self.MAX_LOCAL_ROWS,
+            on_complete=on_complete,
+            descending=True,
+        )
+        self._watch_table(model, {"patient_history"}, store.fetch_history_view_page)
+
+        self._bind_search(search_entry, model, remote=remote, use_remote=lambda: partial)
 
+    @requires("payments.view", denied=_render_denied)
     def _render_payment_history(self) -> None:
         """Display payments table."""
         self._clear_content()
@@ -1055,26 +1427,6 @@ class DashboardFrame(ctk.CTkFrame):
             font=ctk.CTkFont(size=20, weight="bold"),
         ).grid(row=0, column=0, padx=12, pady=(0, 8), sticky="w")
 
-        ok_pay, msg_pay, pay_rows = fetch_payments()
-        if not ok_pay:
-            ctk.CTkLabel(self.content, text=msg_pay, text_color="orange").grid(
-                row=1, column=0, padx=12, pady=12, sticky="w"
-            )
-            return
-
-        ok_pat, _, patient_rows = fetch_patients()
-        ok_app, _, appt_rows = fetch_appointments()
-        patient_map = {}
-        if ok_pat and patient_rows:
-            for r in patient_rows:
-                pid = r.get("patient_id")
-                name = f"{r.get('first_name','').strip()} {r.get('last_name','').strip()}".strip()
-                patient_map[pid] = name or str(pid)
-        appt_map = {}
-        if ok_app and appt_rows:
-            for r in appt_rows:
-                appt_map[r.get("appointment_id")] = r
-
         search_frame = ctk.CTkFrame(self.content, fg_color="transparent")
         search_frame.grid(row=1, column=0, padx=12, pady=(0, 8), sticky="ew")
         search_frame.grid_columnconfigure(1, weight=1)
@@ -1082,13 +1434,9 @@ class DashboardFrame(ctk.CTkFrame):
         search_entry = ctk.CTkEntry(search_frame, placeholder_text="Type to filter payments")
         search_entry.grid(row=0, column=1, padx=(0, 8), pady=4, sticky="ew")
 
-        scroll = ctk.CTkScrollableFrame(self.content, fg_color="transparent")
-        scroll.grid(row=2, column=0, padx=12, pady=(0, 12), sticky="nsew")
-        scroll.grid_columnconfigure(0, weight=1)
-
         columns = [
-            ("patient", "Patient", 2),
-            ("appointment", "Appointment", 2),
+            ("patient_name", "Patient", 2),
+            ("scheduled_at", "Appointment", 2),
             ("amount", "Amount", 1),
             ("payment_date", "Payment date", 2),
             ("method", "Method", 1),
@@ -1097,86 +1445,144 @@ class DashboardFrame(ctk.CTkFrame):
             ("remarks", "Remarks", 2),
         ]
 
-        table = ctk.CTkFrame(
-            scroll,
-            corner_radius=6,
-            fg_color="#ffffff",
-            border_width=1,
-            border_color="#e5e7eb",
+        table = VirtualTable(self.content, columns, empty_text="No payment records match.")
+        table.grid(row=2, column=0, padx=12, pady=(0, 12), sticky="nsew")
+        table.set_loading(True)
+
+        def shape(row: dict) -> dict:
+            return {
+                **row,
+                "patient_name": row.get("patient_name") or row.get("patient_id", ""),
+                "scheduled_at": row.get("scheduled_at") or "",
+            }
+
+        model = TableModel(table, "payment_id", lambda r: r["payment_id"], shape)
+        self.pay_rows = model.rows
+
+        def on_page(rows: list[dict], first: bool) -> None:
+            if first:
+                table.set_loading(False)
+            model.load_page(rows)
+
+        def on_error(msg: str) -> None:
+            table.grid_forget()
+            search_frame.grid_forget()
+            ctk.CTkLabel(self.content, text=msg, text_color="orange").grid(
+                row=1, column=0, padx=12, pady=12, sticky="w"
+            )
+
+        def on_complete(truncated: bool) -> None:
+            model.complete = not truncated
+
+        self._stream_pages(store.fetch_payment_view_page, on_page, on_error, on_complete=on_complete)
+        self._watch_table(model, {"payments"}, store.fetch_payment_view_page)
+
+        self._bind_search(search_entry, model)
+
+    @requires("diagnostics.view", denied=_render_denied)
+    def _render_diagnostics(self) -> None:
+        """Live per-function query metrics, pool and cache counters, with export buttons."""
+        self._clear_content()
+        self.content.grid_columnconfigure(0, weight=1)
+        self.content.grid_rowconfigure(3, weight=1)
+
+        ctk.CTkLabel(
+            self.content,
+            text="Diagnostics",
+            font=ctk.CTkFont(size=20, weight="bold"),
+        ).grid(row=0, column=0, padx=12, pady=(0, 8), sticky="w")
+
+        summary = ctk.CTkLabel(self.content, text="", justify="left", anchor="w")
+        summary.grid(row=1, column=0, padx=12, pady=(0, 8), sticky="w")
+
+        actions = ctk.CTkFrame(self.content, fg_color="transparent")
+        actions.grid(row=2, column=0, padx=12, pady=(0, 8), sticky="ew")
+        status = ctk.CTkLabel(actions, text="", text_color="#6b7280")
+        status.grid(row=0, column=3, padx=8, pady=4, sticky="w")
+
+        def export(path: str) -> None:
+            try:
+                status.configure(text=f"Saved {metrics.export(path)}", text_color="#15803d")
+            except OSError as exc:
+                status.configure(text=f"Export failed: {exc}", text_color="orange")
+
+        def reset() -> None:
+            metrics.reset()
+            refresh(reschedule=False)
+
+        ctk.CTkButton(actions, text="Export JSON", width=110, command=lambda: export("db_metrics.json")).grid(
+            row=0, column=0, padx=(0, 8), pady=4
         )
-        table.grid(row=0, column=0, sticky="nsew", padx=2, pady=2)
-        table.grid_columnconfigure(tuple(range(len(columns))), weight=1)
+        ctk.CTkButton(
+            actions, text="Export Prometheus", width=140, command=lambda: export("db_metrics.prom")
+        ).grid(row=0, column=1, padx=(0, 8), pady=4)
+        ctk.CTkButton(
+            actions, text="Reset", width=80, fg_color="#6b7280", hover_color="#4b5563", command=reset
+        ).grid(row=0, column=2, padx=(0, 8), pady=4)
 
-        header_font = ctk.CTkFont(size=12, weight="bold")
-        cell_font = ctk.CTkFont(size=12)
+        columns = [
+            ("function", "Function", 3),
+            ("calls", "Calls", 1),
+            ("errors", "Errors", 1),
+            ("p50", "p50 ms", 1),
+            ("p95", "p95 ms", 1),
+            ("p99", "p99 ms", 1),
+            ("connect", "Connect ms", 1),
+            ("execute", "Execute ms", 1),
+            ("fetch", "Fetch ms", 1),
+            ("rows", "Rows", 1),
+            ("kb", "KB", 1),
+        ]
+        table = VirtualTable(
+            self.content,
+            columns,
+            minsize={"function": 220, **{key: 70 for key, _, _ in columns[1:]}},
+            empty_text="No database calls recorded yet.",
+        )
+        table.grid(row=3, column=0, padx=12, pady=(0, 12), sticky="nsew")
 
-        for c_idx, (_, header, weight) in enumerate(columns):
-            table.grid_columnconfigure(c_idx, weight=weight)
-            ctk.CTkLabel(
-                table,
-                text=header,
-                font=header_font,
-                text_color="#111827",
-                fg_color="#f5f5f5",
-            ).grid(row=0, column=c_idx, padx=4, pady=4, sticky="nsew")
-
-        self.pay_rows = pay_rows or []
-
-        def build_table(row_data: list[dict]) -> None:
-            for child in table.grid_slaves():
-                if int(child.grid_info().get("row", 1)) > 0:
-                    child.destroy()
-
-            if not row_data:
-                ctk.CTkLabel(table, text="No payment records match.").grid(
-                    row=1, column=0, padx=8, pady=8, sticky="w", columnspan=len(columns)
-                )
+        def refresh(reschedule: bool = True) -> None:
+            if not table.winfo_exists():
                 return
-
-            for r_idx, row in enumerate(row_data, start=1):
-                bg = "#ffffff" if r_idx % 2 else "#f9fafb"
-                pid = row.get("patient_id")
-                patient_name = patient_map.get(pid, pid)
-                appt = appt_map.get(row.get("appointment_id"))
-                appt_label = ""
-                if appt:
-                    appt_label = appt.get("scheduled_at", "")
-                values = {
-                    "patient": patient_name,
-                    "appointment": appt_label,
-                    "amount": row.get("amount", ""),
-                    "payment_date": row.get("payment_date", ""),
-                    "method": row.get("method", ""),
-                    "status": row.get("status", ""),
-                    "reference_no": row.get("reference_no", ""),
-                    "remarks": row.get("remarks", ""),
+            snap = metrics.snapshot()
+            rows = [
+                {
+                    "function": name,
+                    "calls": f["calls"],
+                    "errors": f["errors"],
+                    "p50": f"{f['p50_ms']:.1f}",
+                    "p95": f"{f['p95_ms']:.1f}",
+                    "p99": f"{f['p99_ms']:.1f}",
+                    "connect": f"{f['avg_connect_ms']:.1f}",
+                    "execute": f"{f['avg_execute_ms']:.1f}",
+                    "fetch": f"{f['avg_fetch_ms']:.1f}",
+                    "rows": f["rows"],
+                    "kb": f"{f['bytes'] / 1024:.0f}",
                 }
-                for c_idx, (key, _, _) in enumerate(columns):
-                    ctk.CTkLabel(
-                        table,
-                        text=str(values.get(key, "")),
-                        font=cell_font,
-                        text_color="#111827",
-                        anchor="w",
-                        fg_color=bg,
-                    ).grid(row=r_idx, column=c_idx, padx=4, pady=4, sticky="nsew")
-
-        build_table(self.pay_rows)
-
-        def apply_filter(*_args) -> None:
-            term = search_entry.get().strip().lower()
-            if not term:
-                filtered = self.pay_rows
-            else:
-                filtered = []
-                for r in self.pay_rows:
-                    haystack = " ".join(str(v) for v in r.values()).lower()
-                    if term in haystack:
-                        filtered.append(r)
-            build_table(filtered)
+                for name, f in sorted(snap["functions"].items(), key=lambda kv: -kv[1]["total_ms"])
+            ]
+            table.set_rows(rows, keep_offset=True)
+
+            pool = store.pool_stats()
+            cache = cache_stats()
+            lines = [
+                f"Pool: {pool['in_use']} in use, {pool['idle']} idle of {pool['size']}, "
+                f"avg wait {pool['wait_avg_s'] * 1000:.1f} ms, exhausted {pool['exhausted']}",
+                f"Cache: {cache['entries']} entries, hit rate {cache['hit_rate']:.0%}",
+            ]
+            if snap["slow"]:
+                last = snap["slow"][-1]
+                lines.append(
+                    f"Slow (>{snap['slow_ms']:.0f} ms): {len(snap['slow'])} recent, "
+                    f"last {last['function']} {last['total_ms']:.0f} ms"
+                )
+            summary.configure(text="\n".join(lines))
+            if reschedule:
+                self.after(self.DIAGNOSTICS_REFRESH_MS, refresh)
 
-        search_entry.bind("<KeyRelease>", apply_filter)
+        refresh()
 
+    @requires("patients.view", denied=_render_denied)
     def _render_patients(self) -> None:
         """Patients module with input prompt buttons and table."""
         self._clear_content()
@@ -1189,15 +1595,6 @@ class DashboardFrame(ctk.CTkFrame):
             font=ctk.CTkFont(size=20, weight="bold"),
         ).grid(row=0, column=0, padx=12, pady=(0, 8), sticky="w")
 
-        ok, msg, rows = fetch_patients()
-        if not ok:
-            ctk.CTkLabel(self.content, text=msg, text_color="orange").grid(
-                row=1, column=0, padx=12, pady=12, sticky="w"
-            )
-            return
-
-        # Cache rows for filtering
-        self.patient_rows = rows or []
 
         search_frame = ctk.CTkFrame(self.content, fg_color="transparent")
         search_frame.grid(row=1, column=0, padx=12, pady=(0, 8), sticky="ew")
@@ -1206,13 +1603,6 @@ class DashboardFrame(ctk.CTkFrame):
         search_entry = ctk.CTkEntry(search_frame, placeholder_text="Type to filter patients")
         search_entry.grid(row=0, column=1, padx=(0, 8), pady=4, sticky="ew")
 
-        scroll = ctk.CTkScrollableFrame(self.content, fg_color="transparent")
-        scroll.grid(row=3, column=0, padx=12, pady=(0, 12), sticky="nsew")
-        scroll.grid_columnconfigure(0, weight=1)
-
-        self.patient_table_holder = ctk.CTkFrame(scroll, fg_color="transparent")
-        self.patient_table_holder.grid(row=0, column=0, sticky="nsew")
-
         columns = [
             ("name", "Name", 3),
             ("birth_date", "Birth date", 2),
@@ -1232,77 +1622,41 @@ class DashboardFrame(ctk.CTkFrame):
             "created_at": 160,
         }
 
-        def build_table(row_data: list[dict]) -> None:
-            for child in self.patient_table_holder.winfo_children():
-                child.destroy()
+        table = VirtualTable(self.content, columns, minsize, empty_text="No patient records found.")
+        table.grid(row=3, column=0, padx=12, pady=(0, 12), sticky="nsew")
+        table.set_loading(True)
 
-            if not row_data:
-                ctk.CTkLabel(self.patient_table_holder, text="No patient records found.").grid(
-                    row=0, column=0, padx=8, pady=8, sticky="w"
-                )
-                return
+        def shape(row: dict) -> dict:
+            full_name = f"{row.get('first_name','').strip()} {row.get('last_name','').strip()}".strip()
+            return {**row, "name": full_name or row.get("first_name", "") or row.get("last_name", "")}
 
-            table = ctk.CTkFrame(
-                self.patient_table_holder,
-                corner_radius=6,
-                fg_color="#ffffff",
-                border_width=1,
-                border_color="#e5e7eb",
+        # Cache rows for filtering; filled page by page below, then patched as patients are added.
+        model = TableModel(table, "patient_id", lambda r: r["patient_id"], shape)
+        self.patient_rows = model.rows
+
+        def on_page(rows: list[dict], first: bool) -> None:
+            if first:
+                table.set_loading(False)
+            model.load_page(rows)
+
+        def on_error(msg: str) -> None:
+            table.grid_forget()
+            search_frame.grid_forget()
+            ctk.CTkLabel(self.content, text=msg, text_color="orange").grid(
+                row=1, column=0, padx=12, pady=12, sticky="w"
             )
-            table.grid(row=0, column=0, sticky="ew", padx=2, pady=2)
-            table.grid_columnconfigure(tuple(range(len(columns))), weight=1)
-
-            header_font = ctk.CTkFont(size=12, weight="bold")
-            cell_font = ctk.CTkFont(size=12)
-
-            for c_idx, (key, header, weight) in enumerate(columns):
-                table.grid_columnconfigure(c_idx, weight=weight, minsize=minsize.get(key, 120))
-                ctk.CTkLabel(
-                    table,
-                    text=header,
-                    font=header_font,
-                    text_color="#111827",
-                    fg_color="#f5f5f5",
-                ).grid(row=0, column=c_idx, padx=4, pady=4, sticky="nsew")
-
-            for r_idx, row in enumerate(row_data, start=1):
-                bg = "#ffffff" if r_idx % 2 else "#f9fafb"
-                full_name = f"{row.get('first_name','').strip()} {row.get('last_name','').strip()}".strip()
-                values = {
-                    "name": full_name or row.get("first_name", "") or row.get("last_name", ""),
-                    "birth_date": row.get("birth_date", ""),
-                    "age_group": row.get("age_group", ""),
-                    "gender": row.get("gender", ""),
-                    "phone": row.get("phone", ""),
-                    "address": row.get("address", ""),
-                    "created_at": row.get("created_at", ""),
-                }
-                for c_idx, (key, _, _) in enumerate(columns):
-                    ctk.CTkLabel(
-                        table,
-                        text=str(values.get(key, "")),
-                        font=cell_font,
-                        text_color="#111827",
-                        anchor="w",
-                        fg_color=bg,
-                    ).grid(row=r_idx, column=c_idx, padx=4, pady=4, sticky="nsew")
-
-        build_table(self.patient_rows)
-
-        def apply_filter(*_args) -> None:
-            term = search_entry.get().strip().lower()
-            if not term:
-                filtered = self.patient_rows
-            else:
-                filtered = []
-                for r in self.patient_rows:
-                    for val in r.values():
-                        if term in str(val).lower():
-                            filtered.append(r)
-                            break
-            build_table(filtered)
 
-        search_entry.bind("<KeyRelease>", apply_filter)
+        patient_columns = ["first_name", "last_name", "birth_date", "age_group", "gender", "phone", "address", "created_at"]
+
+        def on_complete(truncated: bool) -> None:
+            model.complete = not truncated
+
+        self._stream_pages(
+            store.fetch_patients_page, on_page, on_error, on_complete=on_complete, columns=patient_columns
+        )
+        self._watch_table(model, {"patients"}, store.fetch_patients_page, columns=patient_columns)
+
+        self._bind_search(search_entry, model)
 
         # Add button under the table, bottom right
         add_wrap = ctk.CTkFrame(self.content, fg_color="transparent")
@@ -1320,6 +1674,7 @@ class DashboardFrame(ctk.CTkFrame):
         self.status_patients = ctk.CTkLabel(self.content, text="", text_color="orange")
         self.status_patients.grid(row=5, column=0, padx=12, pady=(4, 0), sticky="w")
 
+    @requires("appointments.view", denied=_render_denied)
     def _render_appointments(self) -> None:
         """Display appointments table."""
         self._clear_content()
@@ -1329,7 +1684,7 @@ class DashboardFrame(ctk.CTkFrame):
         self.content.grid_columnconfigure(0, weight=1)
         for row in range(3):
             self.content.grid_rowconfigure(row, weight=0)
-        self.content.grid_rowconfigure(1, weight=1)
+        self.content.grid_rowconfigure(2, weight=1)
 
         ctk.CTkLabel(
             self.content,
@@ -1337,53 +1692,19 @@ class DashboardFrame(ctk.CTkFrame):
             font=ctk.CTkFont(size=20, weight="bold"),
         ).grid(row=0, column=0, padx=12, pady=(0, 8), sticky="w")
 
-        ok, msg, rows = fetch_appointments()
-        if not ok:
-            ctk.CTkLabel(self.content, text=msg, text_color="orange").grid(
-                row=1, column=0, padx=12, pady=12, sticky="w"
-            )
-            return
-
-        ok_pat, _, patient_rows = fetch_patients()
-        ok_den, _, dentist_rows = fetch_dentists()
-        patient_map = {}
-        if ok_pat and patient_rows:
-            for r in patient_rows:
-                pid = r.get("patient_id")
-                name = f"{r.get('first_name','').strip()} {r.get('last_name','').strip()}".strip()
-                patient_map[pid] = name or str(pid)
-        dentist_map = {}
-        if ok_den and dentist_rows:
-            for r in dentist_rows:
-                did = r.get("dentist_id")
-                # Try common fullname field names, then fall back to first/last.
-                name = (
-                    r.get("fullname")
-                    or r.get("full_name")
-                    or r.get("name")
-                    or ""
-                ).strip()
-                if not name:
-                    name = f"{r.get('first_name','').strip()} {r.get('last_name','').strip()}".strip()
-                dentist_map[did] = name or str(did)
-
-        scroll = ctk.CTkScrollableFrame(self.content, fg_color="transparent")
-        scroll.grid(row=1, column=0, padx=12, pady=(0, 12), sticky="nsew")
-        scroll.grid_columnconfigure(0, weight=1)
-        scroll.grid_rowconfigure(0, weight=1)
-
-        if not rows:
-            ctk.CTkLabel(scroll, text="No appointments found.").grid(
-                row=0, column=0, padx=8, pady=8, sticky="w"
-            )
-            return
+        search_frame = ctk.CTkFrame(self.content, fg_color="transparent")
+        search_frame.grid(row=1, column=0, padx=12, pady=(0, 8), sticky="ew")
+        search_frame.grid_columnconfigure(1, weight=1)
+        ctk.CTkLabel(search_frame, text="Search:").grid(row=0, column=0, padx=(0, 8), pady=4, sticky="w")
+        search_entry = ctk.CTkEntry(search_frame, placeholder_text="Type to filter appointments")
+        search_entry.grid(row=0, column=1, padx=(0, 8), pady=4, sticky="ew")
 
         columns = [
             ("patient_name", "Patient", 2),
             ("dentist_name", "Dentist", 2),
             ("scheduled_at", "Scheduled at", 2),
             ("reason", "Reason", 2),
-            ("status", "Status", 1),
+            ("status_mark", "Status", 1),
             ("created_at", "Created", 2),
         ]
         minsize = {
@@ -1391,62 +1712,74 @@ class DashboardFrame(ctk.CTkFrame):
             "dentist_name": 200,
             "scheduled_at": 220,
             "reason": 180,
-            "status": 140,
+            "status_mark": 140,
             "created_at": 200,
         }
 
-        table = ctk.CTkFrame(
-            scroll,
-            corner_radius=6,
-            fg_color="#ffffff",
-            border_width=1,
-            border_color="#e5e7eb",
+        # Row click opens the history modal for that appointment.
+        table = VirtualTable(
+            self.content,
+            columns,
+            minsize,
+            empty_text="No appointments found.",
+            on_row_click=self._open_history_modal,
         )
-        table.grid(row=0, column=0, sticky="nsew", padx=2, pady=2)
-        table.grid_columnconfigure(tuple(range(len(columns))), weight=1)
-
-        header_font = ctk.CTkFont(size=12, weight="bold")
-        cell_font = ctk.CTkFont(size=12)
+        table.grid(row=2, column=0, padx=12, pady=(0, 12), sticky="nsew")
+        table.set_loading(True)
 
-        for c_idx, (_, header, weight) in enumerate(columns):
-            key = columns[c_idx][0]
-            table.grid_columnconfigure(c_idx, weight=weight, minsize=minsize.get(key, 140))
-            ctk.CTkLabel(
-                table,
-                text=header,
-                font=header_font,
-                text_color="#111827",
-                fg_color="#f5f5f5",
-            ).grid(row=0, column=c_idx, padx=4, pady=4, sticky="nsew")
-
-        for r_idx, row in enumerate(rows, start=1):
-            bg = "#ffffff" if r_idx % 2 else "#f9fafb"
+        def shape(row: dict) -> dict:
             status_val = row.get("status", "")
             status_mark = "OK" if str(status_val).lower() in ("active", "confirmed", "1", "true", "yes") else str(status_val)
-            patient_name = patient_map.get(row.get("patient_id"), row.get("patient_id", ""))
-            dentist_name = dentist_map.get(row.get("dentist_id"), row.get("dentist_id", ""))
-            values = {
-                "patient_name": patient_name,
-                "dentist_name": dentist_name,
-                "scheduled_at": row.get("scheduled_at", ""),
-                "reason": row.get("reason", ""),
-                "status": status_mark,
-                "created_at": row.get("created_at", ""),
+            return {
+                **row,
+                "patient_name": row.get("patient_name") or row.get("patient_id", ""),
+                "dentist_name": row.get("dentist_name") or row.get("dentist_id", ""),
+                "status_mark": status_mark,
             }
-            for c_idx, (key, _, _) in enumerate(columns):
-                ctk.CTkLabel(
-                    table,
-                    text=str(values.get(key, "")),
-                    font=cell_font,
-                    text_color="#111827",
-                    anchor="w",
-                    fg_color=bg,
-                ).grid(row=r_idx, column=c_idx, padx=4, pady=4, sticky="nsew")
-            # Bind row click to open history modal
-            for child in table.grid_slaves(row=r_idx):
-                child.bind("<Button-1>", lambda _e, appt=row: self._open_history_modal(appt))
-
-    def _draw_line_chart(self, canvas: tk.Canvas, values: list[int]) -> None:
+
+        # Same order as the view pages (latest scheduled first), so a new booking lands between its neighbours.
+        model = TableModel(
+            table, "appointment_id", lambda r: (r["scheduled_at"], r["appointment_id"]), shape, descending=True
+        )
+
+        def on_page(rows: list[dict], first: bool) -> None:
+            if first:
+                table.set_loading(False)
+            model.load_page(rows)
+
+        def on_error(msg: str) -> None:
+            table.grid_forget()
+            search_frame.grid_forget()
+            ctk.CTkLabel(self.content, text=msg, text_color="orange").grid(
+                row=1, column=0, padx=12, pady=12, sticky="w"
+            )
+
+        # Latest scheduled first, so today's and upcoming bookings are inside the
+        # MAX_LOCAL_ROWS window; older ones are reached through the MySQL search.
+        partial = False
+
+        def on_complete(truncated: bool) -> None:
+            nonlocal partial
+            partial = truncated
+            model.complete = not truncated
+
+        def remote(term: str) -> tuple:
+            ok, msg, rows = store.search_appointments(term)
+            return ok, msg, [shape(r) for r in rows or []]
+
+        self._stream_pages(
+            store.fetch_appointment_view_page,
+            on_page,
+            on_error,
+            max_rows=self.MAX_LOCAL_ROWS,
+            on_complete=on_complete,
+            descending=True,
+        )
+        self._watch_table(model, {"appointments"}, store.fetch_appointment_view_page, order_by="appointment_id")
+
+        self._bind_search(search_entry, model, remote=remote, use_remote=lambda: partial)
+
+    def _draw_line_chart(self, canvas: tk.Canvas, values: list[float]) -> None:
         """Draw a simple line chart for the given values."""
         w, h = int(canvas["width"]), int(canvas["height"])
         padding = 30
@@ -1535,7 +1868,9 @@ class DashboardFrame(ctk.CTkFrame):
             if not visit_date:
                 status_lbl.configure(text="Missing visit date.")
                 return
-            ok, msg = insert_patient_history(
+            status_lbl.configure(text="Saving...")
+            self.tasks.submit(
+                requires("history.write")(store.insert_patient_history),
                 patient_id=patient_id,
                 appointment_id=appt_id,
                 visit_date=visit_date,
@@ -1544,14 +1879,19 @@ class DashboardFrame(ctk.CTkFrame):
                 prescription=rx or None,
                 follow_up_date=follow or None,
                 notes=notes or None,
+                on_done=saved,
             )
+
+        def saved(result) -> None:
+            ok, msg = result
+            if not top.winfo_exists():
+                return
             if not ok:
                 status_lbl.configure(text=msg)
                 return
             status_lbl.configure(text="History saved.")
             top.destroy()
-            # Refresh appointments view to reflect any potential changes
-            self._render_appointments()
+            # A history entry does not change the appointment rows on screen; nothing to re-render.
 
         ctk.CTkButton(
             top,
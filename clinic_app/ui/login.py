@@ -1,8 +1,9 @@
 import customtkinter as ctk
 
 from clinic_app.config import init_theme
-from clinic_app.db_mysql import verify_user
+from clinic_app.session import Session, sessions
 from clinic_app.ui.dashboard import DashboardFrame
+from clinic_app.ui.worker import BackgroundRunner
 
 
 class DentalApp(ctk.CTk):
@@ -21,9 +22,14 @@ class DentalApp(ctk.CTk):
         self.grid_rowconfigure(1, weight=1)
 
         self._current_body: ctk.CTkFrame | None = None
+        self.tasks = BackgroundRunner(self, max_workers=2)
         self._build_header()
         self._show_login()
 
+    def destroy(self) -> None:
+        self.tasks.shutdown()
+        super().destroy()
+
     def _build_header(self) -> None:
         header = ctk.CTkFrame(self, fg_color="transparent")
         header.grid(row=0, column=0, sticky="ew", padx=24, pady=(16, 0))
@@ -47,7 +53,8 @@ class DentalApp(ctk.CTk):
             self._current_body.destroy()
             self._current_body = None
 
-    def _show_login(self) -> None:
+    def _show_login(self, locked: Session | None = None) -> None:
+        """Sign-in form; with locked, prefilled to unlock that session without re-hashing."""
         self._clear_body()
         shell = ctk.CTkFrame(self, fg_color="transparent")
         shell.grid(row=1, column=0, sticky="nsew", padx=24, pady=16)
@@ -83,7 +90,7 @@ class DentalApp(ctk.CTk):
 
         ctk.CTkLabel(
             body,
-            text="Sign in to continue",
+            text=f"Locked. Enter the password for {locked.username}." if locked else "Sign in to continue",
             font=ctk.CTkFont(size=13),
             text_color="#94a3b8",
         ).grid(row=2, column=0, sticky="n", pady=(0, 14))
@@ -94,6 +101,8 @@ class DentalApp(ctk.CTk):
 
         username_entry = ctk.CTkEntry(form, placeholder_text="Username", height=40)
         username_entry.grid(row=0, column=0, padx=12, pady=(12, 8), sticky="ew")
+        if locked is not None:
+            username_entry.insert(0, locked.username)
 
         password_entry = ctk.CTkEntry(form, placeholder_text="Password", show="*", height=40)
         password_entry.grid(row=1, column=0, padx=12, pady=(0, 8), sticky="ew")
@@ -108,26 +117,36 @@ class DentalApp(ctk.CTk):
                 status_label.configure(text="Enter username and password.")
                 return
             status_label.configure(text="Checking...")
-            self.update_idletasks()
-
-            ok, message, role = verify_user(username, password)
+            continue_btn.configure(state="disabled")
+            if locked is not None and username == locked.username and sessions.current() is not None:
+                self.tasks.submit(sessions.unlock, password, on_done=finish_login)
+            else:
+                # Signing in someone else ends the locked session.
+                self.tasks.submit(sessions.sign_in, username, password, on_done=finish_login)
+
+        def finish_login(result) -> None:
+            if not status_label.winfo_exists():
+                return
+            ok, message, session = result
+            continue_btn.configure(state="normal")
             if not ok:
                 status_label.configure(text=message)
                 return
 
             status_label.configure(text="")
-            self._show_dashboard(username=f"{username} ({role or 'user'})")
+            self._show_dashboard(session)
 
-        ctk.CTkButton(
+        continue_btn = ctk.CTkButton(
             form,
-            text="Continue",
+            text="Unlock" if locked else "Continue",
             command=submit_login,
             height=42,
             fg_color="#0ea5e9",
             hover_color="#0284c7",
             text_color="#0b1220",
             font=ctk.CTkFont(size=15, weight="bold"),
-        ).grid(row=2, column=0, padx=12, pady=(4, 6), sticky="ew")
+        )
+        continue_btn.grid(row=2, column=0, padx=12, pady=(4, 6), sticky="ew")
 
         ctk.CTkLabel(
             form,
@@ -138,12 +157,19 @@ class DentalApp(ctk.CTk):
 
         self._current_body = shell
 
-    def _show_dashboard(self, username: str) -> None:
+    def _show_dashboard(self, session: Session) -> None:
         self._clear_body()
-        dashboard = DashboardFrame(self, username=username)
+        dashboard = DashboardFrame(self, session=session, on_lock=self._lock, on_logout=self._logout)
         dashboard.grid(row=1, column=0, sticky="nsew", padx=24, pady=16)
         self._current_body = dashboard
 
+    def _lock(self) -> None:
+        self._show_login(locked=sessions.current())
+
+    def _logout(self) -> None:
+        sessions.close()
+        self._show_login()
+
 
 def run() -> None:
     app = DentalApp()
@@ -1,11 +1,12 @@
 import customtkinter as ctk
 
-from clinic_app.db_mysql import fetch_patients
+from clinic_app.repository import store
+from clinic_app.ui.virtual_table import VirtualTable
 
 
 def open_patient_history_window(master: ctk.CTkBaseClass) -> ctk.CTkToplevel:
     """Open a window showing all patients from the database."""
-    ok, msg, rows = fetch_patients()
+    ok, msg, rows = store.fetch_patients()
 
     win = ctk.CTkToplevel(master)
     win.title("Patient history")
@@ -23,35 +24,17 @@ def open_patient_history_window(master: ctk.CTkBaseClass) -> ctk.CTkToplevel:
         )
         return win
 
-    scroll = ctk.CTkScrollableFrame(win, fg_color="transparent")
-    scroll.grid(row=1, column=0, padx=12, pady=(0, 12), sticky="nsew")
-    scroll.grid_columnconfigure(0, weight=1)
-
     if not rows:
-        ctk.CTkLabel(scroll, text="No patient records found.").grid(
-            row=0, column=0, padx=8, pady=8, sticky="w"
+        ctk.CTkLabel(win, text="No patient records found.").grid(
+            row=1, column=0, padx=12, pady=12, sticky="w"
         )
         return win
 
-    # Build table headers from keys
+    # Build table columns from keys; the grid only draws the rows on screen.
     headers = list(rows[0].keys())
-    header_frame = ctk.CTkFrame(scroll, fg_color="#0f172a")
-    header_frame.grid(row=0, column=0, sticky="ew")
-    for idx, h in enumerate(headers):
-        ctk.CTkLabel(
-            header_frame,
-            text=h,
-            font=ctk.CTkFont(size=12, weight="bold"),
-        ).grid(row=0, column=idx, padx=6, pady=6, sticky="w")
-
-    # Rows
-    for r_idx, row in enumerate(rows, start=1):
-        row_frame = ctk.CTkFrame(scroll, fg_color="#111827")
-        row_frame.grid(row=r_idx, column=0, sticky="ew", pady=2)
-        for c_idx, h in enumerate(headers):
-            val = row.get(h, "")
-            ctk.CTkLabel(row_frame, text=str(val)).grid(
-                row=0, column=c_idx, padx=6, pady=4, sticky="w"
-            )
+    columns = [(h, h, 1) for h in headers]
+    table = VirtualTable(win, columns, height=440)
+    table.grid(row=1, column=0, padx=12, pady=(0, 12), sticky="nsew")
+    table.set_rows(rows)
 
     return win
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+from clinic_app.logic.search import SearchIndex
+from clinic_app.ui.virtual_table import VirtualTable
+
+
+class TableModel:
+    """
+    Rows loaded for one VirtualTable, kept in step with later inserts.
+
+    Pages streamed in at render time go through load_page(); rows written
+    afterwards arrive through apply() as deltas (rows whose key is past
+    `watermark`) and are spliced into their sorted position, so only the
+    affected part of the table is repainted instead of rebuilding the screen.
+    """
+
+    def __init__(
+        self,
+        table: VirtualTable,
+        key: str,
+        sort_key: Callable[[dict], Any],
+        shape: Callable[[dict], dict] = dict,
+        descending: bool = False,
+    ) -> None:
+        self.table = table
+        self.key = key
+        self.sort_key = sort_key
+        self.shape = shape
+        self.descending = descending
+        self.index = SearchIndex()
+        # Highest key known on the server when loading started; deltas are rows past it.
+        self.watermark: Optional[Any] = None
+        # True once every row in the sort range has been streamed in (not truncated).
+        self.complete = False
+        # While the table shows server-side search results it is not a view of this model.
+        self.remote_view = False
+        # Delta fetch bookkeeping for the dashboard.
+        self.fetching = False
+        self.stale = False
+        self._keys: set = set()
+
+    @property
+    def rows(self) -> list[dict]:
+        return self.index.rows
+
+    def load_page(self, rows: list[dict]) -> None:
+        """Append a streamed page (already in display order), skipping rows a delta already added."""
+        fresh = []
+        for row in rows:
+            if row[self.key] not in self._keys:
+                self._keys.add(row[self.key])
+                fresh.append(self.shape(row))
+        visible = self.index.add(fresh)
+        if not self.remote_view:
+            self.table.append_rows(visible)
+
+    def apply(self, rows: list[dict]) -> int:
+        """
+        Splice newly written rows into place and advance the watermark. Rows that
+        would sort past the loaded part of a partial or still-loading list are left
+        to the stream. Returns the number of rows added.
+        """
+        added = 0
+        for row in rows:
+            key = row[self.key]
+            if self.watermark is None or key > self.watermark:
+                self.watermark = key
+            if key in self._keys:
+                continue
+            shaped = self.shape(row)
+            position = self._position(shaped)
+            if position == len(self.index.rows) and not self.complete:
+                continue
+            self._keys.add(key)
+            at = self.index.insert(position, shaped)
+            if at is not None and not self.remote_view:
+                self.table.insert_rows(at, [shaped])
+            added += 1
+        return added
+
+    def _position(self, row: dict) -> int:
+        """Index after the last row that sorts before or equal to row."""
+        target = self.sort_key(row)
+        rows = self.index.rows
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self.sort_key(rows[mid])
+            if (value >= target) if self.descending else (value <= target):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+import customtkinter as ctk
+
+
+class VirtualTable(ctk.CTkFrame):
+    """
+    Table that only builds widgets for the rows currently on screen.
+
+    A fixed pool of CTkLabel cells (visible rows x columns) is created once and
+    re-labelled as the user scrolls, so render cost does not grow with row count.
+    Rows are plain dicts; each column reads row.get(key).
+    """
+
+    def __init__(
+        self,
+        master: ctk.CTkBaseClass,
+        columns: list[tuple[str, str, int]],
+        minsize: Optional[dict[str, int]] = None,
+        height: int = 420,
+        row_height: int = 30,
+        on_row_click: Optional[Callable[[dict], None]] = None,
+        empty_text: str = "No records found.",
+        row_colors: tuple[str, str] = ("#ffffff", "#f9fafb"),
+    ) -> None:
+        super().__init__(
+            master,
+            height=height,
+            corner_radius=6,
+            fg_color="#ffffff",
+            border_width=1,
+            border_color="#e5e7eb",
+        )
+        self.columns = columns
+        self.minsize = minsize or {}
+        self.row_height = row_height
+        self.on_row_click = on_row_click
+        self.empty_text = empty_text
+        self.row_colors = row_colors
+
+        self._rows: list[dict] = []
+        self._offset = 0
+        # Pool of cell labels: one list of labels per visible row slot.
+        self._slots: list[list[ctk.CTkLabel]] = []
+        self._cell_font = ctk.CTkFont(size=12)
+
+        # Keep a fixed height; the pool is sized to what fits.
+        self.grid_propagate(False)
+        self.grid_columnconfigure(len(columns), weight=0)
+
+        header_font = ctk.CTkFont(size=12, weight="bold")
+        for c_idx, (key, header, weight) in enumerate(columns):
+            self.grid_columnconfigure(c_idx, weight=weight, minsize=self.minsize.get(key, 120))
+            ctk.CTkLabel(
+                self,
+                text=header,
+                font=header_font,
+                text_color="#111827",
+                fg_color="#f5f5f5",
+            ).grid(row=0, column=c_idx, padx=4, pady=4, sticky="nsew")
+
+        self._scrollbar = ctk.CTkScrollbar(self, orientation="vertical", command=self._on_scrollbar)
+        self._scrollbar.grid(row=0, column=len(columns), rowspan=1, padx=(0, 2), pady=4, sticky="ns")
+
+        self._empty_label = ctk.CTkLabel(self, text=empty_text, text_color="#111827")
+
+        self._bind_wheel(self)
+        self.bind("<Configure>", self._on_resize, add="+")
+        self._ensure_slots(max(1, (height - row_height) // row_height))
+        self._redraw()
+
+    # -- public API -------------------------------------------------------
+    @property
+    def rows(self) -> list[dict]:
+        return self._rows
+
+    def set_rows(self, rows: list[dict], keep_offset: bool = False) -> None:
+        """Replace the data set and scroll back to the top (or stay put with keep_offset)."""
+        self._rows = list(rows)
+        if not keep_offset:
+            self._offset = 0
+        self._redraw()
+
+    def append_rows(self, rows: list[dict]) -> None:
+        """Add rows at the end; only redraws if the new rows could be on screen."""
+        if not rows:
+            return
+        was_short = len(self._rows) < self._offset + len(self._slots)
+        self._rows.extend(rows)
+        if was_short:
+            self._redraw()
+        else:
+            self._update_scrollbar()
+
+    def insert_rows(self, index: int, rows: list[dict]) -> None:
+        """
+        Insert rows before position index. Rows inserted above the visible window
+        shift the offset so the user's view stays put; only an insert inside the
+        window repaints it.
+        """
+        if not rows:
+            return
+        self._rows[index:index] = rows
+        if index < self._offset:
+            self._offset += len(rows)
+            self._update_scrollbar()
+        elif index < self._offset + len(self._slots):
+            self._redraw()
+        else:
+            self._update_scrollbar()
+
+    def set_loading(self, loading: bool) -> None:
+        """Show a loading placeholder instead of the empty-state text while data is fetched."""
+        self._empty_label.configure(text="Loading…" if loading else self.empty_text)
+        if not self._rows:
+            self._redraw()
+
+    def show_message(self, text: str) -> None:
+        """Replace the empty-state text (e.g. with an error) until the next set_loading()."""
+        self._empty_label.configure(text=text)
+        if not self._rows:
+            self._redraw()
+
+    def update_row(self, index: int, row: dict) -> None:
+        """Replace a single row in place and repaint it if visible."""
+        self._rows[index] = row
+        slot = index - self._offset
+        if 0 <= slot < len(self._slots):
+            self._paint_slot(slot)
+
+    def scroll_to(self, index: int) -> None:
+        self._offset = self._clamp(index)
+        self._redraw()
+
+    # -- internals --------------------------------------------------------
+    def _clamp(self, offset: int) -> int:
+        return max(0, min(offset, len(self._rows) - len(self._slots)))
+
+    def _ensure_slots(self, count: int) -> None:
+        while len(self._slots) < count:
+            slot_idx = len(self._slots)
+            labels = []
+            for c_idx, _ in enumerate(self.columns):
+                lbl = ctk.CTkLabel(
+                    self,
+                    text="",
+                    font=self._cell_font,
+                    text_color="#111827",
+                    anchor="w",
+                    height=self.row_height - 4,
+                )
+                if self.on_row_click is not None:
+                    lbl.bind("<Button-1>", lambda _e, s=slot_idx: self._on_click(s))
+                self._bind_wheel(lbl)
+                labels.append(lbl)
+            self._slots.append(labels)
+        while len(self._slots) > count:
+            for lbl in self._slots.pop():
+                lbl.destroy()
+        self._scrollbar.grid_configure(rowspan=count + 1)
+
+    def _redraw(self) -> None:
+        self._offset = self._clamp(self._offset)
+        if not self._rows:
+            for slot in range(len(self._slots)):
+                for lbl in self._slots[slot]:
+                    lbl.grid_remove()
+            self._empty_label.grid(row=1, column=0, columnspan=len(self.columns), padx=8, pady=8, sticky="w")
+        else:
+            self._empty_label.grid_remove()
+            for slot in range(len(self._slots)):
+                self._paint_slot(slot)
+        self._update_scrollbar()
+
+    def _paint_slot(self, slot: int) -> None:
+        index = self._offset + slot
+        labels = self._slots[slot]
+        if index >= len(self._rows):
+            for lbl in labels:
+                lbl.grid_remove()
+            return
+        row = self._rows[index]
+        bg = self.row_colors[index % 2]
+        for c_idx, (key, _, _) in enumerate(self.columns):
+            lbl = labels[c_idx]
+            lbl.configure(text=self._fit(key, row.get(key, "")), fg_color=bg)
+            lbl.grid(row=slot + 1, column=c_idx, padx=4, pady=1, sticky="nsew")
+
+    def _fit(self, key: str, value) -> str:
+        """Clip text to the column's minimum width so long cells do not shift columns while scrolling."""
+        text = "" if value is None else str(value)
+        max_chars = max(4, self.minsize.get(key, 120) // 7)
+        return text if len(text) <= max_chars else text[: max_chars - 1] + "…"
+
+    def _update_scrollbar(self) -> None:
+        total = len(self._rows)
+        if total <= len(self._slots):
+            self._scrollbar.set(0.0, 1.0)
+            return
+        first = self._offset / total
+        last = min(1.0, (self._offset + len(self._slots)) / total)
+        self._scrollbar.set(first, last)
+
+    def _on_scrollbar(self, action: str, amount, unit: str | None = None) -> None:
+        if action == "moveto":
+            target = int(float(amount) * len(self._rows))
+        elif unit == "pages":
+            target = self._offset + int(amount) * len(self._slots)
+        else:
+            target = self._offset + int(amount)
+        self.scroll_to(target)
+
+    def _on_wheel(self, event) -> str:
+        if getattr(event, "num", None) == 4:
+            step = -3
+        elif getattr(event, "num", None) == 5:
+            step = 3
+        else:
+            step = -3 if event.delta > 0 else 3
+        self.scroll_to(self._offset + step)
+        # Stop the enclosing scrollable frame from also scrolling.
+        return "break"
+
+    def _bind_wheel(self, widget) -> None:
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(seq, self._on_wheel, add="+")
+
+    def _on_resize(self, event) -> None:
+        # Event sizes are in real pixels; row_height is in unscaled CTk units.
+        row_px = max(1, int(self._apply_widget_scaling(self.row_height)))
+        fits = max(1, (event.height - row_px) // row_px)
+        if fits != len(self._slots):
+            self._ensure_slots(fits)
+            self._redraw()
+
+    def _on_click(self, slot: int) -> None:
+        index = self._offset + slot
+        if self.on_row_click is not None and index < len(self._rows):
+            self.on_row_click(self._rows[index])
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional
+
+from clinic_app.db_async import bridge
+
+
+class Task:
+    """Handle for a submitted call; cancel() drops its result before delivery."""
+
+    def __init__(self, group: Optional[str]) -> None:
+        self.group = group
+        self.cancelled = False
+        self.future = None
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class BackgroundRunner:
+    """
+    Run blocking calls (db_mysql and friends) on a bounded thread pool and hand
+    results back on the Tk thread by polling a queue with widget.after().
+
+    Tk widgets must only be touched from the main thread, so callbacks passed to
+    submit() always run there. Tasks tagged with a group can be cancelled together,
+    e.g. when the user switches dashboard modules mid-load.
+    """
+
+    def __init__(self, widget, max_workers: int = 4, poll_ms: int = 30) -> None:
+        self._widget = widget
+        self._poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._results: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending: set[Task] = set()
+        self._polling = False
+        self._closed = False
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        group: Optional[str] = None,
+        **kwargs,
+    ) -> Task:
+        """Queue fn(*args, **kwargs) on a worker; on_done(result) runs on the Tk thread."""
+        task = Task(group)
+        with self._lock:
+            self._pending.add(task)
+
+        def run() -> None:
+            if task.cancelled:
+                self._results.put((task, None, None, None, None))
+                return
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as exc:  # delivered to on_error on the Tk thread
+                self._results.put((task, None, exc, on_done, on_error))
+            else:
+                self._results.put((task, result, None, on_done, on_error))
+
+        task.future = self._executor.submit(run)
+        self._ensure_polling()
+        return task
+
+    def submit_async(
+        self,
+        coro: Coroutine,
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        group: Optional[str] = None,
+    ) -> Task:
+        """
+        Run a coroutine (e.g. an asyncio.gather over db_async calls) on the
+        db_async bridge loop; on_done(result) runs on the Tk thread like submit().
+        """
+        task = Task(group)
+        with self._lock:
+            self._pending.add(task)
+
+        def finished(future) -> None:
+            if future.cancelled():
+                self._results.put((task, None, None, None, None))
+            elif future.exception() is not None:
+                self._results.put((task, None, future.exception(), on_done, on_error))
+            else:
+                self._results.put((task, future.result(), None, on_done, on_error))
+
+        task.future = bridge.submit(coro)
+        task.future.add_done_callback(finished)
+        self._ensure_polling()
+        return task
+
+    def cancel_group(self, group: str) -> None:
+        """Cancel every pending task tagged with group."""
+        with self._lock:
+            tasks = [t for t in self._pending if t.group == group]
+        for task in tasks:
+            task.cancel()
+
+    def busy(self, group: Optional[str] = None) -> bool:
+        with self._lock:
+            return any(group is None or t.group == group for t in self._pending if not t.cancelled)
+
+    def shutdown(self) -> None:
+        self._closed = True
+        with self._lock:
+            tasks = list(self._pending)
+        for task in tasks:
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_polling(self) -> None:
+        if self._polling or self._closed:
+            return
+        self._polling = True
+        try:
+            self._widget.after(self._poll_ms, self._drain)
+        except Exception:
+            # Widget already destroyed; nothing left to deliver to.
+            self._polling = False
+
+    def _drain(self) -> None:
+        self._polling = False
+        if self._closed:
+            return
+        while True:
+            try:
+                task, result, exc, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._pending.discard(task)
+            if task.cancelled:
+                continue
+            if exc is not None:
+                if on_error is not None:
+                    on_error(exc)
+                else:
+                    traceback.print_exception(type(exc), exc, exc.__traceback__)
+            elif on_done is not None:
+                on_done(result)
+        with self._lock:
+            # Cancelled-but-not-started futures never report back; forget them.
+            self._pending = {t for t in self._pending if not (t.cancelled and t.future.cancelled())}
+            more = bool(self._pending)
+        if more:
+            self._ensure_polling()
@@ -1,5 +1,7 @@
+from clinic_app.migrations import migrate_on_startup
 from clinic_app.ui.login import run
 
 
 if __name__ == "__main__":
+    migrate_on_startup()
     run()
@@ -0,0 +1,10 @@
+--
+-- Full-text indexes for server-side search of clinical text.
+-- Apply after dental_clinic.sql (InnoDB FULLTEXT needs MySQL 5.6+ / MariaDB 10.0.5+).
+--
+
+ALTER TABLE `patient_history`
+  ADD FULLTEXT KEY `ft_patient_history_text` (`diagnosis`, `notes`, `prescription`, `treatment_given`);
+
+ALTER TABLE `appointments`
+  ADD FULLTEXT KEY `ft_appointments_text` (`reason`, `notes`);
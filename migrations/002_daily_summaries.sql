@@ -0,0 +1,110 @@
+--
+-- Per-day rollups of payments and appointments for the dashboard KPIs.
+-- Apply after dental_clinic.sql, while nothing else is writing: the backfill
+-- counts existing rows and the triggers count every insert after that. An
+-- update or delete moves the row from its old (day, ..., status) bucket to the
+-- new one (a refund, a visit marked completed or no_show, a reschedule), and
+-- buckets that drop to zero are removed.
+-- (Creating triggers with binary logging on needs SUPER or
+-- log_bin_trust_function_creators=1.)
+--
+
+CREATE TABLE `daily_revenue` (
+  `day` date NOT NULL,
+  `status` enum('pending','paid','refunded','cancelled') NOT NULL,
+  `payments` int(11) NOT NULL DEFAULT 0,
+  `amount` decimal(14,2) NOT NULL DEFAULT 0.00,
+  PRIMARY KEY (`day`, `status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE `daily_appointment_stats` (
+  `day` date NOT NULL,
+  `dentist_id` int(11) NOT NULL,
+  `status` enum('scheduled','completed','cancelled','no_show') NOT NULL,
+  `appointments` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`day`, `dentist_id`, `status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+INSERT INTO `daily_revenue` (`day`, `status`, `payments`, `amount`)
+SELECT DATE(`payment_date`), `status`, COUNT(*), SUM(`amount`) FROM `payments`
+WHERE `payment_date` IS NOT NULL AND `status` IS NOT NULL
+GROUP BY DATE(`payment_date`), `status`;
+
+INSERT INTO `daily_appointment_stats` (`day`, `dentist_id`, `status`, `appointments`)
+SELECT DATE(`scheduled_at`), `dentist_id`, `status`, COUNT(*) FROM `appointments`
+WHERE `status` IS NOT NULL
+GROUP BY DATE(`scheduled_at`), `dentist_id`, `status`;
+
+CREATE TRIGGER `payments_summary_ai` AFTER INSERT ON `payments` FOR EACH ROW
+  INSERT INTO `daily_revenue` (`day`, `status`, `payments`, `amount`)
+  SELECT DATE(NEW.`payment_date`), NEW.`status`, 1, NEW.`amount` FROM DUAL
+  WHERE NEW.`payment_date` IS NOT NULL AND NEW.`status` IS NOT NULL
+  ON DUPLICATE KEY UPDATE `payments` = `payments` + 1, `amount` = `amount` + NEW.`amount`;
+
+CREATE TRIGGER `appointments_summary_ai` AFTER INSERT ON `appointments` FOR EACH ROW
+  INSERT INTO `daily_appointment_stats` (`day`, `dentist_id`, `status`, `appointments`)
+  SELECT DATE(NEW.`scheduled_at`), NEW.`dentist_id`, NEW.`status`, 1 FROM DUAL
+  WHERE NEW.`status` IS NOT NULL
+  ON DUPLICATE KEY UPDATE `appointments` = `appointments` + 1;
+
+DELIMITER ;;
+
+CREATE TRIGGER `payments_summary_au` AFTER UPDATE ON `payments` FOR EACH ROW
+BEGIN
+  IF NOT (DATE(OLD.`payment_date`) <=> DATE(NEW.`payment_date`)
+          AND OLD.`status` <=> NEW.`status` AND OLD.`amount` <=> NEW.`amount`) THEN
+    IF OLD.`payment_date` IS NOT NULL AND OLD.`status` IS NOT NULL THEN
+      UPDATE `daily_revenue` SET `payments` = `payments` - 1, `amount` = `amount` - OLD.`amount`
+      WHERE `day` = DATE(OLD.`payment_date`) AND `status` = OLD.`status`;
+      DELETE FROM `daily_revenue`
+      WHERE `day` = DATE(OLD.`payment_date`) AND `status` = OLD.`status` AND `payments` <= 0;
+    END IF;
+    IF NEW.`payment_date` IS NOT NULL AND NEW.`status` IS NOT NULL THEN
+      INSERT INTO `daily_revenue` (`day`, `status`, `payments`, `amount`)
+      VALUES (DATE(NEW.`payment_date`), NEW.`status`, 1, NEW.`amount`)
+      ON DUPLICATE KEY UPDATE `payments` = `payments` + 1, `amount` = `amount` + NEW.`amount`;
+    END IF;
+  END IF;
+END;;
+
+CREATE TRIGGER `payments_summary_ad` AFTER DELETE ON `payments` FOR EACH ROW
+BEGIN
+  IF OLD.`payment_date` IS NOT NULL AND OLD.`status` IS NOT NULL THEN
+    UPDATE `daily_revenue` SET `payments` = `payments` - 1, `amount` = `amount` - OLD.`amount`
+    WHERE `day` = DATE(OLD.`payment_date`) AND `status` = OLD.`status`;
+    DELETE FROM `daily_revenue`
+    WHERE `day` = DATE(OLD.`payment_date`) AND `status` = OLD.`status` AND `payments` <= 0;
+  END IF;
+END;;
+
+CREATE TRIGGER `appointments_summary_au` AFTER UPDATE ON `appointments` FOR EACH ROW
+BEGIN
+  IF NOT (DATE(OLD.`scheduled_at`) <=> DATE(NEW.`scheduled_at`)
+          AND OLD.`dentist_id` <=> NEW.`dentist_id` AND OLD.`status` <=> NEW.`status`) THEN
+    IF OLD.`status` IS NOT NULL THEN
+      UPDATE `daily_appointment_stats` SET `appointments` = `appointments` - 1
+      WHERE `day` = DATE(OLD.`scheduled_at`) AND `dentist_id` = OLD.`dentist_id` AND `status` = OLD.`status`;
+      DELETE FROM `daily_appointment_stats`
+      WHERE `day` = DATE(OLD.`scheduled_at`) AND `dentist_id` = OLD.`dentist_id` AND `status` = OLD.`status`
+        AND `appointments` <= 0;
+    END IF;
+    IF NEW.`status` IS NOT NULL THEN
+      INSERT INTO `daily_appointment_stats` (`day`, `dentist_id`, `status`, `appointments`)
+      VALUES (DATE(NEW.`scheduled_at`), NEW.`dentist_id`, NEW.`status`, 1)
+      ON DUPLICATE KEY UPDATE `appointments` = `appointments` + 1;
+    END IF;
+  END IF;
+END;;
+
+CREATE TRIGGER `appointments_summary_ad` AFTER DELETE ON `appointments` FOR EACH ROW
+BEGIN
+  IF OLD.`status` IS NOT NULL THEN
+    UPDATE `daily_appointment_stats` SET `appointments` = `appointments` - 1
+    WHERE `day` = DATE(OLD.`scheduled_at`) AND `dentist_id` = OLD.`dentist_id` AND `status` = OLD.`status`;
+    DELETE FROM `daily_appointment_stats`
+    WHERE `day` = DATE(OLD.`scheduled_at`) AND `dentist_id` = OLD.`dentist_id` AND `status` = OLD.`status`
+      AND `appointments` <= 0;
+  END IF;
+END;;
+
+DELIMITER ;
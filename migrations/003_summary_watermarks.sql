@@ -0,0 +1,19 @@
+--
+-- Watermarks for the scheduled summary refresh (python -m clinic_app.summaries),
+-- the alternative to the 002 triggers on servers that refuse CREATE TRIGGER.
+-- Apply right after 002: the watermarks start at the newest rows, which the
+-- 002 backfill has already counted.
+--
+
+CREATE TABLE `summary_watermarks` (
+  `source` varchar(32) NOT NULL,
+  `last_id` int(11) NOT NULL DEFAULT 0,
+  `refreshed_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`source`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+INSERT INTO `summary_watermarks` (`source`, `last_id`, `refreshed_at`)
+SELECT 'payments', COALESCE(MAX(`payment_id`), 0), NOW() FROM `payments`;
+
+INSERT INTO `summary_watermarks` (`source`, `last_id`, `refreshed_at`)
+SELECT 'appointments', COALESCE(MAX(`appointment_id`), 0), NOW() FROM `appointments`;
@@ -0,0 +1,29 @@
+--
+-- Composite indexes for the filters and sort keys the app queries by; the dump
+-- only indexes primary and foreign keys. Names match the SQLite schema in
+-- clinic_app/db.py. The single-column foreign key indexes that become prefixes
+-- of a new index are dropped (the foreign keys use the composite one).
+-- Verify with: python -m clinic_app.migrations --explain
+--
+
+-- Schedule pages (scheduled_at, then the implicit primary key), a dentist's
+-- day and slot checks, and upcoming/no-show lists by status.
+ALTER TABLE `appointments`
+  ADD KEY `idx_appointments_time` (`scheduled_at`),
+  ADD KEY `idx_appointments_dentist_time` (`dentist_id`, `scheduled_at`),
+  ADD KEY `idx_appointments_status` (`status`, `scheduled_at`),
+  DROP KEY `dentist_id`;
+
+-- A patient's visits in date order, and follow-ups coming due.
+ALTER TABLE `patient_history`
+  ADD KEY `idx_history_patient` (`patient_id`, `visit_date`),
+  ADD KEY `idx_history_follow_up` (`follow_up_date`),
+  DROP KEY `patient_id`;
+
+-- Payment pages and reports by date, optionally narrowed by status.
+ALTER TABLE `payments`
+  ADD KEY `idx_payments_date` (`payment_date`, `status`);
+
+-- Patient lookups by name (and the replica's natural-key match).
+ALTER TABLE `patients`
+  ADD KEY `idx_patients_name` (`last_name`, `first_name`);
@@ -0,0 +1,54 @@
+"""
+Shared fixtures. The suite runs against the embedded SQLite backend, so the
+environment is set before anything imports clinic_app.repository (which picks
+the backend at import) or clinic_app.replica (which opens its file and would
+start the background syncer).
+"""
+import os
+import tempfile
+from pathlib import Path
+
+_scratch = Path(tempfile.mkdtemp(prefix="clinic-tests-"))
+os.environ["CLINIC_DB_BACKEND"] = "sqlite"
+os.environ["CLINIC_SQLITE_PATH"] = str(_scratch / "clinic.db")
+os.environ["CLINIC_REPLICA_PATH"] = str(_scratch / "replica.db")
+os.environ["CLINIC_REPLICA_SYNC"] = "0"
+
+import pytest  # noqa: E402
+
+from clinic_app import db_sqlite  # noqa: E402
+
+DENTISTS = [(1, "Dr. Ana Reyes", "General"), (2, "Dr. Ben Cruz", "Orthodontics")]
+TREATMENTS = [
+    (1, "Cleaning", "any", 800.00),
+    (2, "Fluoride", "child", 500.00),
+    (3, "Filling", "any", 1500.00),
+]
+PATIENTS = [
+    (1, "Maria", "Santos", "1990-04-12", "adult", "female", "0917-000-0001"),
+    (2, "Jose", "Rizal", "2016-06-19", "child", "male", "0917-000-0002"),
+    (3, "Lena", "Cruz", "1950-01-30", "old", "female", None),
+]
+
+
+def seed_reference_rows(conn) -> None:
+    """Dentists, treatments and a few patients with fixed ids; commits."""
+    conn.executemany("INSERT INTO dentists (dentist_id, full_name, specialization) VALUES (?, ?, ?)", DENTISTS)
+    conn.executemany(
+        "INSERT INTO treatments (treatment_id, name, age_group, default_fee) VALUES (?, ?, ?, ?)", TREATMENTS
+    )
+    conn.executemany(
+        "INSERT INTO patients (patient_id, first_name, last_name, birth_date, age_group, gender, phone)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        PATIENTS,
+    )
+    conn.commit()
+
+
+@pytest.fixture
+def clinic(tmp_path):
+    """A fresh, unseeded SQLite clinic database with the reference rows; yields its connection."""
+    db_sqlite.configure(tmp_path / "clinic.db", seed=False)
+    conn = db_sqlite.get_connection()
+    seed_reference_rows(conn)
+    yield conn
@@ -0,0 +1,83 @@
+import time
+
+import bcrypt
+import pytest
+
+from clinic_app.auth import INVALID_LOGIN, AuthService, is_bcrypt_hash
+
+
+@pytest.fixture
+def accounts(clinic):
+    clinic.executemany(
+        "INSERT INTO user_accounts (user_id, username, password_hash, role, status) VALUES (?, ?, ?, ?, ?)",
+        [
+            (1, "admin", bcrypt.hashpw(b"s3cret", bcrypt.gensalt(4)).decode(), "admin", "active"),
+            (2, "legacy", "plain-pass\r\n", "staff", "active"),
+            (3, "gone", bcrypt.hashpw(b"s3cret", bcrypt.gensalt(4)).decode(), "staff", "inactive"),
+        ],
+    )
+    clinic.commit()
+    return clinic
+
+
+@pytest.fixture
+def auth(accounts):
+    service = AuthService(rounds=4, max_failures=3, failure_window=0.5)
+    yield service
+    service._hashers.shutdown(wait=True)
+
+
+def test_verify(auth):
+    assert auth.verify("admin", "s3cret") == (True, "Login successful.", "admin")
+    assert auth.verify("admin", "wrong") == (False, INVALID_LOGIN, None)
+    assert auth.verify("nobody", "s3cret") == (False, INVALID_LOGIN, None)
+    assert auth.verify("gone", "s3cret") == (False, "Account is not active.", None)
+
+
+def test_repeated_failures_throttle_the_username(auth):
+    for _ in range(3):
+        assert auth.verify("Admin", "wrong")[1] == INVALID_LOGIN
+    assert 0 < auth.retry_after("admin") <= 0.5
+    ok, msg, _ = auth.verify("admin", "s3cret")
+    assert not ok and msg.startswith("Too many failed attempts")
+    assert auth.retry_after("legacy") == 0.0
+    time.sleep(0.55)
+    assert auth.retry_after("admin") == 0.0
+    assert auth.verify("admin", "s3cret")[0]
+
+
+def test_unknown_usernames_are_throttled_too(auth):
+    for _ in range(3):
+        auth.verify("ghost", "guess")
+    assert auth.retry_after("ghost") > 0
+
+
+def test_success_resets_the_failure_count(auth):
+    for _ in range(2):
+        auth.verify("admin", "wrong")
+    assert auth.verify("admin", "s3cret")[0]
+    for _ in range(2):
+        auth.verify("admin", "wrong")
+    assert auth.retry_after("admin") == 0.0
+
+
+def test_plaintext_password_is_upgraded_after_login(auth, accounts):
+    assert auth.verify("legacy", "plain-pass") == (True, "Login successful.", "staff")
+    auth._hashers.shutdown(wait=True)
+    stored = accounts.execute("SELECT password_hash FROM user_accounts WHERE user_id = 2").fetchone()["password_hash"]
+    assert is_bcrypt_hash(stored) and bcrypt.checkpw(b"plain-pass", stored.encode())
+
+
+def test_unlock_rechecks_the_account(auth, accounts):
+    ok, msg, token = auth.login("admin", "s3cret")
+    assert ok, msg
+    assert auth.unlock(token.token, "wrong") == (False, INVALID_LOGIN, None)
+    ok, msg, renewed = auth.unlock(token.token, "s3cret")
+    assert ok and renewed.expires_at >= token.expires_at
+
+    accounts.execute("UPDATE user_accounts SET status = 'banned' WHERE user_id = 1")
+    accounts.commit()
+    assert auth.unlock(token.token, "s3cret") == (False, "Account is not active.", None)
+    assert auth.resume(token.token) is None
+    auth.logout(token.token)
+    assert auth.unlock(token.token, "s3cret")[1] == "Session expired. Sign in again."
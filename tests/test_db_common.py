@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+from clinic_app.db_common import boolean_query, build_fulltext_query, slot_bounds, split_sql
+
+
+def test_split_sql_ignores_semicolons_in_quotes_and_comments():
+    text = """
+    -- a comment; with a semicolon
+    INSERT INTO t VALUES ('a;b', "c;d");
+    /* block; comment */ SELECT 1;
+    # hash comment;
+    SELECT `odd;name` FROM t
+    """
+    assert split_sql(text) == [
+        "INSERT INTO t VALUES ('a;b', \"c;d\")",
+        "SELECT 1",
+        "SELECT `odd;name` FROM t",
+    ]
+
+
+def test_split_sql_keeps_escaped_quotes_inside_strings():
+    assert split_sql(r"SELECT 'it\'s; fine'; SELECT 2;") == [r"SELECT 'it\'s; fine'", "SELECT 2"]
+
+
+def test_split_sql_follows_delimiter_directives():
+    text = """
+CREATE TABLE t (delimiter INT);
+DELIMITER ;;
+CREATE TRIGGER t_ai AFTER INSERT ON t FOR EACH ROW
+BEGIN
+    INSERT INTO log VALUES (1);
+    INSERT INTO log VALUES (2);
+END;;
+DELIMITER ;
+SELECT delimiter FROM t;
+"""
+    statements = split_sql(text)
+    assert statements[0] == "CREATE TABLE t (delimiter INT)"
+    assert statements[1].startswith("CREATE TRIGGER t_ai") and statements[1].endswith("END")
+    assert statements[1].count(";") == 2
+    assert statements[2] == "SELECT delimiter FROM t"
+    assert len(statements) == 3
+
+
+def test_split_sql_delimiter_is_only_a_directive_between_statements():
+    text = "SELECT 1 AS x,\nDELIMITER\nFROM t;\nDELIMITER //\nSELECT 2//\n"
+    assert split_sql(text) == ["SELECT 1 AS x,\nDELIMITER\nFROM t", "SELECT 2"]
+
+
+def test_slot_bounds_cover_every_overlapping_start():
+    assert slot_bounds("2030-03-04 10:00:00") == ("2030-03-04 09:30:01", "2030-03-04 10:30:00")
+    assert slot_bounds(datetime.datetime(2030, 3, 4, 10)) == slot_bounds("2030-03-04T10:00:00")
+    assert slot_bounds("10:00 AM") is None
+
+
+def test_boolean_query_and_short_terms():
+    assert boolean_query('root  canal "x"') == "+root* +canal*"
+    sql, params = build_fulltext_query("patient_history h", {"id": "h.history_id"}, "h.diagnosis", "caries", 10, 0)
+    assert params == ["+caries*", "+caries*", 10, 0]
+    with pytest.raises(ValueError):
+        build_fulltext_query("patient_history h", {"id": "h.history_id"}, "h.diagnosis", "an ok", 10, 0)
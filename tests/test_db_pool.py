@@ -0,0 +1,105 @@
+import pytest
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+from clinic_app.db_pool import ConnectionPool
+
+
+class FakeConnection:
+    def __init__(self, n: int) -> None:
+        self.n = n
+        self.in_transaction = False
+        self.unread_result = False
+        self.closed = False
+        self.rollbacks = 0
+        self.fail_cleanup = False
+        self.alive = True
+
+    def rollback(self) -> None:
+        if self.fail_cleanup:
+            raise Error(msg="Lost connection to MySQL server during query")
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def consume_results(self) -> None:
+        self.unread_result = False
+
+    def ping(self, reconnect: bool = False) -> None:
+        if not self.alive:
+            raise Error(msg="MySQL server has gone away")
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def made():
+    return []
+
+
+def make_pool(made, **kwargs) -> ConnectionPool:
+    def factory():
+        made.append(FakeConnection(len(made)))
+        return made[-1]
+
+    return ConnectionPool(factory, **kwargs)
+
+
+def test_released_connection_is_reused(made):
+    pool = make_pool(made, size=2)
+    first = pool.acquire()
+    first.close()
+    first.close()  # a second close is a no-op, not a double release
+    second = pool.acquire()
+    assert second._raw is made[0]
+    assert pool.stats()["connects"] == 1 and pool.stats()["in_use"] == 1
+
+
+def test_exhausted_pool_raises_after_the_borrow_timeout(made):
+    pool = make_pool(made, size=1, borrow_timeout=0.01)
+    held = pool.acquire()
+    with pytest.raises(PoolError):
+        pool.acquire()
+    assert pool.stats()["exhausted"] == 1
+    held.close()
+    assert pool.acquire()._raw is made[0]
+
+
+def test_release_cleans_up_unread_results_and_open_transactions(made):
+    pool = make_pool(made)
+    conn = pool.acquire()
+    conn._raw.unread_result = True
+    conn._raw.in_transaction = True
+    conn.close()
+    assert made[0].rollbacks == 1 and not made[0].unread_result and not made[0].in_transaction
+    assert pool.stats()["idle"] == 1
+
+
+def test_connection_whose_cleanup_fails_is_discarded(made):
+    pool = make_pool(made)
+    conn = pool.acquire()
+    conn._raw.in_transaction = True
+    conn._raw.fail_cleanup = True
+    conn.close()
+    assert made[0].closed
+    assert pool.stats()["idle"] == 0 and pool.stats()["in_use"] == 0
+    assert pool.acquire()._raw is made[1]
+
+
+def test_stale_and_dead_idle_connections_are_replaced(made):
+    pool = make_pool(made, idle_timeout=0.0)
+    pool.acquire().close()
+    assert pool.acquire()._raw is made[1]
+    assert made[0].closed and pool.stats()["idle_expired"] == 1
+
+    pool = make_pool(made, health_check_after=-1.0)
+    conn = pool.acquire()
+    conn._raw.alive = False
+    conn.close()
+    assert pool.acquire()._raw is made[3]
+    assert pool.stats()["health_check_failures"] == 1 and pool.stats()["reconnects"] == 1
+
+
+def test_size_must_be_positive(made):
+    with pytest.raises(ValueError):
+        make_pool(made, size=0)
@@ -0,0 +1,102 @@
+import csv
+import datetime
+
+import pytest
+
+from clinic_app import db_sqlite
+from clinic_app.importer import import_patients_csv, validate_patient_row
+
+HEADER = ["first_name", "last_name", "birth_date", "gender", "phone", "email", "address"]
+
+
+def write_csv(path, rows) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def good_rows(n: int, start: int = 0) -> list[list]:
+    return [[f"Imp{i}", "Orted", "1980-01-01", "f", f"0917-{i:07d}", "", ""] for i in range(start, start + n)]
+
+
+def imported(conn) -> list[str]:
+    return [r["first_name"] for r in conn.execute("SELECT first_name FROM patients WHERE last_name = 'Orted' ORDER BY patient_id")]
+
+
+def rejects(csv_path) -> list[list[str]]:
+    with open(csv_path.with_name(csv_path.name + ".rejects.csv"), newline="", encoding="utf-8") as fh:
+        return list(csv.reader(fh))[1:]
+
+
+def test_validate_patient_row():
+    today = datetime.date(2030, 1, 1)
+    row, error = validate_patient_row({"first_name": " Ana ", "last_name": "Lim", "birth_date": "2020-01-01", "gender": "F"}, today)
+    assert error is None and row == ("Ana", "Lim", "2020-01-01", "child", "female", None, None, None)
+    assert validate_patient_row({"first_name": "Ana", "last_name": "Lim", "birth_date": "2031-01-01"}, today)[1]
+    assert validate_patient_row({"first_name": "Ana", "last_name": "", "birth_date": "2000-01-01"}, today)[1]
+    assert validate_patient_row({"first_name": "Ana", "last_name": "Lim", "birth_date": "2000-01-01", "gender": "x"}, today)[1]
+    assert validate_patient_row({"first_name": "Ana", "last_name": "Lim", "birth_date": "2000-01-01", "email": "nope"}, today)[1]
+
+
+def test_invalid_rows_go_to_the_rejects_file(clinic, tmp_path):
+    path = tmp_path / "patients.csv"
+    write_csv(path, [*good_rows(2), ["Bad", "Orted", "01/02/1980", "", "", "", ""], *good_rows(2, start=2)])
+    result = import_patients_csv(path, chunk_size=2)
+    assert result["ok"] and (result["rows_done"], result["inserted"], result["rejected"]) == (5, 4, 1)
+    assert imported(clinic) == ["Imp0", "Imp1", "Imp2", "Imp3"]
+    assert [r[:3] for r in rejects(path)] == [["3", "invalid birth_date '01/02/1980'", "Bad"]]
+
+
+def test_row_the_database_refuses_is_rejected_alone(clinic, tmp_path):
+    clinic.executescript("""
+        CREATE TRIGGER poison BEFORE INSERT ON patients WHEN new.first_name = 'Imp4'
+        BEGIN SELECT RAISE(ABORT, 'poison row'); END;
+    """)
+    path = tmp_path / "patients.csv"
+    write_csv(path, good_rows(7))
+    result = import_patients_csv(path, chunk_size=3)
+    assert result["ok"] and (result["inserted"], result["rejected"]) == (6, 1)
+    assert imported(clinic) == ["Imp0", "Imp1", "Imp2", "Imp3", "Imp5", "Imp6"]
+    assert [r[0] for r in rejects(path)] == ["5"] and "poison row" in rejects(path)[0][1]
+
+
+def test_interrupted_import_resumes_without_duplicates(clinic, tmp_path, monkeypatch):
+    path = tmp_path / "patients.csv"
+    write_csv(path, [*good_rows(4), ["Bad", "", "1980-01-01", "", "", "", ""], *good_rows(5, start=4)])
+    bulk = db_sqlite.insert_patients_bulk
+    calls = []
+
+    def flaky_bulk(rows):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            return False, "DB connection failed: server has gone away", 0
+        return bulk(rows)
+
+    def each_gives_up(rows):
+        return False, "DB connection failed: server has gone away", []
+
+    monkeypatch.setattr(db_sqlite, "insert_patients_bulk", flaky_bulk)
+    monkeypatch.setattr(db_sqlite, "insert_patients_each", each_gives_up)
+    result = import_patients_csv(path, chunk_size=3)
+    assert not result["ok"] and "gone away" in result["message"]
+    assert (result["rows_done"], result["inserted"]) == (3, 3)
+    monkeypatch.undo()
+
+    result = import_patients_csv(path, chunk_size=3)
+    assert result["ok"] and (result["rows_done"], result["inserted"], result["rejected"]) == (10, 9, 1)
+    assert imported(clinic) == [f"Imp{i}" for i in range(9)]
+    assert len(rejects(path)) == 1
+
+    restarted = import_patients_csv(path, chunk_size=3, resume=False)
+    assert restarted["inserted"] == 9 and len(rejects(path)) == 1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 100])
+def test_chunk_size_does_not_change_the_result(clinic, tmp_path, chunk_size):
+    path = tmp_path / "patients.csv"
+    write_csv(path, good_rows(9))
+    reports = []
+    result = import_patients_csv(path, chunk_size=chunk_size, report=reports.append)
+    assert result["inserted"] == 9 and reports[-1]["rows_done"] == 9
+    assert len(reports) == -(-9 // chunk_size)
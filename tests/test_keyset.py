@@ -0,0 +1,97 @@
+import pytest
+
+from clinic_app import db_sqlite
+from clinic_app.db_common import fetch_all_pages
+
+
+def _pages(fetch_page, page_size, **kwargs):
+    """Every page's rows in order, following the cursors."""
+    pages, after = [], None
+    while True:
+        ok, msg, rows, after = fetch_page(page_size=page_size, after=after, **kwargs)
+        assert ok, msg
+        pages.append(rows)
+        if after is None:
+            return pages
+
+
+@pytest.fixture
+def patients(clinic):
+    rows = [(f"First{i}", f"Last{i}", "1985-02-03", "adult", "other", None, None, None) for i in range(7)]
+    ok, msg, _ = db_sqlite.insert_patients_bulk(rows)
+    assert ok, msg
+    return [r["patient_id"] for r in clinic.execute("SELECT patient_id FROM patients ORDER BY patient_id")]
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 4, 10, 11])
+@pytest.mark.parametrize("descending", [False, True])
+def test_patient_pages_cover_every_row_once(patients, page_size, descending):
+    pages = _pages(db_sqlite.fetch_patients_page, page_size, descending=descending, columns=["first_name"])
+    ids = [row["patient_id"] for page in pages for row in page]
+    assert ids == sorted(patients, reverse=descending)
+    assert all(len(page) <= page_size for page in pages)
+
+
+@pytest.fixture
+def payments(clinic):
+    """Payments whose payment_date has ties and NULLs, spread across the id order."""
+    clinic.execute(
+        "INSERT INTO appointments (appointment_id, patient_id, dentist_id, scheduled_at, status)"
+        " VALUES (1, 1, 1, '2030-01-07 09:00:00', 'completed')"
+    )
+    dates = [
+        "2030-01-07 10:00:00", None, "2030-01-05 10:00:00", "2030-01-07 10:00:00", None,
+        "2030-01-06 10:00:00", None, "2030-01-05 10:00:00", "2030-01-07 10:00:00",
+    ]
+    clinic.executemany(
+        "INSERT INTO payments (payment_id, appointment_id, patient_id, amount, payment_date) VALUES (?, 1, 1, 100, ?)",
+        list(enumerate(dates, start=1)),
+    )
+    clinic.commit()
+    return dict(enumerate(dates, start=1))
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 4])
+def test_payment_date_pages_put_nulls_first_ascending(payments, page_size):
+    pages = _pages(db_sqlite.fetch_payments_page, page_size, order_by="payment_date")
+    ids = [row["payment_id"] for page in pages for row in page]
+    nulls = sorted(pid for pid, date in payments.items() if date is None)
+    dated = sorted((pid for pid, date in payments.items() if date is not None), key=lambda pid: (payments[pid], pid))
+    assert ids == nulls + dated
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 4])
+def test_payment_date_pages_put_nulls_last_descending(payments, page_size):
+    pages = _pages(db_sqlite.fetch_payments_page, page_size, order_by="payment_date", descending=True)
+    ids = [row["payment_id"] for page in pages for row in page]
+    nulls = sorted((pid for pid, date in payments.items() if date is None), reverse=True)
+    dated = sorted(
+        (pid for pid, date in payments.items() if date is not None),
+        key=lambda pid: (payments[pid], pid),
+        reverse=True,
+    )
+    assert ids == dated + nulls
+
+
+def test_cursor_inside_the_null_rows_resumes_there(payments):
+    ok, msg, rows, after = db_sqlite.fetch_payments_page(page_size=2, order_by="payment_date")
+    assert ok, msg
+    assert after == (None, 5)
+    ok, msg, rows, after = db_sqlite.fetch_payments_page(page_size=2, order_by="payment_date", after=after)
+    assert [r["payment_id"] for r in rows] == [7, 3]
+
+
+def test_fetch_all_pages_matches_one_query(payments):
+    ok, msg, rows = fetch_all_pages(db_sqlite.fetch_payments_page, page_size=2, order_by="payment_date")
+    assert ok, msg
+    assert len(rows) == len(payments)
+
+
+def test_bad_order_by_and_columns_are_refused(clinic):
+    ok, msg, rows, after = db_sqlite.fetch_payments_page(order_by="amount")
+    assert (ok, rows, after) == (False, None, None)
+    assert "amount" in msg
+    ok, msg, rows, _ = db_sqlite.fetch_patients_page(columns=["patient_id", "password"])
+    assert not ok and "password" in msg
+    ok, msg, rows, _ = db_sqlite.fetch_patients_page(page_size=0)
+    assert not ok
@@ -0,0 +1,192 @@
+"""
+Outbox flush against a stand-in for the MySQL server: a second SQLite file
+behind a thin shim that speaks the bits of mysql.connector replica.flush uses.
+"""
+import sqlite3
+
+import pytest
+from mysql.connector.errors import IntegrityError
+
+from clinic_app import db as sqlite_db
+from clinic_app import db_mysql, db_sqlite, replica
+from clinic_app.db_common import booked_message
+
+from conftest import seed_reference_rows
+
+SLOT = "2030-03-04 10:00:00"
+
+
+class ServerCursor:
+    def __init__(self, cur: sqlite3.Cursor) -> None:
+        self._cur = cur
+
+    def execute(self, sql: str, params=()) -> None:
+        sql = sql.replace("%s", "?").replace("<=>", "IS").replace(" FOR UPDATE", "")
+        try:
+            self._cur.execute(sql, tuple(params))
+        except sqlite3.IntegrityError as exc:
+            raise IntegrityError(msg=str(exc)) from exc
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+
+class Server:
+    """Just enough of a mysql.connector connection for replica.flush."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def start_transaction(self) -> None:
+        self.conn.execute("BEGIN")
+
+    def cursor(self, buffered: bool = False) -> ServerCursor:
+        return ServerCursor(self.conn.cursor())
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+    def rollback(self) -> None:
+        self.conn.rollback()
+
+    def close(self) -> None:
+        pass
+
+    def rows(self, sql: str, params=()) -> list[tuple]:
+        return [tuple(r) for r in self.conn.execute(sql, params)]
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    replica._init_replica(tmp_path / "replica.db")
+    seed_reference_rows(db_sqlite.get_connection())
+
+    conn = sqlite_db.get_connection(tmp_path / "server.db")
+    sqlite_db.init_schema(conn, seed=False)
+    seed_reference_rows(conn)
+    conn.isolation_level = None
+    # A server-side booking for another dentist, so server ids differ from local ones.
+    conn.execute(
+        "INSERT INTO appointments (appointment_id, patient_id, dentist_id, scheduled_at, status)"
+        " VALUES (10, 3, 2, '2030-03-01 09:00:00', 'scheduled')"
+    )
+    remote = Server(conn)
+    monkeypatch.setattr(db_mysql, "get_connection", lambda: remote)
+    yield remote
+    conn.close()
+
+
+def _local(sql: str, params=()) -> list[dict]:
+    return db_sqlite.get_connection().execute(sql, params).fetchall()
+
+
+def _outbox() -> list[tuple]:
+    return [(r["kind"], r["status"], r["remote_id"]) for r in _local("SELECT * FROM outbox ORDER BY op_id")]
+
+
+def _fail_once(monkeypatch):
+    """Make the next local bookkeeping step fail, as if the app died between the two commits."""
+    real = replica._record_outcomes
+
+    def fail(*args):
+        monkeypatch.setattr(replica, "_record_outcomes", real)
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(replica, "_record_outcomes", fail)
+
+
+def test_flush_sends_a_new_patient_and_their_booking(server):
+    assert replica.insert_patient("Ana", "Lim", "2000-05-05", "adult", "female", "0917-555-0000", None)[0]
+    temp_patient = _local("SELECT patient_id FROM patients WHERE last_name = 'Lim'")[0]["patient_id"]
+    ok, msg, temp_appt = replica.insert_appointment(temp_patient, 1, SLOT, "scheduled", "Check-up")
+    assert ok and temp_patient < 0 and temp_appt < 0, msg
+
+    assert replica.flush() == (True, "2 outbox entries synced.", 2)
+
+    [(patient_id,)] = server.rows("SELECT patient_id FROM patients WHERE last_name = 'Lim'")
+    [(appt_id, appt_patient)] = server.rows("SELECT appointment_id, patient_id FROM appointments WHERE scheduled_at = ?", (SLOT,))
+    assert appt_id == 11 and appt_patient == patient_id
+    assert _outbox() == [("patients", "done", patient_id), ("appointments", "done", appt_id)]
+    local = _local("SELECT appointment_id, patient_id FROM appointments WHERE scheduled_at = ?", (SLOT,))
+    assert local == [{"appointment_id": appt_id, "patient_id": patient_id}]
+    assert _local("SELECT COUNT(*) AS n FROM patients WHERE patient_id < 0")[0]["n"] == 0
+    assert replica.flush() == (True, "Outbox empty.", 0)
+
+
+def test_replay_after_a_crash_adopts_instead_of_duplicating(server, monkeypatch):
+    assert replica.insert_patient("Ana", "Lim", "2000-05-05", "adult", "female", "0917-555-0000", None)[0]
+    assert replica.insert_appointment(1, 1, SLOT, "scheduled", "Check-up")[0]
+    _fail_once(monkeypatch)
+
+    ok, msg, settled = replica.flush()
+    assert (ok, settled) == (False, 0) and msg.startswith("Local replica update failed")
+    assert [kind for kind, status, _ in _outbox() if status == "pending"] == ["patients", "appointments"]
+
+    assert replica.flush() == (True, "2 outbox entries synced.", 2)
+    assert server.rows("SELECT COUNT(*) FROM patients WHERE last_name = 'Lim'") == [(1,)]
+    assert server.rows("SELECT appointment_id FROM appointments WHERE scheduled_at = ?", (SLOT,)) == [(11,)]
+    assert _local("SELECT appointment_id FROM appointments WHERE scheduled_at = ?", (SLOT,)) == [{"appointment_id": 11}]
+
+
+def test_slot_booked_for_another_patient_is_parked(server):
+    server.conn.execute(
+        "INSERT INTO appointments (patient_id, dentist_id, scheduled_at, status) VALUES (2, 1, ?, 'scheduled')", (SLOT,)
+    )
+    ok, msg, temp_appt = replica.insert_appointment(1, 1, "2030-03-04 10:15:00", "scheduled", "Check-up")
+    assert ok, msg
+    assert replica.insert_payment(temp_appt, 1, 500, "cash", "paid")[0]
+
+    assert replica.flush() == (True, "2 outbox entries synced.", 2)
+
+    assert [status for _, status, _ in _outbox()] == ["conflict", "conflict"]
+    ok, msg, parked = replica.list_outbox("conflict")
+    assert parked[0]["last_error"] == booked_message(SLOT)
+    assert parked[1]["last_error"] == f"Depends on conflict outbox entry #{parked[0]['op_id']}."
+    assert _local("SELECT COUNT(*) AS n FROM appointments WHERE appointment_id < 0")[0]["n"] == 0
+    assert server.rows("SELECT COUNT(*) FROM appointments WHERE dentist_id = 1") == [(1,)]
+    assert server.rows("SELECT COUNT(*) FROM payments") == [(0,)]
+    assert replica.outbox_counts() == {"pending": 0, "conflict": 2, "failed": 0}
+
+
+def test_checkout_adopts_a_separate_booking_and_pays_once(server, monkeypatch):
+    # Booked at the front desk on the server; the checkout was rung up offline.
+    server.conn.execute(
+        "INSERT INTO appointments (appointment_id, patient_id, dentist_id, scheduled_at, status)"
+        " VALUES (20, 1, 1, ?, 'scheduled')",
+        (SLOT,),
+    )
+    ok, msg, temp_appt = replica.checkout(
+        1, 1, SLOT, "Cleaning", [{"treatment_id": 1, "fee": 800}, {"treatment_id": 3, "fee": 1500}],
+        2300, "card", "paid",
+    )
+    assert ok and temp_appt < 0, msg
+    _fail_once(monkeypatch)
+    assert replica.flush()[0] is False
+    assert replica.flush() == (True, "1 outbox entries synced.", 1)
+
+    assert server.rows("SELECT appointment_id FROM appointments WHERE dentist_id = 1") == [(20,)]
+    assert server.rows("SELECT treatment_id FROM appointment_treatments WHERE appointment_id = 20 ORDER BY 1") == [
+        (1,), (3,),
+    ]
+    assert server.rows("SELECT appointment_id, amount FROM payments") == [(20, 2300)]
+    assert _outbox() == [("checkout", "done", 20)]
+    assert _local("SELECT appointment_id FROM appointments WHERE scheduled_at = ?", (SLOT,)) == [{"appointment_id": 20}]
+
+
+def test_rejected_entry_stops_the_batch_then_fails(server):
+    assert replica.insert_patient_history(1, 999, "2030-03-04 10:00:00", diagnosis="Caries")[0]
+    assert replica.insert_appointment(2, 1, SLOT, "scheduled", "Check-up")[0]
+
+    for _ in range(replica.MAX_ATTEMPTS - 1):
+        ok, msg, settled = replica.flush()
+        assert (ok, settled) == (False, 0) and "rejected" in msg
+    assert replica.flush() == (True, "2 outbox entries synced.", 2)
+    assert [status for _, status, _ in _outbox()] == ["failed", "done"]
+    assert server.rows("SELECT COUNT(*) FROM patient_history") == [(0,)]
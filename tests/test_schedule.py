@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+
+from clinic_app import db_sqlite
+from clinic_app.db_common import booked_message
+from clinic_app.logic.schedule import STORE_FORMAT, DentistSchedule
+
+DAY = datetime.date.today() + datetime.timedelta(days=1)
+
+
+def at(hour: int, minute: int = 0) -> datetime.datetime:
+    return datetime.datetime.combine(DAY, datetime.time(hour, minute))
+
+
+def book(when: datetime.datetime, dentist_id: int = 1, patient_id: int = 1, status: str = "scheduled"):
+    return db_sqlite.insert_appointment(patient_id, dentist_id, when.strftime(STORE_FORMAT), status, "Check-up")
+
+
+def _count(conn, table: str) -> int:
+    return conn.execute(f"SELECT COUNT(*) AS n FROM {table}").fetchone()["n"]
+
+
+def test_overlapping_booking_is_refused(clinic):
+    ok, msg, appt_id = book(at(10))
+    assert ok and appt_id, msg
+    assert book(at(10, 15), patient_id=2) == (False, booked_message(at(10)), None)
+    assert book(at(9, 45), patient_id=2)[0] is False
+
+
+def test_adjacent_slot_and_other_dentist_are_free(clinic):
+    assert book(at(10))[0]
+    assert book(at(10, 30), patient_id=2)[0]
+    assert book(at(9, 30), patient_id=3)[0]
+    assert book(at(10), dentist_id=2, patient_id=2)[0]
+    assert _count(clinic, "appointments") == 4
+
+
+def test_cancelled_bookings_never_conflict(clinic):
+    assert book(at(11), status="cancelled")[0]
+    assert book(at(11), patient_id=2)[0]
+    assert book(at(11, 10), patient_id=3, status="cancelled")[0]
+
+
+def test_refused_checkout_writes_nothing(clinic):
+    assert book(at(14))[0]
+    before = {t: _count(clinic, t) for t in ("appointments", "appointment_treatments", "payments")}
+    ok, msg, appt_id = db_sqlite.checkout(
+        2, 1, at(14, 20).strftime(STORE_FORMAT), "Cleaning",
+        [{"treatment_id": 1, "fee": 800}], 800, "cash", "paid",
+    )
+    assert (ok, appt_id) == (False, None)
+    assert msg == booked_message(at(14))
+    assert {t: _count(clinic, t) for t in before} == before
+
+
+def test_checkout_writes_appointment_items_and_payment(clinic):
+    ok, msg, appt_id = db_sqlite.checkout(
+        2, 1, at(15).strftime(STORE_FORMAT), "Cleaning",
+        [{"treatment_id": 1, "fee": 800}, {"treatment_id": 2, "fee": 500}], 1300, "card", "paid",
+    )
+    assert ok, msg
+    items = clinic.execute("SELECT treatment_id FROM appointment_treatments WHERE appointment_id = ?", (appt_id,))
+    assert sorted(r["treatment_id"] for r in items) == [1, 2]
+    payment = clinic.execute("SELECT amount, payment_date FROM payments WHERE appointment_id = ?", (appt_id,)).fetchone()
+    assert payment["amount"] == 1300 and payment["payment_date"] is not None
+
+
+@pytest.fixture
+def schedule(clinic):
+    return DentistSchedule()
+
+
+def test_is_free_uses_the_slot_length(schedule):
+    assert book(at(8))[0]
+    assert schedule.is_free(1, at(8, 15)) == (True, f"Dentist is already booked at {at(8):%Y-%m-%d %I:%M %p}.", False)
+    assert schedule.is_free(1, at(8, 30)) == (True, "ok", True)
+    assert schedule.is_free(2, at(8)) == (True, "ok", True)
+
+
+def test_is_free_refuses_outside_opening_hours(schedule):
+    ok, msg, free = schedule.is_free(1, at(7))
+    assert ok and not free and "Outside clinic hours" in msg
+    assert schedule.is_free(1, at(16, 45))[2] is False
+    assert schedule.is_free(1, at(16, 30))[2] is True
+
+
+def test_next_free_slots_skip_booked_runs(schedule):
+    for when in (at(8), at(8, 30), at(9, 30)):
+        assert book(when)[0]
+    ok, msg, free = schedule.next_free_slots(1, after=at(7), n=3, days=1)
+    assert ok, msg
+    assert free == [at(9), at(10), at(10, 30)]
+
+
+def test_next_free_slots_roll_over_to_the_next_day(schedule):
+    ok, msg, free = schedule.next_free_slots(1, after=at(16, 40), n=2, days=2)
+    assert ok, msg
+    tomorrow = at(8) + datetime.timedelta(days=1)
+    assert free == [tomorrow, tomorrow + datetime.timedelta(minutes=30)]
+
+
+def test_invalidate_picks_up_new_bookings(schedule):
+    assert schedule.is_free(1, at(12))[2] is True
+    assert book(at(12))[0]
+    # The module's own schedule is dropped by the write listener; this instance is not.
+    assert schedule.is_free(1, at(12))[2] is True
+    schedule.invalidate()
+    assert schedule.is_free(1, at(12))[2] is False
@@ -0,0 +1,135 @@
+import itertools
+import json
+
+import pytest
+
+from clinic_app.logic.treatment import RuleTable, get_age_group, get_basic_treatment, recommend_many
+
+
+def legacy_treatment(age: int, reason: str) -> dict:
+    """get_basic_treatment as it was before the rules became data (the if/elif tree)."""
+    reason = reason.lower().strip()
+    age_group = get_age_group(age)
+
+    if "check" in reason:
+        reason_key = "checkup"
+    elif "clean" in reason or "prophy" in reason:
+        reason_key = "cleaning"
+    elif "braces" in reason or "ortho" in reason:
+        reason_key = "braces"
+    elif "pain" in reason or "ache" in reason or "toothache" in reason:
+        reason_key = "toothache"
+    else:
+        reason_key = "other"
+
+    treatment = {
+        "age": age,
+        "age_group": age_group,
+        "reason": reason_key,
+        "recommended_treatment": "",
+        "notes": "",
+    }
+
+    if age_group == "child":
+        if reason_key == "checkup":
+            treatment["recommended_treatment"] = "Oral exam, fluoride application, check if sealants are needed."
+            treatment["notes"] = "Focus on prevention and monitoring tooth/jaw development."
+        elif reason_key == "cleaning":
+            treatment["recommended_treatment"] = "Prophylaxis (cleaning) with fluoride treatment."
+            treatment["notes"] = "Teach proper brushing and flossing in a child-friendly way."
+        elif reason_key == "toothache":
+            treatment["recommended_treatment"] = "Exam, X-ray, filling or pulp therapy for affected baby/permanent tooth."
+            treatment["notes"] = "Use child behavior management techniques; involve parents."
+        elif reason_key == "braces":
+            treatment["recommended_treatment"] = "Orthodontic assessment (crowding, bite, jaw growth)."
+            treatment["notes"] = "May schedule full ortho workup if needed."
+        else:
+            treatment["recommended_treatment"] = "Basic exam, then refer to pediatric dentist if case is complex."
+            treatment["notes"] = "Clarify complaint; focus on comfort and reassurance."
+
+    elif age_group == "adult":
+        if reason_key == "checkup":
+            treatment["recommended_treatment"] = "Comprehensive exam, X-ray as needed, treatment plan discussion."
+            treatment["notes"] = "Review dental history, lifestyle, and habits."
+        elif reason_key == "cleaning":
+            treatment["recommended_treatment"] = "Scaling and polishing; oral hygiene instructions."
+            treatment["notes"] = "Check for early gum disease and stains."
+        elif reason_key == "toothache":
+            treatment["recommended_treatment"] = "Exam, X-ray, possible filling, root canal, or extraction."
+            treatment["notes"] = "Explain options, cost, and follow-up visits."
+        elif reason_key == "braces":
+            treatment["recommended_treatment"] = "Orthodontic consultation (malocclusion, spacing, crowding)."
+            treatment["notes"] = "Discuss braces vs clear aligners if available."
+        else:
+            treatment["recommended_treatment"] = "Initial exam and diagnosis; refer to specialist if needed."
+            treatment["notes"] = "May involve endodontist, periodontist, or oral surgeon."
+
+    else:  # age_group == "old"
+        if reason_key == "checkup":
+            treatment["recommended_treatment"] = "Exam of teeth, gums, dentures/implants; X-ray if needed."
+            treatment["notes"] = "Consider medical history and medications (e.g., diabetes, hypertension)."
+        elif reason_key == "cleaning":
+            treatment["recommended_treatment"] = "Gentle scaling (may be deep cleaning) and polishing."
+            treatment["notes"] = "Gums and bone may be fragile; check for periodontal disease."
+        elif reason_key == "toothache":
+            treatment["recommended_treatment"] = "Exam, X-ray, check old fillings/crowns, treat root or gum problems."
+            treatment["notes"] = "Consider pain control, systemic health, and ability to heal."
+        elif reason_key == "braces":
+            treatment["recommended_treatment"] = "Consultation for bite/teeth alignment and prosthetic planning."
+            treatment["notes"] = "More common to adjust dentures/implants than full ortho treatment."
+        else:
+            treatment["recommended_treatment"] = "Exam plus review of existing dentures/implants and oral hygiene."
+            treatment["notes"] = "Focus on comfort, function, and quality of life."
+
+    return treatment
+
+
+AGES = [0, 5, 12, 13, 30, 59, 60, 85]
+REASONS = [
+    "Check-up", "  CHECKUP  ", "teeth cleaning", "PROPHY", "ortho consult", "braces check",
+    "toothache", "Pain after cleaning", "ache", "earache and braces", "", "random", "Extraction",
+]
+
+
+@pytest.mark.parametrize("age, reason", list(itertools.product(AGES, REASONS)))
+def test_rule_table_matches_the_if_elif_tree(age, reason):
+    expected = legacy_treatment(age, reason)
+    assert RuleTable().recommend(age, reason) == expected
+    assert get_basic_treatment(age, reason) == expected
+
+
+def test_recommend_many_matches_one_by_one():
+    pairs = list(itertools.product(AGES, REASONS))
+    ages, reasons = [a for a, _ in pairs], [r for _, r in pairs]
+    assert recommend_many(ages, reasons) == [legacy_treatment(a, r) for a, r in pairs]
+
+
+def test_recommend_many_validates_its_input():
+    with pytest.raises(ValueError):
+        RuleTable().recommend_many([30, 40], ["Check-up"])
+    with pytest.raises(ValueError):
+        RuleTable().recommend_many([-1], ["Check-up"])
+
+
+def test_suggestions_respect_the_catalog_age_group():
+    rules = RuleTable().with_catalog([
+        {"treatment_id": 1, "name": "Cleaning", "age_group": "any"},
+        {"treatment_id": 2, "name": "Fluoride", "age_group": "child"},
+    ])
+    assert [r["treatment_id"] for r in rules.treatments_for("child", "cleaning")] == [1, 2]
+    assert [r["treatment_id"] for r in rules.treatments_for("adult", "cleaning")] == [1]
+    assert rules.treatments_for("adult", "toothache") == ()
+
+
+def test_rules_load_from_json(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "keywords": [["whitening", ["white", "bleach"]]],
+        "plans": {"adult": {"whitening": ["Bleaching tray", "Two visits."], "other": ["Exam", ""]}},
+    }))
+    rules = RuleTable.from_file(path)
+    assert rules.recommend(30, "Teeth whitening")["recommended_treatment"] == "Bleaching tray"
+    assert rules.recommend(30, "Check-up")["reason"] == "other"
+    path.write_text(json.dumps({"keywords": []}))
+    with pytest.raises(ValueError):
+        RuleTable.from_file(path)